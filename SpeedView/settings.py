@@ -30,6 +30,16 @@ SECRET_KEY = 'django-insecure-7=0&h2o71kncnbvc(g8r!%j($^z(9=$m%4i5n9u5^!^-xfbp5h
 PRODUCTION = os.getenv('PRODUCTION', 'False').lower() == 'true'
 DEBUG = True
 
+# Bearer token for scraping /api/metrics/ without a staff session.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Run a refresh job in the web process once it has been queued this many
+# seconds without a run_refresh_worker claiming it. 0 disables the fallback.
+REFRESH_INLINE_FALLBACK_SECONDS = int(os.getenv('REFRESH_INLINE_FALLBACK_SECONDS', '15'))
+# Running refresh jobs without a heartbeat for this long are requeued, e.g.
+# after the web process running one inline was recycled.
+REFRESH_STALE_AFTER_SECONDS = int(os.getenv('REFRESH_STALE_AFTER_SECONDS', '600'))
+
 ALLOWED_HOSTS = ["localhost", "127.0.0.1", "helven-marcia-speedview.pbp.cs.ui.ac.id", "naila-khadijah-speedview.pbp.cs.ui.ac.id"]
 CSRF_TRUSTED_ORIGINS = [
     "https://helven-marcia-speedview.pbp.cs.ui.ac.id",
@@ -63,6 +73,7 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'main.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
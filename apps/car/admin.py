@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Car
+from .models import Car, CarSessionStats, CarTrace, RefreshJob
 
 class ReadOnlyMixin:
     actions = None
@@ -24,3 +24,26 @@ class CarAdmin(ReadOnlyMixin, admin.ModelAdmin):
     readonly_fields = ('created_at', 'updated_at')
     ordering = ('-date',)
     list_display_links = None
+
+@admin.register(CarTrace)
+class CarTraceAdmin(ReadOnlyMixin, admin.ModelAdmin):
+    list_display = ('id', 'driver_number', 'session_key', 'meeting_key', 'start_date', 'end_date', 'sample_count', 'updated_at')
+    list_filter = ('session_key', 'meeting_key', 'driver_number')
+    exclude = ('payload',)
+    ordering = ('session_key', 'driver_number')
+    list_display_links = None
+
+@admin.register(RefreshJob)
+class RefreshJobAdmin(ReadOnlyMixin, admin.ModelAdmin):
+    list_display = ('id', 'meeting_key', 'status', 'full', 'rows_processed', 'created_rows', 'updated_rows', 'deleted_rows', 'created_at', 'finished_at')
+    list_filter = ('status', 'full')
+    search_fields = ('meeting_key',)
+    ordering = ('-created_at',)
+    list_display_links = None
+
+@admin.register(CarSessionStats)
+class CarSessionStatsAdmin(ReadOnlyMixin, admin.ModelAdmin):
+    list_display = ('session_key', 'driver_number', 'meeting_key', 'sample_count', 'max_speed', 'mean_speed', 'max_rpm', 'drs_open_seconds', 'updated_at')
+    list_filter = ('meeting_key', 'session_key')
+    ordering = ('session_key', 'driver_number')
+    list_display_links = None
@@ -0,0 +1,129 @@
+from itertools import groupby
+from typing import Callable, Dict, Iterable, List, Sequence
+
+import numpy as np
+from django.utils.dateparse import parse_datetime
+
+from apps.car.models import CarTrace
+from apps.car.traces import epoch_ms, unpack_trace
+
+
+# Response column name -> Car field.
+CHANNELS = (
+    ("speed", "speed"),
+    ("rpm", "rpm"),
+    ("throttle", "throttle"),
+    ("brake", "brake"),
+    ("gear", "n_gear"),
+    ("drs", "drs"),
+)
+GROUP_FIELDS = ("driver_number", "session_key", "meeting_key")
+VALUE_FIELDS = GROUP_FIELDS + ("date",) + tuple(field for _, field in CHANNELS)
+
+# Receives the timestamp array and the channel arrays, returns indices to keep.
+Selector = Callable[[np.ndarray, Dict[str, np.ndarray]], Sequence[int]]
+
+
+def _group(
+    driver_number,
+    session_key,
+    meeting_key,
+    timestamps: np.ndarray,
+    columns: Dict[str, np.ndarray],
+    select: Selector | None = None,
+) -> dict:
+    if select is not None and len(timestamps):
+        keep = select(timestamps, columns)
+        timestamps = timestamps[keep]
+        columns = {name: values[keep] for name, values in columns.items()}
+    payload = {"timestamp_ms": timestamps.tolist()}
+    payload.update((name, values.tolist()) for name, values in columns.items())
+    return {
+        "session_key": session_key,
+        "meeting_key": meeting_key,
+        "driver_number": driver_number,
+        "count": len(timestamps),
+        "columns": payload,
+    }
+
+
+def groups_from_values(rows: Iterable[tuple], select: Selector | None = None) -> List[dict]:
+    """
+    Build columnar groups from ``values_list(*VALUE_FIELDS)`` tuples ordered by
+    driver_number, session_key, date. No model instances are created.
+    """
+    groups = []
+    for key, group_rows in groupby(rows, key=lambda row: row[:3]):
+        columns = list(zip(*group_rows))
+        timestamps = np.fromiter(
+            (epoch_ms(value) for value in columns[3]),
+            dtype=np.int64,
+            count=len(columns[3]),
+        )
+        channels = {
+            name: np.asarray(values, dtype=np.int64)
+            for (name, _), values in zip(CHANNELS, columns[4:])
+        }
+        groups.append(_group(*key, timestamps, channels, select))
+    return groups
+
+
+def group_from_trace(trace: CarTrace, select: Selector | None = None) -> dict:
+    data = unpack_trace(trace)
+    offsets = np.frombuffer(data.offset_ms, dtype=data.offset_ms.typecode)
+    timestamps = offsets.astype(np.int64) + data.start_ms
+    channels = {}
+    for name, field in CHANNELS:
+        column = getattr(data, field)
+        channels[name] = np.frombuffer(column, dtype=column.typecode).astype(np.int64)
+    return _group(
+        trace.driver_number,
+        trace.session_key,
+        trace.meeting_key,
+        timestamps,
+        channels,
+        select,
+    )
+
+
+def group_from_openf1_rows(
+    rows: List[dict],
+    driver_number: int,
+    session_key: int,
+    meeting_key: int | None,
+    select: Selector | None = None,
+) -> dict:
+    parsed = [(parse_datetime(row.get("date") or ""), row) for row in rows]
+    parsed = [(date, row) for date, row in parsed if date is not None]
+    timestamps = np.fromiter(
+        (epoch_ms(date) for date, _ in parsed), dtype=np.int64, count=len(parsed)
+    )
+    channels = {
+        name: np.fromiter(
+            (row.get(field) or 0 for _, row in parsed), dtype=np.int64, count=len(parsed)
+        )
+        for name, field in CHANNELS
+    }
+    return _group(driver_number, session_key, meeting_key, timestamps, channels, select)
+
+
+def merge_groups(groups: List[dict]) -> List[dict]:
+    """Combine groups that share a key (e.g. a trace plus manual rows), time-ordered."""
+    merged: Dict[tuple, dict] = {}
+    for group in groups:
+        key = (group["driver_number"], group["session_key"], group["meeting_key"])
+        current = merged.get(key)
+        if current is None:
+            merged[key] = group
+            continue
+        columns = {
+            name: np.asarray(current["columns"][name] + group["columns"][name])
+            for name in current["columns"]
+        }
+        order = np.argsort(columns["timestamp_ms"], kind="stable")
+        current["columns"] = {name: values[order].tolist() for name, values in columns.items()}
+        current["count"] = len(order)
+    return [
+        merged[key]
+        for key in sorted(merged, key=lambda k: (k[0], k[1] or 0, k[2] or 0))
+    ]
@@ -0,0 +1,81 @@
+import numpy as np
+
+
+ALGORITHMS = ("lttb", "minmax", "every_nth")
+DEFAULT_ALGORITHM = "lttb"
+MIN_POINTS = 3
+MAX_POINTS = 20000
+
+
+def every_nth(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    n = len(y)
+    step = -(-n // max_points)
+    return np.arange(0, n, step)
+
+
+def minmax(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Keep the lowest and highest sample of each of ``max_points // 2`` buckets."""
+    n = len(y)
+    buckets = max(1, max_points // 2)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    bucket_ids = np.repeat(np.arange(buckets), np.diff(edges))
+    # Sorting by (bucket, value) puts each bucket's min first and max last.
+    order = np.lexsort((y, bucket_ids))
+    picks = np.concatenate((order[edges[:-1]], order[edges[1:] - 1]))
+    return np.unique(picks)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: keep the first and last samples and,
+    per bucket, the sample forming the largest triangle with the previous
+    pick and the next bucket's centroid. Bucket centroids are computed in
+    one ``reduceat`` pass; only the pick itself walks the buckets.
+    """
+    n = len(y)
+    if max_points >= n or max_points < MIN_POINTS:
+        return np.arange(n)
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    starts = edges[:-1]
+    widths = np.diff(edges)
+    mean_x = np.add.reduceat(x, starts) / widths
+    mean_y = np.add.reduceat(y, starts) / widths
+    # The last bucket looks ahead to the final sample.
+    mean_x = np.append(mean_x[1:], x[-1])
+    mean_y = np.append(mean_y[1:], y[-1])
+
+    picks = np.empty(max_points, dtype=np.int64)
+    picks[0] = 0
+    picks[-1] = n - 1
+    anchor = 0
+    for bucket, (start, end) in enumerate(zip(starts, edges[1:])):
+        ax, ay = x[anchor], y[anchor]
+        xs = x[start:end]
+        ys = y[start:end]
+        area = np.abs(
+            (ax - mean_x[bucket]) * (ys - ay) - (ax - xs) * (mean_y[bucket] - ay)
+        )
+        anchor = start + int(area.argmax())
+        picks[bucket + 1] = anchor
+    return picks
+
+
+_ALGORITHM_FUNCS = {
+    "lttb": lttb,
+    "minmax": minmax,
+    "every_nth": every_nth,
+}
+
+
+def select_indices(x, y, max_points: int, algorithm: str = DEFAULT_ALGORITHM) -> np.ndarray:
+    """
+    Return sorted indices of the samples to keep so that at most
+    ``max_points`` remain. ``x`` is time (any monotonic unit), ``y`` the metric.
+    """
+    y = np.asarray(y)
+    if len(y) <= max_points:
+        return np.arange(len(y))
+    return _ALGORITHM_FUNCS[algorithm](np.asarray(x), y, max_points)
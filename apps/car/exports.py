@@ -0,0 +1,107 @@
+import csv
+import json
+import zlib
+from io import StringIO
+from typing import Iterable, Iterator
+
+from django.core import serializers
+from django.db.models import QuerySet
+
+
+EXPORT_FORMATS = ("xml", "jsonl", "csv")
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_CONTENT_TYPES = {
+    "xml": "application/xml",
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv",
+}
+EXPORT_FIELDS = (
+    "id",
+    "meeting_key",
+    "session_key",
+    "driver_number",
+    "date",
+    "speed",
+    "rpm",
+    "throttle",
+    "brake",
+    "n_gear",
+    "drs",
+    "is_manual",
+    "created_at",
+    "updated_at",
+)
+
+_XML_HEADER = '<?xml version="1.0" encoding="utf-8"?>\n<django-objects version="1.0">'
+_XML_FOOTER = "</django-objects>"
+
+
+def _chunks(queryset: QuerySet, chunk_size: int) -> Iterator[list]:
+    chunk = []
+    for item in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _json_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def iter_xml(queryset: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Same document as ``serializers.serialize("xml", queryset)``, produced one
+    chunk of objects at a time so only ``chunk_size`` instances are in memory.
+    """
+    yield _XML_HEADER
+    for chunk in _chunks(queryset, chunk_size):
+        document = serializers.serialize("xml", chunk)
+        yield document[document.index(_XML_HEADER) + len(_XML_HEADER):document.rindex(_XML_FOOTER)]
+    yield _XML_FOOTER
+
+
+def iter_jsonl(queryset: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    for row in queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size):
+        record = {field: _json_value(value) for field, value in zip(EXPORT_FIELDS, row)}
+        yield json.dumps(record) + "\n"
+
+
+def iter_csv(queryset: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    rows = queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([_json_value(value) for value in row])
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    tail = buffer.getvalue()
+    if tail:
+        yield tail
+
+
+_WRITERS = {
+    "xml": iter_xml,
+    "jsonl": iter_jsonl,
+    "csv": iter_csv,
+}
+
+
+def iter_export(queryset: QuerySet, fmt: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    return _WRITERS[fmt](queryset, chunk_size)
+
+
+def gzip_stream(parts: Iterable[str]) -> Iterator[bytes]:
+    """Gzip-compress a text stream incrementally."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for part in parts:
+        data = compressor.compress(part.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
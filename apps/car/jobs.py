@@ -0,0 +1,236 @@
+import threading
+from datetime import timedelta
+from typing import Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.car.models import RefreshJob
+from apps.car.refresh import refresh_meeting
+from apps.car.services import IngestResult
+
+
+# Progress is written at most this often so large refreshes are not slowed
+# down by a status UPDATE per chunk.
+PROGRESS_INTERVAL_SECONDS = 1.0
+# Running jobs touch ``heartbeat_at`` this often, even while blocked on OpenF1.
+HEARTBEAT_INTERVAL_SECONDS = 15.0
+
+
+def enqueue_refresh(
+    meeting_key: int,
+    *,
+    min_speed: int,
+    max_speed: int | None,
+    batch_size: int,
+    full: bool = False,
+) -> Tuple[RefreshJob, bool]:
+    """
+    Queue a refresh for ``meeting_key`` unless one is already queued or
+    running. Returns ``(job, created)``.
+    """
+    # A job orphaned by a dead process must not block the meeting for good.
+    requeue_stale_jobs(stale_after())
+    active = RefreshJob.objects.filter(
+        meeting_key=meeting_key, status__in=RefreshJob.ACTIVE_STATUSES
+    )
+    job = active.first()
+    if job is not None:
+        return job, False
+    try:
+        with transaction.atomic():
+            job = RefreshJob.objects.create(
+                meeting_key=meeting_key,
+                min_speed=min_speed,
+                max_speed=max_speed,
+                batch_size=batch_size,
+                full=full,
+            )
+    except IntegrityError:
+        # Another request queued the same meeting between our check and insert.
+        return active.get(), False
+    return job, True
+
+
+def _claim(job: RefreshJob) -> RefreshJob | None:
+    now = timezone.now()
+    claimed = RefreshJob.objects.filter(pk=job.pk, status=RefreshJob.Status.QUEUED).update(
+        status=RefreshJob.Status.RUNNING, started_at=now, heartbeat_at=now, updated_at=now
+    )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def claim_next_job() -> RefreshJob | None:
+    """
+    Atomically move the oldest queued job to ``running``. Uses
+    ``SELECT ... FOR UPDATE SKIP LOCKED`` where the backend supports it;
+    the conditional UPDATE keeps claims exclusive everywhere else.
+    """
+    with transaction.atomic():
+        queued = RefreshJob.objects.filter(status=RefreshJob.Status.QUEUED).order_by(
+            "created_at", "id"
+        )
+        if connection.features.has_select_for_update_skip_locked:
+            queued = queued.select_for_update(skip_locked=True)
+        job = queued.first()
+        if job is None:
+            return None
+        return _claim(job)
+
+
+def stale_after() -> timedelta:
+    return timedelta(seconds=max(1, settings.REFRESH_STALE_AFTER_SECONDS))
+
+
+def requeue_stale_jobs(older_than: timedelta) -> int:
+    """
+    Put running jobs whose worker stopped sending heartbeats back in the
+    queue. Chunk progress is not used: a live job can go minutes without a
+    chunk while it waits on a slow or rate-limited OpenF1 call.
+    """
+    cutoff = timezone.now() - older_than
+    return RefreshJob.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, updated_at__lt=cutoff),
+        status=RefreshJob.Status.RUNNING,
+    ).update(
+        status=RefreshJob.Status.QUEUED,
+        started_at=None,
+        heartbeat_at=None,
+        updated_at=timezone.now(),
+    )
+
+
+def _heartbeat(job_pk: int, stop: threading.Event) -> None:
+    try:
+        while not stop.wait(HEARTBEAT_INTERVAL_SECONDS):
+            RefreshJob.objects.filter(pk=job_pk, status=RefreshJob.Status.RUNNING).update(
+                heartbeat_at=timezone.now()
+            )
+    finally:
+        connection.close()
+
+
+def _record(job: RefreshJob, result: IngestResult, **extra) -> None:
+    fields = {
+        "rows_processed": result.rows,
+        "created_rows": result.created,
+        "updated_rows": result.updated,
+        "skipped_rows": result.skipped,
+        "elapsed_seconds": result.elapsed,
+        "updated_at": timezone.now(),
+        **extra,
+    }
+    RefreshJob.objects.filter(pk=job.pk).update(**fields)
+
+
+def run_job(job: RefreshJob) -> RefreshJob:
+    last_report = [0.0]
+
+    def report(result: IngestResult) -> None:
+        if result.elapsed - last_report[0] >= PROGRESS_INTERVAL_SECONDS:
+            last_report[0] = result.elapsed
+            _record(job, result)
+
+    stop = threading.Event()
+    heartbeat = threading.Thread(
+        target=_heartbeat, args=(job.pk, stop), name=f"refresh-heartbeat-{job.pk}", daemon=True
+    )
+    heartbeat.start()
+    try:
+        result, deleted, _ = refresh_meeting(
+            job.meeting_key,
+            min_speed=job.min_speed,
+            max_speed=job.max_speed,
+            batch_size=job.batch_size,
+            full=job.full,
+            on_progress=report,
+        )
+    except Exception as exc:
+        RefreshJob.objects.filter(pk=job.pk).update(
+            status=RefreshJob.Status.FAILED,
+            error=f"{type(exc).__name__}: {exc}",
+            finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+    else:
+        _record(
+            job,
+            result,
+            deleted_rows=deleted,
+            status=RefreshJob.Status.SUCCEEDED,
+            finished_at=timezone.now(),
+        )
+    finally:
+        stop.set()
+        heartbeat.join()
+    job.refresh_from_db()
+    return job
+
+
+def run_next_job() -> RefreshJob | None:
+    job = claim_next_job()
+    if job is None:
+        return None
+    return run_job(job)
+
+
+def _run_in_thread(job: RefreshJob) -> None:
+    def target():
+        try:
+            run_job(job)
+        finally:
+            connection.close()
+
+    threading.Thread(target=target, name=f"refresh-inline-{job.pk}", daemon=True).start()
+
+
+def run_unclaimed_job(job: RefreshJob, *, queued_for: timedelta) -> bool:
+    """
+    Run ``job`` in a thread of this process when it has been queued longer
+    than ``queued_for``, i.e. no ``run_refresh_worker`` is taking jobs.
+    The claim is exclusive, so a worker that starts meanwhile cannot run it
+    too. Returns whether this call started it.
+    """
+    if job.status != RefreshJob.Status.QUEUED or job.created_at > timezone.now() - queued_for:
+        return False
+    claimed = _claim(job)
+    if claimed is None:
+        return False
+    _run_in_thread(claimed)
+    return True
+
+
+def _rows_per_second(job: RefreshJob) -> float:
+    # Same definition as IngestResult.rows_per_second.
+    if job.elapsed_seconds <= 0:
+        return 0.0
+    return round((job.created_rows + job.updated_rows) / job.elapsed_seconds, 1)
+
+
+def serialize_job(job: RefreshJob) -> dict:
+    return {
+        "id": job.id,
+        "meeting_key": job.meeting_key,
+        "status": job.status,
+        "full": job.full,
+        "min_speed": job.min_speed,
+        "max_speed": job.max_speed,
+        "batch_size": job.batch_size,
+        "rows_processed": job.rows_processed,
+        "created": job.created_rows,
+        "updated": job.updated_rows,
+        "deleted": job.deleted_rows,
+        "skipped": job.skipped_rows,
+        "elapsed_seconds": round(job.elapsed_seconds, 3),
+        "rows_per_second": _rows_per_second(job),
+        "error": job.error or None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "heartbeat_at": job.heartbeat_at.isoformat() if job.heartbeat_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+
+from apps.car.models import Car
+from apps.car.traces import compact_pairs
+
+
+class Command(BaseCommand):
+    help = "Pack imported Car telemetry into compact per-session/driver traces."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--meeting-key",
+            type=int,
+            action="append",
+            dest="meeting_keys",
+        )
+        parser.add_argument(
+            "--session-key",
+            type=int,
+            action="append",
+            dest="session_keys",
+        )
+        parser.add_argument(
+            "--driver-number",
+            type=int,
+            action="append",
+            dest="driver_numbers",
+        )
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="Delete the imported Car rows once they are stored in a trace.",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Car.objects.filter(is_manual=False, session_key__isnull=False)
+        if options.get("meeting_keys"):
+            queryset = queryset.filter(meeting_key__in=options["meeting_keys"])
+        if options.get("session_keys"):
+            queryset = queryset.filter(session_key__in=options["session_keys"])
+        if options.get("driver_numbers"):
+            queryset = queryset.filter(driver_number__in=options["driver_numbers"])
+
+        pairs = list(
+            queryset.order_by()
+            .values_list("session_key", "driver_number")
+            .distinct()
+        )
+        if not pairs:
+            self.stdout.write(self.style.WARNING("No imported telemetry matched."))
+            return
+
+        traces, pruned = compact_pairs(pairs, prune=options["prune"])
+        msg = f"Built {traces} traces"
+        if options["prune"]:
+            msg += f", pruned {pruned} Car rows"
+        self.stdout.write(self.style.SUCCESS(msg + "."))
@@ -1,21 +1,31 @@
-import json
 import time
-from json import JSONDecodeError
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from itertools import islice
 from typing import Dict, Iterable, List, Optional, Tuple, Union
-from urllib.error import HTTPError, URLError
 from urllib.parse import urlencode
-from urllib.request import Request, urlopen
 
+import requests
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.utils.dateparse import parse_datetime
 
-from apps.car.models import Car
+from apps.car.services import RelatedRecordResolver, car_from_openf1_row, upsert_cars
+from apps.car.stats import refresh_session_stats
+from apps.car.traces import refresh_existing_traces
 from apps.meeting.models import Meeting
+from apps.openf1.client import OPENF1_POOL_SIZE, OpenF1Client
+from apps.openf1.ingest import DEFAULT_INGEST_BATCH_SIZE, clamp_batch_size
+from apps.openf1.ratelimit import (
+    OPENF1_REQUESTS_PER_MINUTE,
+    OPENF1_REQUESTS_PER_SECOND,
+    RateLimiter,
+)
 from apps.session.models import Session
 
 
-BASE_URL = "https://api.openf1.org/v1/car_data"
-SESS_URL = "https://api.openf1.org/v1/sessions"
+# Fetches queued per worker thread in --concurrency mode.
+FETCH_WINDOW_PER_WORKER = 2
 
 
 class Command(BaseCommand):
@@ -42,7 +52,8 @@ class Command(BaseCommand):
             "--sleep",
             type=float,
             default=0.0,
-            help="Optional sleep (in seconds) between API calls to avoid rate limiting.",
+            help="Optional sleep (in seconds) between API calls. Sequential imports only; "
+            "with --concurrency use --rate instead.",
         )
         parser.add_argument(
             "--min-speed",
@@ -66,8 +77,37 @@ class Command(BaseCommand):
             "--debug",
             action="store_true",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_INGEST_BATCH_SIZE,
+            help="Rows per INSERT ... ON CONFLICT statement.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Number of parallel API fetches. Database writes stay on the main thread.",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=OPENF1_REQUESTS_PER_SECOND,
+            help="Max API requests per second across all workers (0 disables).",
+        )
+        parser.add_argument(
+            "--rate-per-minute",
+            type=float,
+            default=OPENF1_REQUESTS_PER_MINUTE,
+            help="Max API requests per minute across all workers (0 disables).",
+        )
 
     def handle(self, *args, **options):
+        if options["sleep"] and options["concurrency"] > 1:
+            raise CommandError(
+                "--sleep only applies with --concurrency 1; "
+                "use --rate/--rate-per-minute to pace parallel fetches."
+            )
         meeting_keys = self._resolve_meeting_keys(options["meeting_keys"])
         if not meeting_keys:
             raise CommandError("No meeting keys found. Add meetings first or pass --meeting-key.")
@@ -80,6 +120,19 @@ class Command(BaseCommand):
         min_speed = options.get("min_speed")
         self._http_timeout: float = options["timeout"]
         self._debug: bool = options["debug"]
+        self._batch_size: int = clamp_batch_size(options["batch_size"])
+        self._resolver = RelatedRecordResolver()
+        self._touched_pairs: set[Tuple[int, int]] = set()
+
+        self._limiter = RateLimiter.per_second_and_minute(
+            options["rate"], options["rate_per_minute"]
+        )
+        concurrency = max(1, options["concurrency"])
+        self._client = OpenF1Client(
+            timeout=self._http_timeout,
+            rate_limiter=self._limiter,
+            pool_size=max(OPENF1_POOL_SIZE, concurrency),
+        )
 
         total_created = 0
         total_updated = 0
@@ -87,16 +140,34 @@ class Command(BaseCommand):
         self._meeting_cache: set[int] = set()
         self._session_cache: Dict[int, Session] = {}
 
-        for meeting_key in meeting_keys:
-            rows, created, updated = self._process_meeting(
-                meeting_key=meeting_key,
+        if concurrency > 1:
+            results = self._run_concurrent(
+                meeting_keys=meeting_keys,
                 session_keys=session_keys,
                 driver_numbers=driver_numbers,
                 dry_run=dry_run,
                 create_only=create_only,
-                sleep_time=sleep_time,
                 min_speed=min_speed,
+                concurrency=concurrency,
             )
+        else:
+            results = (
+                (
+                    meeting_key,
+                    self._process_meeting(
+                        meeting_key=meeting_key,
+                        session_keys=session_keys,
+                        driver_numbers=driver_numbers,
+                        dry_run=dry_run,
+                        create_only=create_only,
+                        sleep_time=sleep_time,
+                        min_speed=min_speed,
+                    ),
+                )
+                for meeting_key in meeting_keys
+            )
+
+        for meeting_key, (rows, created, updated) in results:
             if rows == 0:
                 self.stdout.write(self.style.WARNING(
                     f"[-] meeting {meeting_key}: no telemetry returned (or request failed)."
@@ -111,6 +182,13 @@ class Command(BaseCommand):
             total_created += created
             total_updated += updated
 
+        refreshed = refresh_existing_traces(self._touched_pairs)
+        if refreshed:
+            self.stdout.write(f"Refreshed {refreshed} compact telemetry traces.")
+        stats = refresh_session_stats(self._touched_pairs)
+        if stats:
+            self.stdout.write(f"Refreshed {stats} session stats rows.")
+
         summary = f"Finished. Total rows: {total_rows}"
         if dry_run:
             summary += " (dry run – no database changes)."
@@ -127,17 +205,19 @@ class Command(BaseCommand):
 
     def _session_keys_for_meeting(self, meeting_key: int) -> List[int]:
         """Fetch session keys for a meeting and ensure Session rows exist locally."""
-        url = f"{SESS_URL}?meeting_key={meeting_key}"
-        req = Request(url, headers={"User-Agent": "openf1-import/1.0"})
-        with urlopen(req, timeout=self._http_timeout) as r:
-            payload = r.read()
+        return self._apply_sessions(meeting_key, self._fetch_sessions(meeting_key))
+
+    def _fetch_sessions(self, meeting_key: int) -> List[dict]:
+        """Network half of ``_session_keys_for_meeting``; safe to run in a worker thread."""
         try:
-            data = json.loads(payload)
-        except JSONDecodeError as exc:
+            data = self._client.get_json("sessions", {"meeting_key": meeting_key})
+        except ValueError as exc:
             raise CommandError(f"Invalid JSON from sessions API for meeting {meeting_key}: {exc}") from exc
         if not isinstance(data, list):
             return []
+        return data
 
+    def _apply_sessions(self, meeting_key: int, data: List[dict]) -> List[int]:
         keys: List[int] = []
         for row in data:
             try:
@@ -196,51 +276,14 @@ class Command(BaseCommand):
 
         for session_key in session_list:
             for driver_number in dn_list:
-                params: Dict[str, Union[int, float, str]] = {
-                    "meeting_key": meeting_key,
-                }
-                if session_key is not None:
-                    params["session_key"] = session_key
-                if driver_number is not None:
-                    params["driver_number"] = driver_number
-                if min_speed is not None:
-                    params["speed>"] = min_speed  
-
-                if self._debug:
-                    self.stdout.write(f"[debug] GET {self._build_url(BASE_URL, params)}")
-
-                try:
-                    batch = self._fetch_batch(params)
-                except HTTPError as exc:
-                    body = ""
-                    try:
-                        body = exc.read().decode(errors="replace")
-                    except Exception:
-                        pass
-                    if exc.code == 422:
-                        snippet = (body or "").strip().replace("\n", " ")
-                        self.stdout.write(self.style.WARNING(
-                            f"[-] meeting {meeting_key} session {session_key}: 422 – {snippet[:240]}"
-                        ))
-                        continue
-                    raise CommandError(f"API request failed {exc.code}: {body}") from exc
-                except URLError as exc:
-                    raise CommandError(f"Network error: {exc}") from exc
-
+                params = self._build_params(meeting_key, session_key, driver_number, min_speed)
+                batch = self._fetch_or_skip(params, meeting_key, session_key)
                 if not batch:
                     continue
 
-                try:
-                    batch_created, batch_updated = self._store_batch(
-                        batch=batch,
-                        dry_run=dry_run,
-                        create_only=create_only,
-                    )
-                except Exception as exc:
-                    raise CommandError(
-                        f"DB error while storing batch for meeting {meeting_key}, session {session_key}: {exc}"
-                    ) from exc
-
+                batch_created, batch_updated = self._write_batch(
+                    batch, meeting_key, session_key, dry_run, create_only
+                )
                 rows += len(batch)
                 created += batch_created
                 updated += batch_updated
@@ -250,6 +293,155 @@ class Command(BaseCommand):
 
         return rows, created, updated
 
+    def _run_concurrent(
+        self,
+        meeting_keys: List[int],
+        session_keys: Iterable[int],
+        driver_numbers: Iterable[int],
+        dry_run: bool,
+        create_only: bool,
+        min_speed: Optional[float],
+        concurrency: int,
+    ) -> Iterable[Tuple[int, Tuple[int, int, int]]]:
+        """
+        Fan the session x driver fetches of every meeting out to a thread pool.
+
+        Workers only do HTTP + JSON decoding behind the shared rate limiter;
+        all ORM writes happen here on the calling thread, one batch at a time.
+        Yields ``(meeting_key, (rows, created, updated))`` as meetings finish.
+        """
+        pool = ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            session_plan: Dict[int, List[Optional[int]]] = {}
+            if session_keys:
+                session_plan = {mk: list(session_keys) for mk in meeting_keys}
+            else:
+                session_futures = {
+                    pool.submit(self._fetch_sessions, mk): mk for mk in meeting_keys
+                }
+                for future in as_completed(session_futures):
+                    mk = session_futures[future]
+                    try:
+                        session_list = self._apply_sessions(mk, future.result())
+                    except Exception as e:
+                        self.stdout.write(self.style.WARNING(
+                            f"[!] meeting {mk}: failed to fetch sessions ({e}); fallback to meeting-only queries."
+                        ))
+                        session_list = []
+                    else:
+                        if not session_list:
+                            self.stdout.write(self.style.WARNING(
+                                f"[-] meeting {mk}: no sessions found."
+                            ))
+                    session_plan[mk] = session_list or [None]
+
+            dn_list = list(driver_numbers) if driver_numbers else [None]
+            plan = []
+            for mk in meeting_keys:
+                self._ensure_related_records(mk, None)
+                for session_key in session_plan[mk]:
+                    for driver_number in dn_list:
+                        params = self._build_params(mk, session_key, driver_number, min_speed)
+                        plan.append((mk, session_key, params))
+
+            pending = Counter(mk for mk, _, _ in plan)
+            totals = {mk: [0, 0, 0] for mk in meeting_keys}
+            for mk in meeting_keys:
+                if not pending[mk]:
+                    yield mk, tuple(totals[mk])
+
+            # Only a bounded window of fetches is in flight, so at most that
+            # many downloaded batches wait in memory for the writer.
+            window = concurrency * FETCH_WINDOW_PER_WORKER
+            remaining = iter(plan)
+            in_flight = {}
+
+            def fill():
+                for mk, session_key, params in islice(remaining, window - len(in_flight)):
+                    future = pool.submit(self._fetch_or_skip, params, mk, session_key)
+                    in_flight[future] = (mk, session_key)
+
+            fill()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    mk, session_key = in_flight.pop(future)
+                    batch = future.result()
+                    if batch:
+                        batch_created, batch_updated = self._write_batch(
+                            batch, mk, session_key, dry_run, create_only
+                        )
+                        totals[mk][0] += len(batch)
+                        totals[mk][1] += batch_created
+                        totals[mk][2] += batch_updated
+                    pending[mk] -= 1
+                    if pending[mk] == 0:
+                        yield mk, tuple(totals[mk])
+                fill()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _build_params(
+        self,
+        meeting_key: int,
+        session_key: Optional[int],
+        driver_number: Optional[int],
+        min_speed: Optional[float],
+    ) -> Dict[str, Union[int, float, str]]:
+        params: Dict[str, Union[int, float, str]] = {
+            "meeting_key": meeting_key,
+        }
+        if session_key is not None:
+            params["session_key"] = session_key
+        if driver_number is not None:
+            params["driver_number"] = driver_number
+        if min_speed is not None:
+            params["speed>"] = min_speed
+        return params
+
+    def _fetch_or_skip(
+        self,
+        params: Dict[str, Union[int, float, str]],
+        meeting_key: int,
+        session_key: Optional[int],
+    ) -> List[dict]:
+        if self._debug:
+            self.stdout.write(f"[debug] GET {self._build_url(self._client.url('car_data'), params)}")
+
+        try:
+            return self._fetch_batch(params)
+        except requests.HTTPError as exc:
+            status = exc.response.status_code if exc.response is not None else None
+            body = exc.response.text if exc.response is not None else ""
+            if status == 422:
+                snippet = (body or "").strip().replace("\n", " ")
+                self.stdout.write(self.style.WARNING(
+                    f"[-] meeting {meeting_key} session {session_key}: 422 – {snippet[:240]}"
+                ))
+                return []
+            raise CommandError(f"API request failed {status}: {body}") from exc
+        except requests.RequestException as exc:
+            raise CommandError(f"Network error: {exc}") from exc
+
+    def _write_batch(
+        self,
+        batch: List[dict],
+        meeting_key: int,
+        session_key: Optional[int],
+        dry_run: bool,
+        create_only: bool,
+    ) -> Tuple[int, int]:
+        try:
+            return self._store_batch(
+                batch=batch,
+                dry_run=dry_run,
+                create_only=create_only,
+            )
+        except Exception as exc:
+            raise CommandError(
+                f"DB error while storing batch for meeting {meeting_key}, session {session_key}: {exc}"
+            ) from exc
+
     def _ensure_related_records(
         self, meeting_key: int, session_key: Optional[int]
     ) -> Optional[Session]:
@@ -276,16 +468,10 @@ class Command(BaseCommand):
         return f"{base}?{urlencode(params)}"
 
     def _fetch_batch(self, params: Dict[str, Union[int, float, str]]) -> List[dict]:
-        url = self._build_url(BASE_URL, params)
-        req = Request(
-            url,
-            headers={"User-Agent": "openf1-import/1.0 (+https://openf1.org/)"},
-        )
-        with urlopen(req, timeout=self._http_timeout) as response:
-            payload = response.read()  
         try:
-            data = json.loads(payload)
-        except JSONDecodeError as exc:
+            data = self._client.get_json("car_data", params)
+        except ValueError as exc:
+            url = self._build_url(self._client.url("car_data"), params)
             raise CommandError(f"Invalid JSON for URL {url}: {exc}") from exc
         if not isinstance(data, list):
             return []
@@ -299,72 +485,26 @@ class Command(BaseCommand):
         dry_run: bool,
         create_only: bool,
     ) -> Tuple[int, int]:
-        created = updated = 0
-
-        for entry in batch:
-            if dry_run:
-                continue
-
-            try:
-                meeting_key = int(entry["meeting_key"])
-            except (KeyError, TypeError, ValueError):
-                continue
-
-            raw_session_key = entry.get("session_key")
-            try:
-                session_key = int(raw_session_key) if raw_session_key is not None else None
-            except (TypeError, ValueError):
-                session_key = None
-
-            session_obj = self._ensure_related_records(meeting_key, session_key)
-            session_key_value = session_obj.session_key if session_obj else session_key
-
-            driver_number = entry.get("driver_number")
-            try:
-                driver_number = int(driver_number) if driver_number is not None else None
-            except (TypeError, ValueError):
-                driver_number = None
-
-            if driver_number is None:
-                continue
-
-            defaults = {
-                "meeting_key": meeting_key,
-                "session_key": session_key_value,
-                "brake": entry.get("brake", 0),
-                "drs": entry.get("drs", 0),
-                "n_gear": entry.get("n_gear", 0),
-                "rpm": entry.get("rpm", 0),
-                "speed": entry.get("speed", 0),
-                "throttle": entry.get("throttle", 0),
-            }
-
-            if create_only:
-                Car.objects.create(
-                    driver_number=driver_number,
-                    session_key=session_key_value,
-                    meeting_key=meeting_key,
-                    date=parse_datetime(entry["date"]),
-                    brake=defaults["brake"],
-                    drs=defaults["drs"],
-                    n_gear=defaults["n_gear"],
-                    rpm=defaults["rpm"],
-                    speed=defaults["speed"],
-                    throttle=defaults["throttle"],
-                    is_manual=False,
-                )
-                created += 1
-                continue
-
-            obj, was_created = Car.objects.update_or_create(
-                driver_number=driver_number,
-                session_key=session_key_value,
-                date=parse_datetime(entry["date"]),
-                defaults=defaults,
+        if dry_run:
+            return 0, 0
+
+        cars = [car for car in map(car_from_openf1_row, batch) if car is not None]
+        if not cars:
+            return 0, 0
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            self._resolver.resolve_cars(cars)
+            created, updated = upsert_cars(
+                cars,
+                batch_size=self._batch_size,
+                create_only=create_only,
             )
-            if was_created:
-                created += 1
-            else:
-                updated += 1
-
+        self._touched_pairs.update((car.session_key, car.driver_number) for car in cars)
+        elapsed = time.perf_counter() - started
+        rate = len(cars) / elapsed if elapsed > 0 else 0.0
+        self.stdout.write(
+            f"    batch: {len(cars)} rows in {elapsed:.2f}s ({rate:,.0f} rows/s, "
+            f"created={created}, updated={updated})"
+        )
         return created, updated
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from apps.car.models import Car, CarTrace
+from apps.car.stats import refresh_session_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute CarSessionStats from imported telemetry and compact traces."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--meeting-key",
+            type=int,
+            action="append",
+            dest="meeting_keys",
+        )
+        parser.add_argument(
+            "--session-key",
+            type=int,
+            action="append",
+            dest="session_keys",
+        )
+
+    def handle(self, *args, **options):
+        cars = Car.objects.filter(is_manual=False, session_key__isnull=False)
+        traces = CarTrace.objects.all()
+        if options.get("meeting_keys"):
+            cars = cars.filter(meeting_key__in=options["meeting_keys"])
+            traces = traces.filter(meeting_key__in=options["meeting_keys"])
+        if options.get("session_keys"):
+            cars = cars.filter(session_key__in=options["session_keys"])
+            traces = traces.filter(session_key__in=options["session_keys"])
+
+        pairs = set(
+            cars.order_by().values_list("session_key", "driver_number").distinct()
+        )
+        pairs.update(traces.values_list("session_key", "driver_number"))
+        if not pairs:
+            self.stdout.write(self.style.WARNING("No imported telemetry matched."))
+            return
+
+        refreshed = refresh_session_stats(pairs)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {refreshed} driver sessions."))
@@ -0,0 +1,60 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.car.jobs import requeue_stale_jobs, run_next_job
+from apps.car.models import RefreshJob
+
+
+class Command(BaseCommand):
+    help = "Run queued telemetry refresh jobs (see /car/api/refresh/)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue and exit instead of polling forever.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep when the queue is empty.",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=settings.REFRESH_STALE_AFTER_SECONDS,
+            help="Requeue running jobs whose heartbeat is older than this many seconds.",
+        )
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(seconds=max(1, options["stale_after"]))
+        poll_interval = max(0.1, options["poll_interval"])
+
+        while True:
+            requeued = requeue_stale_jobs(stale_after)
+            if requeued:
+                self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale jobs."))
+
+            job = run_next_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(poll_interval)
+                continue
+
+            if job.status == RefreshJob.Status.SUCCEEDED:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Job {job.id} meeting {job.meeting_key}: "
+                        f"created={job.created_rows}, updated={job.updated_rows}, "
+                        f"deleted={job.deleted_rows}"
+                    )
+                )
+            else:
+                self.stdout.write(
+                    self.style.ERROR(f"Job {job.id} meeting {job.meeting_key} failed: {job.error}")
+                )
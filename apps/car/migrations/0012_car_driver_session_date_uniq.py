@@ -0,0 +1,47 @@
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def drop_duplicate_samples(apps, schema_editor):
+    Car = apps.get_model("car", "Car")
+
+    duplicates = (
+        Car.objects.exclude(session_key__isnull=True)
+        .values("driver_number", "session_key", "date")
+        .annotate(
+            row_count=Count("id"),
+            manual_id=Max("id", filter=Q(is_manual=True)),
+            latest_id=Max("id"),
+        )
+        .filter(row_count__gt=1)
+    )
+    for group in duplicates.iterator():
+        # A manual entry wins over imported samples at the same key.
+        keep_id = group["manual_id"] or group["latest_id"]
+        Car.objects.filter(
+            driver_number=group["driver_number"],
+            session_key=group["session_key"],
+            date=group["date"],
+        ).exclude(id=keep_id).delete()
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("car", "0011_car_meeting_session_integer"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_samples, noop),
+        migrations.AddConstraint(
+            model_name="car",
+            constraint=models.UniqueConstraint(
+                fields=["driver_number", "session_key", "date"],
+                name="car_driver_session_date_uniq",
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 10:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('car', '0012_car_driver_session_date_uniq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CarTrace',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_key', models.PositiveIntegerField()),
+                ('driver_number', models.PositiveSmallIntegerField()),
+                ('meeting_key', models.PositiveIntegerField(blank=True, db_index=True, null=True)),
+                ('start_date', models.DateTimeField()),
+                ('end_date', models.DateTimeField()),
+                ('sample_count', models.PositiveIntegerField(default=0)),
+                ('payload', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['meeting_key', 'driver_number'], name='car_trace_meeting_driver_idx')],
+                'constraints': [models.UniqueConstraint(fields=('session_key', 'driver_number'), name='car_trace_session_driver_uniq')],
+            },
+        ),
+    ]
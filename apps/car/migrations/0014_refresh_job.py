@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('car', '0013_car_trace'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RefreshJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('meeting_key', models.PositiveIntegerField(db_index=True)),
+                ('min_speed', models.IntegerField()),
+                ('max_speed', models.IntegerField(blank=True, null=True)),
+                ('batch_size', models.PositiveIntegerField()),
+                ('full', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=16)),
+                ('rows_processed', models.PositiveIntegerField(default=0)),
+                ('created_rows', models.PositiveIntegerField(default=0)),
+                ('updated_rows', models.PositiveIntegerField(default=0)),
+                ('deleted_rows', models.PositiveIntegerField(default=0)),
+                ('skipped_rows', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='refresh_job_status_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['queued', 'running'])), fields=('meeting_key',), name='refresh_job_active_meeting_uniq')],
+            },
+        ),
+    ]
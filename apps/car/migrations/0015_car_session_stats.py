@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 10:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('car', '0014_refresh_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CarSessionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_key', models.PositiveIntegerField()),
+                ('driver_number', models.PositiveSmallIntegerField()),
+                ('meeting_key', models.PositiveIntegerField(blank=True, db_index=True, null=True)),
+                ('sample_count', models.PositiveIntegerField()),
+                ('first_date', models.DateTimeField()),
+                ('last_date', models.DateTimeField()),
+                ('max_speed', models.PositiveSmallIntegerField()),
+                ('mean_speed', models.FloatField()),
+                ('median_speed', models.FloatField()),
+                ('p95_speed', models.FloatField()),
+                ('max_rpm', models.PositiveIntegerField()),
+                ('full_throttle_fraction', models.FloatField()),
+                ('brake_fraction', models.FloatField()),
+                ('drs_open_seconds', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('session_key', 'driver_number'), name='car_stats_session_driver_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('car', '0015_car_session_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='refreshjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('car', '0016_refresh_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='refreshjob',
+            name='elapsed_seconds',
+            field=models.FloatField(default=0.0),
+        ),
+    ]
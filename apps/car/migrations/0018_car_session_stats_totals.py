@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('car', '0017_refresh_job_elapsed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carsessionstats',
+            name='brake_samples',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='carsessionstats',
+            name='full_throttle_samples',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='carsessionstats',
+            name='last_drs_open',
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='carsessionstats',
+            name='speed_histogram',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='carsessionstats',
+            name='speed_total',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -63,6 +63,12 @@ class Car(models.Model):
                 name="car_meeting_driver_idx",
             ),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["driver_number", "session_key", "date"],
+                name="car_driver_session_date_uniq",
+            ),
+        ]
 
     def __str__(self) -> str:
         session_label = self.session_key or "?"
@@ -79,3 +85,135 @@ class Car(models.Model):
     @property
     def session_key_value(self) -> int | None:
         return self.session_key
+
+
+class CarTrace(models.Model):
+    """
+    Compact copy of one driver's imported telemetry for one session.
+
+    ``payload`` holds packed little-endian arrays (see ``apps.car.traces``)
+    instead of one ``Car`` row per sample. Manual entries always stay in ``Car``.
+    """
+
+    session_key = models.PositiveIntegerField()
+    driver_number = models.PositiveSmallIntegerField()
+    meeting_key = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    start_date = models.DateTimeField()
+    end_date = models.DateTimeField()
+    sample_count = models.PositiveIntegerField(default=0)
+    payload = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["session_key", "driver_number"],
+                name="car_trace_session_driver_uniq",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["meeting_key", "driver_number"],
+                name="car_trace_meeting_driver_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.driver_number} | {self.session_key} | {self.sample_count} samples"
+
+
+class CarSessionStats(models.Model):
+    """Per (session_key, driver_number) aggregates of imported telemetry."""
+
+    session_key = models.PositiveIntegerField()
+    driver_number = models.PositiveSmallIntegerField()
+    meeting_key = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    sample_count = models.PositiveIntegerField()
+    first_date = models.DateTimeField()
+    last_date = models.DateTimeField()
+    max_speed = models.PositiveSmallIntegerField()
+    mean_speed = models.FloatField()
+    median_speed = models.FloatField()
+    p95_speed = models.FloatField()
+    max_rpm = models.PositiveIntegerField()
+    full_throttle_fraction = models.FloatField()
+    brake_fraction = models.FloatField()
+    drs_open_seconds = models.FloatField()
+    # Running totals that let appended samples be merged in without
+    # re-reading the pair; ``speed_histogram[v]`` counts samples at v km/h.
+    speed_total = models.BigIntegerField(null=True, blank=True)
+    speed_histogram = models.JSONField(null=True, blank=True)
+    full_throttle_samples = models.PositiveIntegerField(null=True, blank=True)
+    brake_samples = models.PositiveIntegerField(null=True, blank=True)
+    last_drs_open = models.BooleanField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["session_key", "driver_number"],
+                name="car_stats_session_driver_uniq",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Stats {self.driver_number} | {self.session_key}"
+
+
+class RefreshJob(models.Model):
+    """
+    A queued OpenF1 telemetry refresh for one meeting, run by
+    ``run_refresh_worker`` or, when no worker claims it in time, inline by
+    the web process (see ``REFRESH_INLINE_FALLBACK_SECONDS``).
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        SUCCEEDED = "succeeded", "Succeeded"
+        FAILED = "failed", "Failed"
+
+    ACTIVE_STATUSES = (Status.QUEUED, Status.RUNNING)
+
+    meeting_key = models.PositiveIntegerField(db_index=True)
+    min_speed = models.IntegerField()
+    max_speed = models.IntegerField(null=True, blank=True)
+    batch_size = models.PositiveIntegerField()
+    full = models.BooleanField(default=False)
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.QUEUED
+    )
+    rows_processed = models.PositiveIntegerField(default=0)
+    created_rows = models.PositiveIntegerField(default=0)
+    updated_rows = models.PositiveIntegerField(default=0)
+    deleted_rows = models.PositiveIntegerField(default=0)
+    skipped_rows = models.PositiveIntegerField(default=0)
+    # Ingest time so far, for the throughput reported with the job.
+    elapsed_seconds = models.FloatField(default=0.0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Written by the running worker on a timer, independent of chunk progress.
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="refresh_job_status_idx"),
+        ]
+        constraints = [
+            # At most one queued/running job per meeting; repeat requests reuse it.
+            models.UniqueConstraint(
+                fields=["meeting_key"],
+                condition=models.Q(status__in=["queued", "running"]),
+                name="refresh_job_active_meeting_uniq",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Refresh {self.meeting_key} ({self.status})"
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in self.ACTIVE_STATUSES
@@ -0,0 +1,52 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Tuple
+
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(date: datetime, pk: int) -> str:
+    raw = json.dumps([date.isoformat(), pk], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[datetime, int]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw_date, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        date = parse_datetime(raw_date)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor.") from None
+    if date is None:
+        raise InvalidCursor("Invalid cursor.")
+    return date, pk
+
+
+def keyset_page(
+    queryset: QuerySet,
+    limit: int,
+    cursor: str | None = None,
+) -> Tuple[List, str | None]:
+    """
+    Return ``(items, next_cursor)`` for rows ordered newest first by
+    ``(date, id)``. Each page seeks past the previous page's last row
+    instead of using OFFSET, so deep pages cost the same as the first.
+    """
+    queryset = queryset.order_by("-date", "-id")
+    if cursor:
+        date, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(date__lt=date) | Q(date=date, id__lt=pk))
+
+    items = list(queryset[: limit + 1])
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    last = items[-1]
+    return items, encode_cursor(last.date, last.id)
@@ -0,0 +1,170 @@
+from datetime import datetime
+from itertools import chain
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import requests
+from django.db import transaction
+
+from apps.car.models import Car, CarSessionStats, CarTrace, RefreshJob
+from apps.car.services import (
+    IngestResult,
+    ingest_openf1_rows,
+    pair_watermarks,
+    rows_after_watermarks,
+    session_watermarks,
+)
+from apps.driver.models import DriverEntry
+from apps.openf1.client import comparison_query, get_client
+from apps.openf1.ingest import DEFAULT_INGEST_BATCH_SIZE
+from apps.session.models import Session
+
+
+OPENF1_MIN_SPEED_FLOOR = 310
+
+FetchPlan = List[Tuple[int | None, datetime | None]]
+
+
+def fetch_openf1_telemetry(
+    meeting_key: int,
+    min_speed: int,
+    *,
+    session_key: int | None = None,
+    after: datetime | None = None,
+) -> Iterator[Dict]:
+    """
+    Open the car_data stream for a meeting (or one of its sessions, optionally
+    only samples newer than ``after``) and return an iterator over its rows.
+
+    Connection errors are raised here; rows are decoded lazily as bytes
+    arrive, so callers must be ready for network errors while iterating.
+    """
+    params = {"session_key": session_key} if session_key is not None else {"meeting_key": meeting_key}
+    comparisons = [("speed", ">=", min_speed)]
+    if after is not None:
+        comparisons.append(("date", ">", after.isoformat()))
+    try:
+        rows = get_client(blocking=True).iter_rows("car_data", comparison_query(params, *comparisons))
+    except requests.HTTPError as exc:
+        if exc.response is not None and exc.response.status_code == 422:
+            return iter(())
+        raise
+    return (row for row in rows if isinstance(row, dict))
+
+
+def speed_range_widens(meeting_key: int, min_speed: int, max_speed: int | None) -> bool:
+    """
+    Whether ``min_speed``/``max_speed`` admit samples that the meeting's last
+    successful refresh filtered out, so stored watermarks say nothing about
+    them. Without such a refresh the endpoint defaults are assumed.
+    """
+    previous = (
+        RefreshJob.objects.filter(meeting_key=meeting_key, status=RefreshJob.Status.SUCCEEDED)
+        .order_by("-finished_at", "-id")
+        .values("min_speed", "max_speed")
+        .first()
+    ) or {"min_speed": OPENF1_MIN_SPEED_FLOOR, "max_speed": None}
+    if min_speed < previous["min_speed"]:
+        return True
+    return previous["max_speed"] is not None and (max_speed is None or max_speed > previous["max_speed"])
+
+
+def _expected_drivers(session_keys) -> Dict[int, set]:
+    """Driver numbers registered per session in ``DriverEntry``."""
+    expected: Dict[int, set] = {}
+    entries = DriverEntry.objects.filter(session_key__in=session_keys).values_list(
+        "session_key", "driver_id"
+    )
+    for session_key, driver_number in entries:
+        expected.setdefault(session_key, set()).add(driver_number)
+    return expected
+
+
+def incremental_fetch_plan(meeting_key: int) -> Tuple[dict, FetchPlan]:
+    """
+    Return ``(pair_watermarks, [(session_key, after), ...])``. Sessions with
+    stored samples are fetched from their oldest pair watermark onwards;
+    known sessions without samples, and sessions where a registered driver
+    has none, in full; an unknown meeting in one request.
+    """
+    pair_marks = pair_watermarks(meeting_key)
+    known_sessions = set(
+        Session.objects.filter(meeting_key=meeting_key).values_list(
+            "session_key", flat=True
+        )
+    )
+    stored_sessions = {session_key for session_key, _ in pair_marks}
+    session_keys = sorted(known_sessions | stored_sessions)
+    if not session_keys:
+        return pair_marks, [(None, None)]
+    session_marks = session_watermarks(pair_marks, _expected_drivers(session_keys))
+    return pair_marks, [(key, session_marks.get(key)) for key in session_keys]
+
+
+def _iter_plan_rows(meeting_key: int, min_speed: int, plan: FetchPlan) -> Iterator[Dict]:
+    for session_key, after in plan:
+        yield from fetch_openf1_telemetry(
+            meeting_key, min_speed, session_key=session_key, after=after
+        )
+
+
+def refresh_meeting(
+    meeting_key: int,
+    *,
+    min_speed: int = OPENF1_MIN_SPEED_FLOOR,
+    max_speed: int | None = None,
+    batch_size: int = DEFAULT_INGEST_BATCH_SIZE,
+    full: bool = False,
+    on_progress: Callable[[IngestResult], None] | None = None,
+) -> Tuple[IngestResult, int, int]:
+    """
+    Pull a meeting's telemetry from OpenF1. Returns
+    ``(ingest_result, deleted_rows, upstream_requests)``.
+
+    Incremental refreshes only append samples newer than each pair's
+    watermark and commit chunk by chunk, so readers are never blocked and an
+    interrupted run resumes from what was stored. When the speed range is
+    wider than the last refresh's, every session is re-read from the start
+    (existing rows are upserted, not duplicated). ``full`` deletes the
+    meeting's imported rows, traces and stats and reloads them in one
+    transaction.
+    """
+    if full:
+        pair_marks: dict = {}
+        plan: FetchPlan = [(None, None)]
+    else:
+        pair_marks, plan = incremental_fetch_plan(meeting_key)
+        if speed_range_widens(meeting_key, min_speed, max_speed):
+            pair_marks = {}
+            plan = [(session_key, None) for session_key, _ in plan]
+
+    # Open the first stream eagerly so connection errors surface before any write.
+    first_session, first_after = plan[0]
+    stream = chain(
+        fetch_openf1_telemetry(
+            meeting_key, min_speed, session_key=first_session, after=first_after
+        ),
+        _iter_plan_rows(meeting_key, min_speed, plan[1:]),
+    )
+    dataset = (
+        entry
+        for entry in rows_after_watermarks(stream, pair_marks)
+        if entry.get("speed") is not None
+        and (max_speed is None or entry["speed"] <= max_speed)
+    )
+
+    if not full:
+        result = ingest_openf1_rows(
+            dataset,
+            batch_size=batch_size,
+            on_progress=on_progress,
+            appended_after=pair_marks,
+        )
+        return result, 0, len(plan)
+
+    with transaction.atomic():
+        deleted, _ = Car.objects.filter(is_manual=False, meeting_key=meeting_key).delete()
+        # Traces and stats would otherwise keep serving the deleted samples.
+        CarTrace.objects.filter(meeting_key=meeting_key).delete()
+        CarSessionStats.objects.filter(meeting_key=meeting_key).delete()
+        result = ingest_openf1_rows(dataset, batch_size=batch_size)
+    return result, deleted, len(plan)
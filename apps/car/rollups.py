@@ -0,0 +1,98 @@
+from typing import Dict, List
+
+import numpy as np
+from django.db.models import Q
+
+from apps.car.models import Car, CarTrace
+from apps.car.traces import epoch_ms, pair_filter, unpack_trace
+
+
+BUCKETS = {
+    "1s": 1000,
+    "5s": 5000,
+    "1m": 60000,
+}
+DEFAULT_BUCKET = "5s"
+METRICS = ("speed", "rpm", "throttle")
+
+
+def rollup(timestamps: np.ndarray, columns: Dict[str, np.ndarray], bucket_ms: int) -> dict:
+    """
+    Collapse time-sorted samples into fixed ``bucket_ms`` buckets aligned to
+    the epoch, returning min/max/avg per metric in columnar form.
+    """
+    starts = timestamps // bucket_ms * bucket_ms
+    # Index of the first sample in each bucket; reduceat folds each run.
+    firsts = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    counts = np.diff(np.r_[firsts, len(starts)])
+    payload = {
+        "bucket_start_ms": starts[firsts].tolist(),
+        "count": counts.tolist(),
+    }
+    for name, values in columns.items():
+        payload[name] = {
+            "min": np.minimum.reduceat(values, firsts).tolist(),
+            "max": np.maximum.reduceat(values, firsts).tolist(),
+            "avg": np.round(np.add.reduceat(values, firsts) / counts, 2).tolist(),
+        }
+    return payload
+
+
+def _driver_arrays(session_key: int, driver_number: int | None) -> Dict[int, tuple]:
+    """``driver_number -> (timestamps, columns)`` from traces and raw rows."""
+    parts: Dict[int, List[tuple]] = {}
+
+    traces = CarTrace.objects.filter(session_key=session_key)
+    if driver_number is not None:
+        traces = traces.filter(driver_number=driver_number)
+    compacted = []
+    for trace in traces:
+        data = unpack_trace(trace)
+        offsets = np.frombuffer(data.offset_ms, dtype=data.offset_ms.typecode)
+        columns = {}
+        for name in METRICS:
+            column = getattr(data, name)
+            columns[name] = np.frombuffer(column, dtype=column.typecode).astype(np.int64)
+        parts.setdefault(trace.driver_number, []).append(
+            (offsets.astype(np.int64) + data.start_ms, columns)
+        )
+        compacted.append((trace.session_key, trace.driver_number))
+
+    cars = Car.objects.filter(session_key=session_key)
+    if driver_number is not None:
+        cars = cars.filter(driver_number=driver_number)
+    if compacted:
+        # Imported rows already folded into a trace would be counted twice.
+        cars = cars.exclude(pair_filter(compacted) & Q(is_manual=False))
+    rows = cars.order_by("driver_number", "date").values_list(
+        "driver_number", "date", *METRICS
+    )
+
+    by_driver: Dict[int, List[tuple]] = {}
+    for row in rows.iterator(chunk_size=5000):
+        by_driver.setdefault(row[0], []).append(row[1:])
+    for number, samples in by_driver.items():
+        dates, *values = zip(*samples)
+        timestamps = np.fromiter((epoch_ms(d) for d in dates), dtype=np.int64, count=len(dates))
+        columns = {name: np.asarray(column, dtype=np.int64) for name, column in zip(METRICS, values)}
+        parts.setdefault(number, []).append((timestamps, columns))
+
+    merged = {}
+    for number, chunks in parts.items():
+        timestamps = np.concatenate([chunk[0] for chunk in chunks])
+        order = np.argsort(timestamps, kind="stable")
+        columns = {
+            name: np.concatenate([chunk[1][name] for chunk in chunks])[order]
+            for name in METRICS
+        }
+        merged[number] = (timestamps[order], columns)
+    return merged
+
+
+def session_rollups(session_key: int, bucket_ms: int, driver_number: int | None = None) -> List[dict]:
+    drivers = []
+    for number, (timestamps, columns) in sorted(_driver_arrays(session_key, driver_number).items()):
+        if not len(timestamps):
+            continue
+        drivers.append({"driver_number": number, **rollup(timestamps, columns, bucket_ms)})
+    return drivers
@@ -0,0 +1,369 @@
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Set, Tuple
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, ExpressionWrapper, Max, Q, Value
+from django.utils.dateparse import parse_datetime
+
+from apps.car.models import Car, CarTrace
+from apps.car.stats import refresh_session_stats
+from apps.car.traces import refresh_existing_traces
+from apps.meeting.models import Meeting
+from apps.openf1.ingest import DEFAULT_INGEST_BATCH_SIZE, chunked, coerce_int
+from apps.session.models import Session
+
+
+# Natural key of an imported telemetry sample, backed by
+# the ``car_driver_session_date_uniq`` constraint.
+UPSERT_UNIQUE_FIELDS = ["driver_number", "session_key", "date"]
+UPSERT_UPDATE_FIELDS = [
+    "meeting_key",
+    "brake",
+    "drs",
+    "n_gear",
+    "rpm",
+    "speed",
+    "throttle",
+    "updated_at",
+]
+# ``upsert_rows`` matches a key field with IN up to this many distinct
+# values and with a range beyond that.
+EXISTING_KEYS_IN_LIMIT = 100
+
+
+def car_from_openf1_row(entry: dict) -> Car | None:
+    """Build an unsaved ``Car`` from one OpenF1 ``car_data`` row, or ``None`` if unusable."""
+    meeting_key = coerce_int(entry.get("meeting_key"))
+    session_key = coerce_int(entry.get("session_key"))
+    driver_number = coerce_int(entry.get("driver_number"))
+    if meeting_key is None or session_key is None or driver_number is None:
+        return None
+
+    raw_date = entry.get("date")
+    date = parse_datetime(raw_date) if isinstance(raw_date, str) else None
+    if date is None:
+        return None
+
+    return Car(
+        driver_number=driver_number,
+        session_key=session_key,
+        meeting_key=meeting_key,
+        date=date,
+        brake=entry.get("brake") or 0,
+        drs=entry.get("drs") or 0,
+        n_gear=entry.get("n_gear") or 0,
+        rpm=entry.get("rpm") or 0,
+        speed=entry.get("speed") or 0,
+        throttle=entry.get("throttle") or 0,
+        is_manual=False,
+    )
+
+
+class RelatedRecordResolver:
+    """
+    Make sure Meeting/Session rows exist for ingested telemetry using a
+    fixed number of queries per call instead of one ``get_or_create`` per key.
+    Keys already resolved by this instance are skipped on later calls.
+    """
+
+    def __init__(self):
+        self._meetings: set[int] = set()
+        self._sessions: dict[int, int] = {}
+
+    def resolve_rows(self, rows: Iterable[dict]) -> None:
+        pairs: dict[int, int] = {}
+        for entry in rows:
+            meeting_key = coerce_int(entry.get("meeting_key"))
+            session_key = coerce_int(entry.get("session_key"))
+            if meeting_key is None or session_key is None:
+                continue
+            pairs[session_key] = meeting_key
+        self.resolve(pairs)
+
+    def resolve_cars(self, cars: Iterable[Car]) -> None:
+        self.resolve(
+            {
+                car.session_key: car.meeting_key
+                for car in cars
+                if car.session_key is not None and car.meeting_key is not None
+            }
+        )
+
+    def resolve(self, session_meetings: dict[int, int]) -> None:
+        """``session_meetings`` maps session_key -> meeting_key."""
+        pending_sessions = {
+            session_key: meeting_key
+            for session_key, meeting_key in session_meetings.items()
+            if self._sessions.get(session_key) != meeting_key
+        }
+        pending_meetings = set(pending_sessions.values()) - self._meetings
+        if not pending_sessions and not pending_meetings:
+            return
+
+        if pending_meetings:
+            existing = set(
+                Meeting.objects.filter(meeting_key__in=pending_meetings).values_list(
+                    "meeting_key", flat=True
+                )
+            )
+            missing = pending_meetings - existing
+            if missing:
+                Meeting.objects.bulk_create(
+                    [Meeting(meeting_key=key) for key in sorted(missing)],
+                    ignore_conflicts=True,
+                )
+            self._meetings.update(pending_meetings)
+
+        if pending_sessions:
+            existing_sessions = {
+                session.session_key: session
+                for session in Session.objects.filter(
+                    session_key__in=pending_sessions.keys()
+                )
+            }
+            to_create: list[Session] = []
+            to_update: list[Session] = []
+            for session_key, meeting_key in pending_sessions.items():
+                session = existing_sessions.get(session_key)
+                if session is None:
+                    to_create.append(
+                        Session(session_key=session_key, meeting_key=meeting_key)
+                    )
+                elif session.meeting_key != meeting_key:
+                    session.meeting_key = meeting_key
+                    to_update.append(session)
+            if to_create:
+                Session.objects.bulk_create(to_create, ignore_conflicts=True)
+            if to_update:
+                Session.objects.bulk_update(to_update, ["meeting_key"])
+            self._sessions.update(pending_sessions)
+
+
+def _existing_keys(
+    model, keys: List[tuple], unique_fields: List[str], protected: Q | None = None
+) -> dict[tuple, bool]:
+    """
+    Which of ``keys`` are already stored, mapped to whether the stored row
+    matches ``protected``. One query, matching each key field with ``IN``
+    or, when it has many distinct values (sample dates), with a range.
+    """
+    keys = [key for key in keys if None not in key]
+    if not keys:
+        return {}
+    lookups = {}
+    for index, name in enumerate(unique_fields):
+        values = {key[index] for key in keys}
+        if len(values) <= EXISTING_KEYS_IN_LIMIT:
+            lookups[f"{name}__in"] = values
+        else:
+            lookups[f"{name}__range"] = (min(values), max(values))
+    flag = ExpressionWrapper(protected if protected is not None else Value(False), output_field=BooleanField())
+    rows = model.objects.filter(**lookups).annotate(is_protected=flag).values_list(*unique_fields, "is_protected")
+    wanted = set(keys)
+    return {tuple(row[:-1]): bool(row[-1]) for row in rows if tuple(row[:-1]) in wanted}
+
+
+def upsert_rows(
+    model,
+    objs: Iterable,
+    unique_fields: List[str],
+    update_fields: List[str],
+    *,
+    batch_size: int = DEFAULT_INGEST_BATCH_SIZE,
+    create_only: bool = False,
+    protected: Q | None = None,
+) -> tuple[int, int]:
+    """
+    Insert or update unsaved ``model`` instances on ``unique_fields``.
+
+    Uses a single ``INSERT ... ON CONFLICT`` per batch when the backend
+    supports it (PostgreSQL, SQLite >= 3.24) and falls back to
+    ``update_or_create`` otherwise. With ``create_only`` existing rows are
+    left untouched. Objects whose key belongs to a stored row matching
+    ``protected`` are dropped instead of overwriting it.
+    Returns ``(created, updated)``.
+    """
+    # ON CONFLICT cannot touch the same row twice in one statement, so the
+    # last object wins when the upstream payload repeats a key.
+    keyed = {tuple(getattr(obj, name) for name in unique_fields): obj for obj in objs}
+    existing = _existing_keys(model, list(keyed), unique_fields, protected)
+    for key, is_protected in existing.items():
+        if is_protected:
+            del keyed[key]
+    if not keyed:
+        return 0, 0
+    deduped = list(keyed.values())
+
+    stored = sum(1 for is_protected in existing.values() if not is_protected)
+    created = len(deduped) - stored
+    updated = 0 if create_only else stored
+
+    if create_only:
+        model.objects.bulk_create(deduped, batch_size=batch_size, ignore_conflicts=True)
+    elif connection.features.supports_update_conflicts_with_target:
+        model.objects.bulk_create(
+            deduped,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields,
+        )
+    else:
+        # update_or_create sets auto_now fields itself.
+        defaults = [
+            name for name in update_fields if not getattr(model._meta.get_field(name), "auto_now", False)
+        ]
+        with transaction.atomic():
+            for key, obj in keyed.items():
+                model.objects.update_or_create(
+                    **dict(zip(unique_fields, key)),
+                    defaults={name: getattr(obj, name) for name in defaults},
+                )
+    return created, updated
+
+
+def upsert_cars(
+    cars: Iterable[Car],
+    *,
+    batch_size: int = DEFAULT_INGEST_BATCH_SIZE,
+    create_only: bool = False,
+) -> tuple[int, int]:
+    """
+    Insert or update imported telemetry samples on (driver_number,
+    session_key, date); see ``upsert_rows``. A sample at the key of a
+    manual entry is skipped so imports never overwrite hand-entered data.
+    """
+    return upsert_rows(
+        Car,
+        cars,
+        UPSERT_UNIQUE_FIELDS,
+        UPSERT_UPDATE_FIELDS,
+        batch_size=batch_size,
+        create_only=create_only,
+        protected=Q(is_manual=True),
+    )
+
+
+@dataclass
+class IngestResult:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+    pairs: set = field(default_factory=set)
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.elapsed <= 0:
+            return 0.0
+        return round((self.created + self.updated) / self.elapsed, 1)
+
+
+def ingest_openf1_rows(
+    rows: Iterable[dict],
+    *,
+    batch_size: int = DEFAULT_INGEST_BATCH_SIZE,
+    resolver: RelatedRecordResolver | None = None,
+    on_progress: Callable[[IngestResult], None] | None = None,
+    appended_after: Mapping[Tuple[int, int], datetime] | None = None,
+) -> IngestResult:
+    """
+    Parse OpenF1 ``car_data`` rows into unsaved ``Car`` instances ``batch_size``
+    at a time and write each chunk with a single bulk upsert.
+    ``on_progress`` is called with the running totals after every chunk.
+    ``appended_after`` holds the per-pair watermarks ``rows`` were filtered
+    against, letting session stats merge the new rows instead of re-reading.
+    """
+    resolver = resolver or RelatedRecordResolver()
+    result = IngestResult()
+    started = time.perf_counter()
+
+    for chunk in chunked(rows, batch_size):
+        cars: List[Car] = []
+        for entry in chunk:
+            car = car_from_openf1_row(entry)
+            if car is None:
+                result.skipped += 1
+                continue
+            cars.append(car)
+        result.rows += len(chunk)
+        if cars:
+            with transaction.atomic():
+                resolver.resolve_cars(cars)
+                created, updated = upsert_cars(cars, batch_size=batch_size)
+            result.created += created
+            result.updated += updated
+            result.pairs.update((car.session_key, car.driver_number) for car in cars)
+        if on_progress is not None:
+            result.elapsed = time.perf_counter() - started
+            on_progress(result)
+
+    refresh_existing_traces(result.pairs)
+    refresh_session_stats(result.pairs, appended_after=appended_after)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def pair_watermarks(meeting_key: int) -> Dict[Tuple[int, int], datetime]:
+    """
+    Newest stored imported sample per ``(session_key, driver_number)`` of a
+    meeting, including samples that only live in a compacted trace.
+    """
+    marks: Dict[Tuple[int, int], datetime] = {}
+    latest = (
+        Car.objects.filter(meeting_key=meeting_key, is_manual=False)
+        .values("session_key", "driver_number")
+        .annotate(latest=Max("date"))
+        .order_by()
+    )
+    for row in latest:
+        marks[(row["session_key"], row["driver_number"])] = row["latest"]
+
+    traces = CarTrace.objects.filter(meeting_key=meeting_key).values_list(
+        "session_key", "driver_number", "end_date"
+    )
+    for session_key, driver_number, end_date in traces:
+        key = (session_key, driver_number)
+        if key not in marks or end_date > marks[key]:
+            marks[key] = end_date
+    return marks
+
+
+def session_watermarks(
+    pair_marks: Dict[Tuple[int, int], datetime],
+    expected_drivers: Dict[int, Set[int]] | None = None,
+) -> Dict[int, datetime | None]:
+    """
+    Oldest pair watermark per session: everything after it may be new.
+    A session in which one of its ``expected_drivers`` has no watermark maps
+    to ``None``, since all of that driver's samples are missing.
+    """
+    marks: Dict[int, datetime | None] = {}
+    for (session_key, _), mark in pair_marks.items():
+        current = marks.get(session_key)
+        if current is None or mark < current:
+            marks[session_key] = mark
+    for session_key, drivers in (expected_drivers or {}).items():
+        if any((session_key, driver) not in pair_marks for driver in drivers):
+            marks[session_key] = None
+    return marks
+
+
+def rows_after_watermarks(
+    rows: Iterable[dict],
+    pair_marks: Dict[Tuple[int, int], datetime],
+) -> Iterator[dict]:
+    """Drop rows that are not newer than their pair's stored watermark."""
+    for entry in rows:
+        mark = pair_marks.get(
+            (coerce_int(entry.get("session_key")), coerce_int(entry.get("driver_number")))
+        )
+        if mark is not None:
+            raw_date = entry.get("date")
+            date = parse_datetime(raw_date) if isinstance(raw_date, str) else None
+            if date is not None and date <= mark:
+                continue
+        yield entry
@@ -0,0 +1,199 @@
+from datetime import datetime
+from typing import Iterable, List, Mapping, Tuple
+
+import numpy as np
+from django.utils import timezone
+
+from apps.car.models import Car, CarSessionStats
+from apps.car.traces import SAMPLE_FIELDS, epoch_ms, pair_samples
+
+
+FULL_THROTTLE = 99
+DRS_OPEN_VALUES = (10, 12, 14)
+# Gaps longer than this are missing data, not time spent with DRS open.
+MAX_SAMPLE_GAP_SECONDS = 1.0
+
+
+def _totals(samples: List[tuple]) -> dict:
+    """
+    Mergeable totals of date-ordered ``SAMPLE_FIELDS`` tuples
+    (date, speed, rpm, throttle, brake, n_gear, drs).
+    """
+    dates, speed, rpm, throttle, brake, _, drs = zip(*samples)
+    speed = np.asarray(speed, dtype=np.int64)
+    throttle = np.asarray(throttle, dtype=np.int64)
+    brake = np.asarray(brake, dtype=np.int64)
+    drs_open = np.isin(np.asarray(drs, dtype=np.int64), DRS_OPEN_VALUES)
+
+    seconds = np.fromiter((epoch_ms(d) for d in dates), dtype=np.int64, count=len(dates)) / 1000.0
+    gaps = np.minimum(np.diff(seconds), MAX_SAMPLE_GAP_SECONDS)
+
+    return {
+        "sample_count": len(samples),
+        "first_date": dates[0],
+        "last_date": dates[-1],
+        "speed_histogram": np.bincount(speed),
+        "speed_total": int(speed.sum()),
+        "max_rpm": int(np.max(rpm)),
+        "full_throttle_samples": int((throttle >= FULL_THROTTLE).sum()),
+        "brake_samples": int((brake > 0).sum()),
+        "drs_open_seconds": float(gaps[drs_open[:-1]].sum()),
+        "last_drs_open": bool(drs_open[-1]),
+    }
+
+
+def _merge(stored: CarSessionStats, appended: dict) -> dict:
+    """Fold the totals of samples newer than ``stored.last_date`` into ``stored``."""
+    histogram = np.asarray(stored.speed_histogram, dtype=np.int64)
+    added = appended["speed_histogram"]
+    size = max(len(histogram), len(added))
+    histogram = np.pad(histogram, (0, size - len(histogram))) + np.pad(added, (0, size - len(added)))
+
+    drs_open_seconds = stored.drs_open_seconds + appended["drs_open_seconds"]
+    if stored.last_drs_open:
+        gap = (appended["first_date"] - stored.last_date).total_seconds()
+        drs_open_seconds += min(gap, MAX_SAMPLE_GAP_SECONDS)
+
+    return {
+        "sample_count": stored.sample_count + appended["sample_count"],
+        "first_date": stored.first_date,
+        "last_date": appended["last_date"],
+        "speed_histogram": histogram,
+        "speed_total": stored.speed_total + appended["speed_total"],
+        "max_rpm": max(stored.max_rpm, appended["max_rpm"]),
+        "full_throttle_samples": stored.full_throttle_samples + appended["full_throttle_samples"],
+        "brake_samples": stored.brake_samples + appended["brake_samples"],
+        "drs_open_seconds": drs_open_seconds,
+        "last_drs_open": appended["last_drs_open"],
+    }
+
+
+def _histogram_percentiles(histogram: np.ndarray, count: int, q: List[float]) -> np.ndarray:
+    """``np.percentile`` (linear interpolation) of the samples counted in ``histogram``."""
+    cumulative = np.cumsum(histogram)
+    positions = (count - 1) * np.asarray(q, dtype=np.float64) / 100
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, count - 1)
+    # The k-th smallest sample is the first speed whose running count exceeds k.
+    low = np.searchsorted(cumulative, lower, side="right")
+    high = np.searchsorted(cumulative, upper, side="right")
+    return low + (positions - lower) * (high - low)
+
+
+def _finalise(totals: dict) -> dict:
+    count = totals["sample_count"]
+    histogram = np.asarray(totals["speed_histogram"], dtype=np.int64)
+    median, p95 = _histogram_percentiles(histogram, count, [50, 95])
+
+    return {
+        "sample_count": count,
+        "first_date": totals["first_date"],
+        "last_date": totals["last_date"],
+        "max_speed": int(np.flatnonzero(histogram)[-1]),
+        "mean_speed": round(totals["speed_total"] / count, 2),
+        "median_speed": round(float(median), 2),
+        "p95_speed": round(float(p95), 2),
+        "max_rpm": totals["max_rpm"],
+        "full_throttle_fraction": round(totals["full_throttle_samples"] / count, 4),
+        "brake_fraction": round(totals["brake_samples"] / count, 4),
+        "drs_open_seconds": round(totals["drs_open_seconds"], 3),
+        "speed_total": totals["speed_total"],
+        "speed_histogram": histogram.tolist(),
+        "full_throttle_samples": totals["full_throttle_samples"],
+        "brake_samples": totals["brake_samples"],
+        "last_drs_open": totals["last_drs_open"],
+    }
+
+
+def compute_stats(samples: List[tuple]) -> dict:
+    """
+    Aggregate date-ordered ``SAMPLE_FIELDS`` tuples
+    (date, speed, rpm, throttle, brake, n_gear, drs) into stats fields.
+    """
+    return _finalise(_totals(samples))
+
+
+def _appended_samples(stats: CarSessionStats) -> List[tuple]:
+    return list(
+        Car.objects.filter(
+            session_key=stats.session_key,
+            driver_number=stats.driver_number,
+            is_manual=False,
+            date__gt=stats.last_date,
+        )
+        .order_by("date")
+        .values_list(*SAMPLE_FIELDS)
+    )
+
+
+def refresh_session_stats(
+    pairs: Iterable[Tuple[int, int]],
+    *,
+    appended_after: Mapping[Tuple[int, int], datetime] | None = None,
+) -> int:
+    """
+    Recompute stats rows for the given ``(session_key, driver_number)`` pairs,
+    e.g. the pairs touched by an ingest. Untouched pairs are left alone.
+
+    ``appended_after`` maps pairs to the watermark an incremental ingest
+    appended after. When a pair's stats were computed up to exactly that
+    watermark only the newer rows are read and merged into the stored totals.
+    """
+    appended_after = appended_after or {}
+    refreshed = 0
+    for session_key, driver_number in sorted(set(pairs)):
+        if session_key is None:
+            continue
+        stats = None
+        watermark = appended_after.get((session_key, driver_number))
+        if watermark is not None:
+            stats = CarSessionStats.objects.filter(
+                session_key=session_key, driver_number=driver_number
+            ).first()
+        if (
+            stats is not None
+            and stats.speed_histogram is not None
+            and stats.last_date == watermark
+        ):
+            samples = _appended_samples(stats)
+            if samples:
+                fields = _finalise(_merge(stats, _totals(samples)))
+                CarSessionStats.objects.filter(pk=stats.pk).update(
+                    updated_at=timezone.now(), **fields
+                )
+                refreshed += 1
+            continue
+
+        samples, meeting_key = pair_samples(session_key, driver_number)
+        if not samples:
+            CarSessionStats.objects.filter(
+                session_key=session_key, driver_number=driver_number
+            ).delete()
+            continue
+        CarSessionStats.objects.update_or_create(
+            session_key=session_key,
+            driver_number=driver_number,
+            defaults={"meeting_key": meeting_key, **compute_stats(samples)},
+        )
+        refreshed += 1
+    return refreshed
+
+
+def serialize_stats(stats: CarSessionStats) -> dict:
+    return {
+        "session_key": stats.session_key,
+        "driver_number": stats.driver_number,
+        "meeting_key": stats.meeting_key,
+        "sample_count": stats.sample_count,
+        "first_date": stats.first_date.isoformat(),
+        "last_date": stats.last_date.isoformat(),
+        "max_speed": stats.max_speed,
+        "mean_speed": stats.mean_speed,
+        "median_speed": stats.median_speed,
+        "p95_speed": stats.p95_speed,
+        "max_rpm": stats.max_rpm,
+        "full_throttle_fraction": stats.full_throttle_fraction,
+        "brake_fraction": stats.brake_fraction,
+        "drs_open_seconds": stats.drs_open_seconds,
+        "updated_at": stats.updated_at.isoformat(),
+    }
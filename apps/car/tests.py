@@ -1,12 +1,48 @@
+import json
+import threading
+import time
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+import numpy as np
+import requests
 from django.test import TestCase, Client
 from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.urls import reverse
 from django.utils import timezone
-from datetime import timedelta
-from apps.car.models import Car
+from datetime import datetime, timedelta, timezone as dt_timezone
+from apps.car.jobs import (
+    claim_next_job,
+    enqueue_refresh,
+    requeue_stale_jobs,
+    run_job,
+    run_next_job,
+    serialize_job,
+)
+from apps.car.refresh import fetch_openf1_telemetry
+from apps.car.models import Car, CarSessionStats, CarTrace, RefreshJob
+from apps.car.stats import compute_stats
+from apps.car.downsampling import ALGORITHMS, select_indices
 from apps.car.forms import CarForm
+from apps.car.management.commands.import_car_data import FETCH_WINDOW_PER_WORKER, Command as ImportCarDataCommand
+from apps.car.services import (
+    UPSERT_UNIQUE_FIELDS,
+    UPSERT_UPDATE_FIELDS,
+    RelatedRecordResolver,
+    ingest_openf1_rows,
+    upsert_cars,
+    upsert_rows,
+)
+from apps.car.traces import SAMPLE_FIELDS, compact_pairs, pack_samples, pair_samples, unpack_trace
+from apps.car.views import OPENF1_TRIPLET_CACHE, _fetch_openf1_triplet
 from apps.driver.models import Driver, DriverEntry
 from apps.meeting.models import Meeting
+from apps.openf1.cache import TTLCache
+from apps.openf1.client import UPSTREAM_REGISTRY, OpenF1Client, RateLimited, comparison_query
+from apps.openf1.jsonstream import iter_json_array
+from apps.openf1.ratelimit import RateLimiter, TokenBucket
 from apps.session.models import Session
 from apps.user.models import UserProfile
 
@@ -190,3 +226,938 @@ class CarViewTest(TestCase):
     def test_api_refresh_car_data_no_meeting_key(self):
         response = self.client.post(reverse('car:api_refresh'), data='{}', content_type='application/json')
         self.assertEqual(response.status_code, 400)
+
+
+class CarRefreshApiTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.rows = [
+            {
+                'meeting_key': 7, 'session_key': 70, 'driver_number': 1,
+                'date': f'2024-05-01T12:00:0{i}+00:00', 'speed': 300 + i,
+                'rpm': 11000, 'throttle': 99, 'brake': 0, 'n_gear': 8, 'drs': 12,
+            }
+            for i in range(5)
+        ]
+        self.rows.append({'meeting_key': 7, 'session_key': 71, 'driver_number': None, 'speed': 320})
+
+    def _refresh(self, body):
+        response = self.client.post(
+            reverse('car:api_refresh'), data=json.dumps(body), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 202)
+        run_next_job()
+        return self.client.get(response.json()['status_url']).json()['job']
+
+    def test_refresh_bulk_inserts_rows_and_related_records(self):
+        Car.objects.create(
+            driver_number=1, session_key=70, meeting_key=7, date=timezone.now(),
+            brake=0, drs=0, n_gear=5, rpm=9000, speed=310, throttle=50, is_manual=False
+        )
+        with patch('apps.car.refresh.fetch_openf1_telemetry', return_value=iter(self.rows)):
+            job = self._refresh({'meeting_key': 7, 'batch_size': 2, 'full': True})
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['created'], 5)
+        self.assertEqual(job['deleted'], 1)
+        self.assertEqual(job['skipped'], 1)
+        self.assertEqual(job['batch_size'], 2)
+        self.assertGreater(RefreshJob.objects.get(pk=job['id']).elapsed_seconds, 0)
+        self.assertIn('rows_per_second', job)
+        self.assertEqual(Car.objects.filter(meeting_key=7, is_manual=False).count(), 5)
+        self.assertTrue(Meeting.objects.filter(meeting_key=7).exists())
+        self.assertEqual(Session.objects.get(session_key=70).meeting_key, 7)
+
+    def test_incremental_refresh_only_appends_newer_samples(self):
+        Session.objects.create(session_key=70, meeting_key=7)
+        Session.objects.create(session_key=71, meeting_key=7)
+        ingest_openf1_rows(self.rows[:3])
+        calls = []
+
+        def fake_fetch(meeting_key, min_speed, session_key=None, after=None):
+            calls.append((session_key, after))
+            # Upstream may resend samples at the watermark; they must be dropped.
+            return iter([row for row in self.rows if row.get('session_key') == session_key])
+
+        with patch('apps.car.refresh.fetch_openf1_telemetry', side_effect=fake_fetch):
+            first = self._refresh({'meeting_key': 7})
+            second = self._refresh({'meeting_key': 7})
+
+        watermark = datetime(2024, 5, 1, 12, 0, 2, tzinfo=dt_timezone.utc)
+        self.assertEqual(calls[:2], [(70, watermark), (71, None)])
+        self.assertEqual((first['full'], first['created'], first['deleted']), (False, 2, 0))
+        self.assertEqual((second['created'], second['updated']), (0, 0))
+        self.assertEqual(Car.objects.filter(session_key=70).count(), 5)
+
+    def _plan_calls(self, body):
+        calls = []
+
+        def fake_fetch(meeting_key, min_speed, session_key=None, after=None):
+            calls.append((session_key, after))
+            return iter([row for row in self.rows if row.get('session_key') == session_key])
+
+        with patch('apps.car.refresh.fetch_openf1_telemetry', side_effect=fake_fetch):
+            job = self._refresh(body)
+        return calls, job
+
+    def test_wider_speed_range_refetches_from_the_start(self):
+        Session.objects.create(session_key=70, meeting_key=7)
+        ingest_openf1_rows(self.rows[:3])
+        RefreshJob.objects.create(
+            meeting_key=7, min_speed=310, batch_size=100,
+            status=RefreshJob.Status.SUCCEEDED, finished_at=timezone.now(),
+        )
+        calls, job = self._plan_calls({'meeting_key': 7, 'min_speed': 200})
+        self.assertEqual(calls, [(70, None)])
+        self.assertEqual((job['created'], job['updated']), (2, 3))
+
+        calls, _ = self._plan_calls({'meeting_key': 7, 'min_speed': 250})
+        self.assertEqual(calls, [(70, datetime(2024, 5, 1, 12, 0, 4, tzinfo=dt_timezone.utc))])
+
+    def test_registered_driver_without_samples_gets_a_full_fetch(self):
+        Session.objects.create(session_key=70, meeting_key=7)
+        meeting = Meeting.objects.create(meeting_key=7)
+        for number in (1, 44):
+            driver = Driver.objects.create(driver_number=number)
+            DriverEntry.objects.create(driver=driver, session_key=70, meeting=meeting)
+        ingest_openf1_rows(self.rows[:3])
+        calls, _ = self._plan_calls({'meeting_key': 7})
+        self.assertEqual(calls, [(70, None)])
+        # Driver 1's stored samples are still skipped, not rewritten.
+        self.assertEqual(Car.objects.filter(session_key=70).count(), 5)
+
+    def test_full_refresh_drops_traces_and_stats(self):
+        ingest_openf1_rows(self.rows[:3])
+        compact_pairs([(70, 1)], prune=True)
+        self.assertTrue(CarSessionStats.objects.filter(session_key=70).exists())
+        with patch('apps.car.refresh.fetch_openf1_telemetry', return_value=iter(())):
+            job = self._refresh({'meeting_key': 7, 'full': True})
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertFalse(CarTrace.objects.filter(meeting_key=7).exists())
+        self.assertFalse(CarSessionStats.objects.filter(meeting_key=7).exists())
+        self.assertEqual(pair_samples(70, 1), ([], None))
+
+    def test_job_reports_throughput(self):
+        job = RefreshJob(
+            meeting_key=7, min_speed=0, batch_size=100,
+            created_rows=300, updated_rows=100, elapsed_seconds=2.5,
+        )
+        payload = serialize_job(job)
+        self.assertEqual((payload['elapsed_seconds'], payload['rows_per_second']), (2.5, 160.0))
+        job.elapsed_seconds = 0
+        self.assertEqual(serialize_job(job)['rows_per_second'], 0.0)
+
+    def test_refresh_requests_are_deduplicated_per_meeting(self):
+        responses = [
+            self.client.post(
+                reverse('car:api_refresh'), data=json.dumps({'meeting_key': 7}),
+                content_type='application/json',
+            ).json()
+            for _ in range(2)
+        ]
+        self.assertEqual(responses[0]['job']['id'], responses[1]['job']['id'])
+        self.assertEqual([r['deduplicated'] for r in responses], [False, True])
+        self.assertEqual(RefreshJob.objects.count(), 1)
+
+        with patch('apps.car.refresh.fetch_openf1_telemetry', side_effect=requests.ConnectionError('down')):
+            job = run_next_job()
+        self.assertEqual(job.status, RefreshJob.Status.FAILED)
+        self.assertIn('down', job.error)
+        self.assertIsNone(run_next_job())
+
+        again = self.client.post(
+            reverse('car:api_refresh'), data=json.dumps({'meeting_key': 7}),
+            content_type='application/json',
+        ).json()
+        self.assertFalse(again['deduplicated'])
+
+    def test_unclaimed_job_runs_inline_after_fallback_delay(self):
+        job, _ = enqueue_refresh(7, min_speed=0, max_speed=None, batch_size=100)
+        status_url = reverse('car:api_refresh_status', args=[job.id])
+        with patch('apps.car.jobs._run_in_thread', side_effect=run_job) as run_inline, \
+                patch('apps.car.refresh.fetch_openf1_telemetry', return_value=iter(self.rows)):
+            self.assertEqual(self.client.get(status_url).json()['job']['status'], 'queued')
+            RefreshJob.objects.filter(pk=job.pk).update(created_at=timezone.now() - timedelta(minutes=1))
+            self.assertEqual(self.client.get(status_url).json()['job']['status'], 'succeeded')
+            self.client.get(status_url)
+        self.assertEqual(run_inline.call_count, 1)
+
+    def test_requeue_uses_heartbeat_not_progress(self):
+        job, _ = enqueue_refresh(7, min_speed=0, max_speed=None, batch_size=100)
+        claim_next_job()
+        long_ago = timezone.now() - timedelta(hours=1)
+        RefreshJob.objects.filter(pk=job.pk).update(updated_at=long_ago)
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=5)), 0)
+        RefreshJob.objects.filter(pk=job.pk).update(heartbeat_at=long_ago)
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=5)), 1)
+        self.assertEqual(RefreshJob.objects.get(pk=job.pk).status, RefreshJob.Status.QUEUED)
+
+    def test_orphaned_running_job_is_requeued_without_a_worker(self):
+        job, _ = enqueue_refresh(7, min_speed=0, max_speed=None, batch_size=100)
+        claim_next_job()
+        # The process running it died: no heartbeat for an hour.
+        long_ago = timezone.now() - timedelta(hours=1)
+        RefreshJob.objects.filter(pk=job.pk).update(heartbeat_at=long_ago, created_at=long_ago)
+
+        again, created = enqueue_refresh(7, min_speed=0, max_speed=None, batch_size=100)
+        self.assertEqual((again.pk, again.status, created), (job.pk, RefreshJob.Status.QUEUED, False))
+
+        claim_next_job()
+        RefreshJob.objects.filter(pk=job.pk).update(heartbeat_at=long_ago)
+        status_url = reverse('car:api_refresh_status', args=[job.id])
+        with patch('apps.car.jobs._run_in_thread', side_effect=run_job), \
+                patch('apps.car.refresh.fetch_openf1_telemetry', return_value=iter(self.rows)):
+            self.assertEqual(self.client.get(status_url).json()['job']['status'], 'succeeded')
+
+    def test_refresh_status_unknown_job(self):
+        response = self.client.get(reverse('car:api_refresh_status', args=[999]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_resolver_reuses_known_keys(self):
+        resolver = RelatedRecordResolver()
+        resolver.resolve({70: 7})
+        with self.assertNumQueries(0):
+            resolver.resolve({70: 7})
+
+
+class CarUpsertTest(TestCase):
+    def _car(self, speed, second=0):
+        return Car(
+            driver_number=1, session_key=70, meeting_key=7,
+            date=datetime(2024, 5, 1, 12, 0, second, tzinfo=dt_timezone.utc),
+            brake=0, drs=0, n_gear=8, rpm=11000, speed=speed, throttle=99, is_manual=False,
+        )
+
+    def test_upsert_updates_on_natural_key(self):
+        self.assertEqual(upsert_cars([self._car(300), self._car(301, 1)]), (2, 0))
+        self.assertEqual(upsert_cars([self._car(305), self._car(306, 2), self._car(307, 2)]), (1, 1))
+        self.assertEqual(Car.objects.count(), 3)
+        self.assertEqual(Car.objects.get(date__second=0).speed, 305)
+        self.assertEqual(Car.objects.get(date__second=2).speed, 307)
+
+    def test_upsert_rows_fallback_without_on_conflict(self):
+        cars = [self._car(300), self._car(301, 1)]
+        with patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            self.assertEqual(upsert_rows(Car, cars[:1], UPSERT_UNIQUE_FIELDS, UPSERT_UPDATE_FIELDS), (1, 0))
+            self.assertEqual(upsert_rows(Car, cars, UPSERT_UNIQUE_FIELDS, UPSERT_UPDATE_FIELDS), (1, 1))
+        self.assertEqual(sorted(Car.objects.values_list('speed', flat=True)), [300, 301])
+
+    def test_upsert_create_only_keeps_existing(self):
+        upsert_cars([self._car(300)])
+        self.assertEqual(upsert_cars([self._car(310), self._car(311, 1)], create_only=True), (1, 0))
+        self.assertEqual(Car.objects.get(date__second=0).speed, 300)
+
+    def test_manual_form_rejects_duplicate_sample(self):
+        start = datetime(2024, 5, 1, 12, 0, 0, tzinfo=dt_timezone.utc)
+        meeting = Meeting.objects.create(meeting_key=7, meeting_name='Test GP', year=2024)
+        Session.objects.create(session_key=70, meeting_key=7, name='Race', start_time=start)
+        driver = Driver.objects.create(driver_number=1, full_name='Test Driver')
+        DriverEntry.objects.create(driver=driver, session_key=70, meeting=meeting)
+        upsert_cars([self._car(300, 10)])
+        form = CarForm(data={
+            'meeting_key': 7, 'session_key': 70, 'driver_number': 1, 'speed': 200,
+            'throttle': 80, 'brake': 100, 'n_gear': 5, 'rpm': 10000, 'drs': 0, 'session_offset_seconds': 10
+        }, meeting_choices=[(7, 'Test GP')])
+        self.assertFalse(form.is_valid())
+
+
+class ImportCarDataCommandTest(TestCase):
+    def _rows(self, params):
+        return [
+            {
+                'meeting_key': params['meeting_key'], 'session_key': params['session_key'],
+                'driver_number': 1, 'date': f'2024-05-01T12:00:0{i}+00:00', 'speed': 300,
+                'rpm': 11000, 'throttle': 99, 'brake': 0, 'n_gear': 8, 'drs': 0,
+            }
+            for i in range(3)
+        ]
+
+    def test_concurrent_import_writes_every_session(self):
+        sessions = {7: [{'session_key': 70}, {'session_key': 71}], 8: [{'session_key': 80}]}
+        out = StringIO()
+        with patch.object(ImportCarDataCommand, '_fetch_sessions', side_effect=lambda mk: sessions[mk]), \
+                patch.object(ImportCarDataCommand, '_fetch_batch', side_effect=self._rows):
+            call_command(
+                'import_car_data', '--meeting-key', '7', '--meeting-key', '8',
+                '--concurrency', '4', '--rate', '0', '--rate-per-minute', '0', stdout=out,
+            )
+        self.assertEqual(Car.objects.count(), 9)
+        self.assertEqual(set(Session.objects.values_list('session_key', flat=True)), {70, 71, 80})
+        self.assertIn('meeting 7: processed 6 rows (created=6, updated=0)', out.getvalue())
+        self.assertIn('meeting 8: processed 3 rows (created=3, updated=0)', out.getvalue())
+
+    def test_import_never_overwrites_a_manual_sample(self):
+        manual = Car.objects.create(
+            driver_number=1, session_key=70, meeting_key=7,
+            date=datetime(2024, 5, 1, 12, 0, 1, tzinfo=dt_timezone.utc),
+            brake=0, drs=0, n_gear=3, rpm=5000, speed=123, throttle=10, is_manual=True,
+        )
+        out = StringIO()
+        with patch.object(ImportCarDataCommand, '_fetch_sessions', return_value=[{'session_key': 70}]), \
+                patch.object(ImportCarDataCommand, '_fetch_batch', side_effect=self._rows):
+            call_command(
+                'import_car_data', '--meeting-key', '7', '--rate', '0', '--rate-per-minute', '0', stdout=out,
+            )
+        manual.refresh_from_db()
+        self.assertEqual((manual.speed, manual.n_gear, manual.is_manual), (123, 3, True))
+        self.assertEqual(Car.objects.filter(session_key=70, is_manual=False).count(), 2)
+        self.assertIn('created=2, updated=0', out.getvalue())
+
+    def test_concurrent_import_bounds_batches_waiting_for_the_writer(self):
+        sessions = {7: [{'session_key': key} for key in range(70, 82)]}
+        counts = {'fetched': 0, 'written': 0, 'backlog': 0}
+        lock = threading.Lock()
+        write_batch = ImportCarDataCommand._write_batch
+
+        def fetch(params):
+            with lock:
+                counts['fetched'] += 1
+                counts['backlog'] = max(counts['backlog'], counts['fetched'] - counts['written'])
+            return self._rows(params)
+
+        def write(command, *args):
+            time.sleep(0.005)
+            result = write_batch(command, *args)
+            with lock:
+                counts['written'] += 1
+            return result
+
+        with patch.object(ImportCarDataCommand, '_fetch_sessions', side_effect=lambda mk: sessions[mk]), \
+                patch.object(ImportCarDataCommand, '_fetch_batch', side_effect=fetch), \
+                patch.object(ImportCarDataCommand, '_write_batch', autospec=True, side_effect=write):
+            call_command(
+                'import_car_data', '--meeting-key', '7', '--concurrency', '2',
+                '--rate', '0', '--rate-per-minute', '0', stdout=StringIO(),
+            )
+        self.assertEqual(Car.objects.count(), 36)
+        self.assertLessEqual(counts['backlog'], 2 * FETCH_WINDOW_PER_WORKER)
+
+    def test_sleep_is_rejected_with_concurrency(self):
+        with self.assertRaisesMessage(CommandError, '--sleep only applies with --concurrency 1'):
+            call_command('import_car_data', '--meeting-key', '7', '--concurrency', '4', '--sleep', '1')
+
+    def test_token_bucket_waits_when_empty(self):
+        bucket = TokenBucket(rate=1000, capacity=1)
+        self.assertEqual(bucket.acquire(), 0.0)
+        self.assertGreater(bucket.acquire(), 0.0)
+
+    def test_try_acquire_never_waits_and_refunds_partial_takes(self):
+        per_second = TokenBucket(rate=1000, capacity=1)
+        per_minute = TokenBucket(rate=0.001, capacity=1)
+        limiter = RateLimiter([per_second, per_minute])
+        self.assertEqual(limiter.try_acquire(), 0.0)
+        time.sleep(0.002)
+        self.assertGreater(limiter.try_acquire(), 100)
+        # The per-second token taken before the per-minute bucket refused is given back.
+        self.assertEqual(per_second.try_acquire(), 0.0)
+
+
+class JsonStreamTest(TestCase):
+    def test_iter_json_array_across_small_chunks(self):
+        payload = json.dumps([{'speed': 300 + i, 'label': 'é'} for i in range(20)]).encode()
+        rows = list(iter_json_array(BytesIO(payload), chunk_size=7))
+        self.assertEqual([row['speed'] for row in rows], list(range(300, 320)))
+        self.assertEqual(rows[0]['label'], 'é')
+
+    def test_iter_json_array_recovers_truncated_payload(self):
+        payload = b'[{"speed": 1}, {"speed": 2}, {"spe'
+        self.assertEqual(list(iter_json_array(BytesIO(payload), chunk_size=4)), [{'speed': 1}, {'speed': 2}])
+        self.assertEqual(list(iter_json_array(b'{"detail": "error"}')), [])
+        self.assertEqual(list(iter_json_array(BytesIO(b'[1, 23'), chunk_size=5)), [1, 23])
+
+
+    def test_iter_json_array_stops_at_malformed_element(self):
+        payload = BytesIO(b'[{"speed": 1}, {"speed" 2}, ' + b'{"speed": 3}, ' * 1000 + b']')
+        reads = []
+        read = payload.read
+        payload.read = lambda n: reads.append(n) or read(n)
+        self.assertEqual(list(iter_json_array(payload, chunk_size=16)), [{'speed': 1}])
+        # The stream is abandoned instead of re-parsed as every chunk arrives.
+        self.assertLess(len(reads), 5)
+        # Literals and numbers cut at a chunk boundary still wait for the rest.
+        chunked_literals = BytesIO(b'[true, -12.5e3, null, "\\u00e9"]')
+        self.assertEqual(list(iter_json_array(chunked_literals, chunk_size=1)), [True, -12500.0, None, 'é'])
+
+
+class CarTraceTest(TestCase):
+    def setUp(self):
+        self.start = datetime(2024, 5, 1, 12, 0, 0, tzinfo=dt_timezone.utc)
+        Session.objects.create(session_key=70, meeting_key=7, name='Race', start_time=self.start)
+        upsert_cars([
+            Car(
+                driver_number=1, session_key=70, meeting_key=7,
+                date=self.start + timedelta(milliseconds=270 * i),
+                brake=0, drs=12, n_gear=8, rpm=11000 + i, speed=300 + i, throttle=99, is_manual=False,
+            )
+            for i in range(50)
+        ])
+        Car.objects.create(
+            driver_number=1, session_key=70, meeting_key=7, date=self.start + timedelta(seconds=1, milliseconds=1),
+            brake=100, drs=0, n_gear=3, rpm=8000, speed=120, throttle=0, is_manual=True,
+        )
+
+    def test_pack_roundtrip(self):
+        rows = list(Car.objects.filter(is_manual=False).order_by('date').values_list(*SAMPLE_FIELDS))
+        start_date, end_date, payload = pack_samples(rows)
+        trace = CarTrace(session_key=70, driver_number=1, start_date=start_date, end_date=end_date, payload=payload)
+        self.assertEqual(list(unpack_trace(trace).samples()), rows)
+        self.assertLess(len(payload), len(rows) * 12)
+
+    def test_grouped_api_serves_trace_and_manual_rows(self):
+        out = StringIO()
+        call_command('compact_car_traces', '--meeting-key', '7', '--prune', stdout=out)
+        self.assertIn('Built 1 traces, pruned 50 Car rows', out.getvalue())
+        self.assertEqual(Car.objects.count(), 1)
+
+        response = self.client.get(reverse('car:api_grouped'), {'meeting_key': 7})
+        groups = response.json()['groups']
+        self.assertEqual(len(groups), 1)
+        telemetry = groups[0]['telemetry']
+        self.assertEqual(len(telemetry), 51)
+        self.assertEqual([row['date'] for row in telemetry], sorted(row['date'] for row in telemetry))
+        self.assertEqual(telemetry[0]['speed'], 300)
+        self.assertEqual(sum(1 for row in telemetry if row['id'] is not None), 1)
+
+        response = self.client.get(reverse('car:api_grouped'), {'meeting_key': 7, 'max_points': 10})
+        self.assertEqual(len(response.json()['groups'][0]['telemetry']), 11)
+
+        response = self.client.get(reverse('car:api_grouped'), {'meeting_key': 7, 'format': 'columnar'})
+        columns = response.json()['groups'][0]['columns']
+        self.assertEqual(len(columns['timestamp_ms']), 51)
+        self.assertEqual(columns['timestamp_ms'], sorted(columns['timestamp_ms']))
+        self.assertIn(120, columns['speed'])
+
+    def test_ingest_refreshes_existing_trace(self):
+        compact_pairs([(70, 1)], prune=True)
+        ingest_openf1_rows([{
+            'meeting_key': 7, 'session_key': 70, 'driver_number': 1,
+            'date': '2024-05-01T12:01:00+00:00', 'speed': 333,
+        }])
+        trace = CarTrace.objects.get(session_key=70, driver_number=1)
+        self.assertEqual(trace.sample_count, 51)
+        self.assertEqual(unpack_trace(trace).speed[-1], 333)
+
+
+class DownsamplingTest(TestCase):
+    def setUp(self):
+        self.x = np.arange(1000, dtype=float)
+        self.y = np.sin(self.x / 25.0) * 100
+        self.y[500] = 1000
+
+    def test_algorithms_bound_points_and_keep_extremes(self):
+        for algorithm in ALGORITHMS:
+            picks = select_indices(self.x, self.y, 100, algorithm)
+            self.assertLessEqual(len(picks), 100, algorithm)
+            self.assertTrue(np.all(np.diff(picks) > 0), algorithm)
+            self.assertEqual(picks[0], 0, algorithm)
+        self.assertIn(500, select_indices(self.x, self.y, 100, 'lttb'))
+        self.assertIn(500, select_indices(self.x, self.y, 100, 'minmax'))
+        self.assertEqual(select_indices(self.x, self.y, 100, 'lttb')[-1], 999)
+
+    def test_grouped_api_downsamples_each_group(self):
+        start = datetime(2024, 5, 1, 12, 0, 0, tzinfo=dt_timezone.utc)
+        upsert_cars([
+            Car(
+                driver_number=driver, session_key=70, meeting_key=7,
+                date=start + timedelta(milliseconds=270 * i),
+                brake=0, drs=0, n_gear=8, rpm=11000, speed=200 + i % 100, throttle=99, is_manual=False,
+            )
+            for driver in (1, 44) for i in range(300)
+        ])
+        response = self.client.get(reverse('car:api_grouped'), {'meeting_key': 7, 'max_points': 50})
+        payload = response.json()
+        self.assertEqual(payload['algorithm'], 'lttb')
+        self.assertEqual([len(group['telemetry']) for group in payload['groups']], [50, 50])
+
+        response = self.client.get(reverse('car:api_grouped'), {'meeting_key': 7, 'algorithm': 'bogus'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ColumnarGroupedApiTest(TestCase):
+    def setUp(self):
+        self.start = datetime(2024, 5, 1, 12, 0, 0, tzinfo=dt_timezone.utc)
+        upsert_cars([
+            Car(
+                driver_number=driver, session_key=70, meeting_key=7,
+                date=self.start + timedelta(milliseconds=250 * i),
+                brake=0, drs=12, n_gear=7, rpm=11000 + i, speed=250 + i, throttle=99, is_manual=False,
+            )
+            for driver in (1, 44) for i in range(40)
+        ])
+
+    def test_columnar_format_returns_parallel_arrays(self):
+        # Two ETag fingerprint aggregates, then traces and one values_list.
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('car:api_grouped'), {'meeting_key': 7, 'format': 'columnar'})
+        payload = response.json()
+        self.assertEqual(payload['format'], 'columnar')
+        self.assertEqual([group['driver_number'] for group in payload['groups']], [1, 44])
+        columns = payload['groups'][0]['columns']
+        self.assertEqual(columns['timestamp_ms'][:2], [1714564800000, 1714564800250])
+        self.assertEqual(columns['speed'][:2], [250, 251])
+        self.assertEqual(columns['gear'][0], 7)
+        self.assertEqual(payload['groups'][0]['count'], 40)
+
+    def test_columnar_format_downsamples(self):
+        response = self.client.get(
+            reverse('car:api_grouped'),
+            {'meeting_key': 7, 'format': 'columnar', 'max_points': 10, 'algorithm': 'every_nth'},
+        )
+        group = response.json()['groups'][0]
+        self.assertEqual(group['count'], 10)
+        self.assertEqual(len(group['columns']['rpm']), 10)
+
+
+class OpenF1FallbackCacheTest(TestCase):
+    def setUp(self):
+        OPENF1_TRIPLET_CACHE.clear()
+        self.rows = [{
+            'meeting_key': 7, 'session_key': 70, 'driver_number': 1,
+            'date': '2024-05-01T12:00:00+00:00', 'speed': 300,
+        }]
+
+    def tearDown(self):
+        OPENF1_TRIPLET_CACHE.clear()
+
+    def test_fallback_is_fetched_once_per_key(self):
+        params = {'driver_number': 1, 'session_key': 70}
+        with patch('apps.car.views._download_openf1_triplet', return_value=self.rows) as download:
+            for _ in range(3):
+                response = self.client.get(reverse('car:api_grouped'), params)
+                self.assertEqual(len(response.json()['groups'][0]['telemetry']), 1)
+            self.client.get(reverse('car:api_grouped'), {**params, 'min_speed': 250})
+        self.assertEqual(download.call_count, 2)
+
+        stats = self.client.get(reverse('car:api_cache_stats')).json()['caches'][0]
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (2, 2, 2))
+
+    def test_network_errors_are_not_cached(self):
+        with patch('apps.car.views._download_openf1_triplet', side_effect=requests.ConnectionError('down')) as download:
+            self.assertEqual(_fetch_openf1_triplet(1, 70), [])
+            self.assertEqual(_fetch_openf1_triplet(1, 70), [])
+        self.assertEqual(download.call_count, 2)
+
+    def test_cache_coalesces_concurrent_loads_and_evicts_lru(self):
+        cache = TTLCache(ttl=60, max_entries=2)
+        release = threading.Event()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            release.wait(5)
+            return 'value'
+
+        threads = [threading.Thread(target=cache.get_or_load, args=('k', loader)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        while cache.stats()['coalesced'] < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+
+        cache.get_or_load('a', lambda: 1)
+        cache.get_or_load('b', lambda: 2)
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(cache.get_or_load('a', lambda: 'reloaded'), 1)
+
+    def test_cache_evicts_by_total_weight(self):
+        cache = TTLCache(ttl=60, max_entries=10, max_weight=5)
+        cache.get_or_load('a', lambda: [1, 2])
+        cache.get_or_load('b', lambda: [1, 2])
+        cache.get_or_load('a', lambda: 'unused')
+        cache.get_or_load('c', lambda: [1, 2])
+        self.assertEqual((cache.stats()['size'], cache.stats()['weight']), (2, 4))
+        self.assertEqual(cache.get_or_load('a', lambda: 'unused'), [1, 2])
+        self.assertEqual(cache.get_or_load('b', lambda: 'reloaded'), 'reloaded')
+
+        self.assertEqual(cache.get_or_load('huge', lambda: list(range(6))), list(range(6)))
+        self.assertNotIn('huge', cache._entries)
+
+    def test_stale_entries_are_served_while_refreshing(self):
+        cache = TTLCache(ttl=0, stale_ttl=60, max_entries=4)
+        release = threading.Event()
+
+        def slow_reload():
+            release.wait(5)
+            return 'v2'
+
+        self.assertEqual(cache.get_or_load('k', lambda: 'v1'), 'v1')
+        self.assertEqual(cache.get_or_load('k', slow_reload), 'v1')
+        self.assertEqual(cache.get_or_load('k', slow_reload), 'v1')
+        release.set()
+        while cache.stats()['refreshes'] < 1:
+            time.sleep(0.001)
+        self.assertEqual(cache.get_or_load('k', lambda: 'v3', ttl=60), 'v2')
+
+        def failing_reload():
+            raise requests.ConnectionError('down')
+
+        cache.get_or_load('f', lambda: 'kept')
+        cache.get_or_load('f', failing_reload)
+        while cache.stats()['refresh_errors'] < 1:
+            time.sleep(0.001)
+        self.assertEqual(cache.get_or_load('f', lambda: 'kept'), 'kept')
+        self.assertEqual((cache.stats()['stale_hits'], cache.stats()['misses']), (5, 2))
+
+
+class OpenF1ClientTest(TestCase):
+    def setUp(self):
+        UPSTREAM_REGISTRY.reset()
+        self.client_ = OpenF1Client(rate_limiter=RateLimiter([]))
+
+    def _response(self, status, payload=b'[]'):
+        response = requests.Response()
+        response.status_code = status
+        response.raw = BytesIO(payload)
+        response.url = self.client_.url('car_data')
+        return response
+
+    def test_comparison_query_keeps_operators_out_of_keys(self):
+        query = comparison_query(
+            {'session_key': 9},
+            ('speed', '>=', 310),
+            ('date', '>', '2024-05-01T12:00:00+00:00'),
+        )
+        self.assertEqual(query, 'session_key=9&speed>=310&date>2024-05-01T12%3A00%3A00%2B00%3A00')
+
+    def test_session_is_pooled_and_retries_with_jitter(self):
+        adapter = self.client_.session.get_adapter('https://api.openf1.org/v1/laps')
+        retry = adapter.max_retries
+        self.assertEqual(retry.total, 3)
+        self.assertGreater(retry.backoff_jitter, 0)
+        self.assertIn(429, retry.status_forcelist)
+        self.assertEqual(adapter._pool_maxsize, 10)
+        self.assertIn('gzip', self.client_.session.headers['Accept-Encoding'])
+
+    def test_iter_rows_streams_and_records_latency(self):
+        body = json.dumps([{'speed': 300}, {'speed': 301}]).encode()
+        with patch.object(self.client_.session, 'get', return_value=self._response(200, body)) as get:
+            rows = list(self.client_.iter_rows('car_data', 'session_key=1&speed>=300'))
+        self.assertEqual([row['speed'] for row in rows], [300, 301])
+        self.assertTrue(get.call_args.kwargs['stream'])
+
+        with patch.object(self.client_.session, 'get', return_value=self._response(503)):
+            with self.assertRaises(requests.HTTPError):
+                self.client_.get_json('car_data')
+        (row,) = UPSTREAM_REGISTRY.snapshot()
+        self.assertEqual((row['endpoint'], row['requests'], row['errors']), ('car_data', 2, 1))
+        self.assertEqual(row['latency_ms']['count'], 2)
+
+    def test_non_blocking_client_raises_instead_of_sleeping(self):
+        client = OpenF1Client(rate_limiter=RateLimiter([TokenBucket(rate=0.001, capacity=1)]), blocking=False)
+        with patch.object(client.session, 'get', return_value=self._response(200)) as get:
+            client.get_json('laps')
+            with self.assertRaises(RateLimited) as raised:
+                client.get_json('laps')
+        get.assert_called_once()
+        self.assertGreater(raised.exception.retry_after, 100)
+
+    def test_non_blocking_client_never_waits_on_upstream_429(self):
+        client = OpenF1Client(rate_limiter=RateLimiter([]), blocking=False)
+        retry = client.session.get_adapter('https://api.openf1.org/v1/laps').max_retries
+        self.assertEqual((retry.status, retry.backoff_factor, retry.respect_retry_after_header), (0, 0, False))
+
+        response = self._response(429)
+        response.headers['Retry-After'] = '7'
+        with patch.object(client.session, 'get', return_value=response) as get:
+            with self.assertRaises(RateLimited) as raised:
+                client.get_json('laps')
+        get.assert_called_once()
+        self.assertEqual(raised.exception.retry_after, 7.0)
+
+    def test_refresh_fetch_treats_422_as_no_rows(self):
+        with patch('apps.car.refresh.get_client', return_value=self.client_), \
+                patch.object(self.client_.session, 'get', return_value=self._response(422, b'{}')) as get:
+            self.assertEqual(list(fetch_openf1_telemetry(7, 310, session_key=70)), [])
+        self.assertEqual(get.call_args.kwargs['params'], 'session_key=70&speed>=310')
+
+
+class CarSerializationQueryTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        start = datetime(2024, 5, 1, 12, 0, tzinfo=dt_timezone.utc)
+        for session_key in range(1, 6):
+            Session.objects.create(session_key=session_key, meeting_key=1, name=f'S{session_key}', start_time=start)
+        self.cars = [
+            Car.objects.create(
+                driver_number=1, session_key=session_key, meeting_key=1,
+                date=start + timedelta(seconds=session_key * 10),
+                brake=0, drs=0, n_gear=5, rpm=10000, speed=200, throttle=80, is_manual=True,
+            )
+            for session_key in range(1, 6)
+        ]
+        self.client.force_login(self.user)
+
+    def test_list_endpoints_use_one_session_query(self):
+        # Auth session + user, the car page, one Session batch.
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('car:show_json'))
+        payload = response.json()
+        self.assertEqual(len(payload), 5)
+        self.assertEqual(payload[0]['session_name'], 'S5')
+        self.assertEqual(payload[0]['session_offset_seconds'], 50)
+
+        with self.assertNumQueries(4):
+            self.client.get(reverse('car:manual_json'))
+
+    def test_single_item_endpoint_uses_one_session_query(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('car:show_json_by_id', args=[self.cars[2].id]))
+        self.assertEqual(response.json()['session_offset_seconds'], 30)
+
+
+class CarExportTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        start = datetime(2024, 5, 1, 12, 0, tzinfo=dt_timezone.utc)
+        for second in range(5):
+            Car.objects.create(
+                driver_number=1 if second < 3 else 2, session_key=70, meeting_key=7,
+                date=start + timedelta(seconds=second),
+                brake=0, drs=0, n_gear=5, rpm=10000, speed=200 + second, throttle=80, is_manual=False,
+            )
+        self.client.force_login(self.user)
+
+    def _body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_xml_export_matches_serializer_output(self):
+        from django.core import serializers
+        from apps.car.exports import iter_xml
+
+        queryset = Car.objects.order_by('pk')
+        self.assertEqual(''.join(iter_xml(queryset, chunk_size=2)), serializers.serialize('xml', queryset))
+        response = self.client.get(reverse('car:show_xml'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(self._body(response).decode(), serializers.serialize('xml', queryset))
+
+    def test_jsonl_and_csv_exports_apply_filters(self):
+        response = self.client.get(reverse('car:export_cars'), {'format': 'jsonl', 'driver_number': 2})
+        lines = self._body(response).decode().splitlines()
+        self.assertEqual([json.loads(line)['speed'] for line in lines], [203, 204])
+
+        response = self.client.get(reverse('car:export_cars'), {'format': 'csv', 'driver_number': 1})
+        rows = self._body(response).decode().splitlines()
+        self.assertEqual(rows[0].split(',')[:3], ['id', 'meeting_key', 'session_key'])
+        self.assertEqual(len(rows), 4)
+
+    def test_gzip_export(self):
+        import gzip
+
+        response = self.client.get(reverse('car:export_cars'), {'format': 'csv', 'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('cars.csv.gz', response['Content-Disposition'])
+        self.assertEqual(len(gzip.decompress(self._body(response)).decode().splitlines()), 6)
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get(reverse('car:export_cars'), {'format': 'yaml'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CarKeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        start = datetime(2024, 5, 1, 12, 0, tzinfo=dt_timezone.utc)
+        # Two drivers share every timestamp, so pages must break ties on id.
+        for second in range(4):
+            for driver_number in (1, 2):
+                Car.objects.create(
+                    driver_number=driver_number, session_key=70, meeting_key=7,
+                    date=start + timedelta(seconds=second),
+                    brake=0, drs=0, n_gear=5, rpm=10000, speed=200, throttle=80, is_manual=True,
+                )
+        self.client.force_login(self.user)
+
+    def _walk(self, url_name, **params):
+        ids, cursor = [], None
+        while True:
+            query = {**params, 'limit': 3}
+            if cursor:
+                query['cursor'] = cursor
+            response = self.client.get(reverse(url_name), query)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(int(item['id']) for item in response.json())
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                return ids, response
+            self.assertIn('rel="next"', response['Link'])
+
+    def test_cursor_walks_every_row_once_in_order(self):
+        expected = list(Car.objects.order_by('-date', '-id').values_list('id', flat=True))
+        for url_name in ('car:show_json', 'car:manual_json'):
+            ids, last_response = self._walk(url_name)
+            self.assertEqual(ids, expected)
+            self.assertNotIn('Link', last_response)
+
+    def test_cursor_keeps_filters(self):
+        ids, _ = self._walk('car:show_json', driver_number=2)
+        self.assertEqual(len(ids), 4)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('car:show_json'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CarSessionStatsTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        start = datetime(2024, 5, 1, 12, 0, tzinfo=dt_timezone.utc)
+        self.rows = [
+            {
+                'meeting_key': 7, 'session_key': 70, 'driver_number': 1,
+                'date': (start + timedelta(milliseconds=250 * i)).isoformat(),
+                'speed': 100 + 10 * i, 'rpm': 10000 + i, 'throttle': 100 if i % 2 else 50,
+                'brake': 100 if i == 0 else 0, 'n_gear': 7, 'drs': 12 if i >= 2 else 0,
+            }
+            for i in range(4)
+        ]
+
+    def test_ingest_refreshes_stats_for_touched_pairs(self):
+        ingest_openf1_rows(self.rows)
+        stats = CarSessionStats.objects.get(session_key=70, driver_number=1)
+        self.assertEqual(stats.sample_count, 4)
+        self.assertEqual((stats.max_speed, stats.max_rpm), (130, 10003))
+        self.assertEqual(stats.mean_speed, 115)
+        self.assertEqual(stats.full_throttle_fraction, 0.5)
+        self.assertEqual(stats.brake_fraction, 0.25)
+        # DRS is open from the third sample; only the gap to the fourth counts.
+        self.assertEqual(stats.drs_open_seconds, 0.25)
+
+        # Stats survive compaction and include samples only kept in the trace.
+        compact_pairs([(70, 1)], prune=True)
+        ingest_openf1_rows([{**self.rows[-1], 'date': '2024-05-01T12:00:01+00:00', 'speed': 300}])
+        stats.refresh_from_db()
+        self.assertEqual((stats.sample_count, stats.max_speed), (5, 300))
+
+    def test_incremental_ingest_merges_new_rows_into_stats(self):
+        start = datetime(2024, 5, 1, 12, 0, tzinfo=dt_timezone.utc)
+        rows = [
+            {
+                'meeting_key': 7, 'session_key': 70, 'driver_number': 1,
+                'date': (start + timedelta(milliseconds=300 * i)).isoformat(),
+                'speed': (37 * i) % 311, 'rpm': 9000 + (i * 7) % 500, 'throttle': 100 if i % 3 else 20,
+                'brake': 50 if i % 5 == 0 else 0, 'n_gear': 7, 'drs': 12 if 4 <= i < 9 else 0,
+            }
+            for i in range(13)
+        ]
+        ingest_openf1_rows(rows[:6])
+        mark = CarSessionStats.objects.get(session_key=70, driver_number=1).last_date
+
+        with patch('apps.car.stats.pair_samples') as full_read:
+            ingest_openf1_rows(rows[6:], appended_after={(70, 1): mark})
+        full_read.assert_not_called()
+
+        merged = CarSessionStats.objects.get(session_key=70, driver_number=1)
+        expected = compute_stats(pair_samples(70, 1)[0])
+        for field, value in expected.items():
+            if isinstance(value, float):
+                self.assertAlmostEqual(getattr(merged, field), value, places=3, msg=field)
+            else:
+                self.assertEqual(getattr(merged, field), value, field)
+        speeds = [row['speed'] for row in rows]
+        self.assertAlmostEqual(merged.p95_speed, round(float(np.percentile(speeds, 95)), 2))
+
+    def test_session_stats_api(self):
+        ingest_openf1_rows(self.rows)
+        response = self.client.get(reverse('car:api_session_stats'), {'meeting_key': 7})
+        self.assertEqual([row['driver_number'] for row in response.json()['stats']], [1])
+        self.assertEqual(self.client.get(reverse('car:api_session_stats')).status_code, 400)
+
+
+class CarRollupTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        start = datetime(2024, 5, 1, 12, 0, tzinfo=dt_timezone.utc)
+        rows = [
+            {
+                'meeting_key': 7, 'session_key': 70, 'driver_number': driver,
+                'date': (start + timedelta(milliseconds=500 * i)).isoformat(),
+                'speed': 100 + i, 'rpm': 10000, 'throttle': 10 * i, 'brake': 0, 'n_gear': 7, 'drs': 0,
+            }
+            for driver in (1, 2)
+            for i in range(5)
+        ]
+        ingest_openf1_rows(rows)
+
+    def test_rollup_buckets_min_max_avg(self):
+        response = self.client.get(reverse('car:api_rollups'), {'session_key': 70, 'bucket': '1s'})
+        drivers = response.json()['drivers']
+        self.assertEqual([d['driver_number'] for d in drivers], [1, 2])
+        first = drivers[0]
+        self.assertEqual(first['count'], [2, 2, 1])
+        self.assertEqual(first['speed'], {'min': [100, 102, 104], 'max': [101, 103, 104], 'avg': [100.5, 102.5, 104.0]})
+        self.assertEqual(first['bucket_start_ms'][1] - first['bucket_start_ms'][0], 1000)
+
+    def test_rollups_read_compacted_traces(self):
+        compact_pairs([(70, 1)], prune=True)
+        response = self.client.get(
+            reverse('car:api_rollups'), {'session_key': 70, 'driver_number': 1, 'bucket': '1m'}
+        )
+        drivers = response.json()['drivers']
+        self.assertEqual(drivers[0]['count'], [5])
+        self.assertEqual(drivers[0]['throttle']['max'], [40])
+
+    def test_invalid_bucket(self):
+        response = self.client.get(reverse('car:api_rollups'), {'session_key': 70, 'bucket': '2h'})
+        self.assertEqual(response.status_code, 400)
+
+
+class GroupedOffsetWindowTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.start = datetime(2024, 5, 1, 12, 0, tzinfo=dt_timezone.utc)
+        Session.objects.create(session_key=70, meeting_key=7, name='Race', start_time=self.start)
+        ingest_openf1_rows([
+            {
+                'meeting_key': 7, 'session_key': 70, 'driver_number': 1,
+                'date': (self.start + timedelta(seconds=i)).isoformat(),
+                'speed': 100 + i, 'rpm': 10000, 'throttle': 99, 'brake': 0, 'n_gear': 7, 'drs': 0,
+            }
+            for i in range(10)
+        ])
+        self.params = {'session_key': 70, 'driver_number': 1, 'from_offset': 3, 'to_offset': 5.5}
+
+    def _speeds(self, **extra):
+        response = self.client.get(reverse('car:api_grouped'), {**self.params, **extra})
+        self.assertEqual(response.status_code, 200)
+        group = response.json()['groups'][0]
+        if 'columns' in group:
+            return group['columns']['speed']
+        return [row['speed'] for row in group['telemetry']]
+
+    def test_offset_window_on_rows_traces_and_columnar(self):
+        self.assertEqual(self._speeds(), [103, 104, 105])
+        compact_pairs([(70, 1)], prune=True)
+        self.assertEqual(self._speeds(), [103, 104, 105])
+        self.assertEqual(self._speeds(format='columnar'), [103, 104, 105])
+        self.assertEqual(self._speeds(format='columnar', to_offset=''), [103, 104, 105, 106, 107, 108, 109])
+
+    def test_offsets_require_known_session_start(self):
+        response = self.client.get(reverse('car:api_grouped'), {'meeting_key': 7, 'from_offset': 1})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('car:api_grouped'), {**self.params, 'from_offset': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+
+class GroupedConditionalGetTest(TestCase):
+    def test_grouped_data_etag_changes_after_ingest(self):
+        row = {
+            'meeting_key': 7, 'session_key': 70, 'driver_number': 1,
+            'date': '2024-05-01T12:00:00+00:00', 'speed': 300,
+            'rpm': 11000, 'throttle': 99, 'brake': 0, 'n_gear': 8, 'drs': 0,
+        }
+        ingest_openf1_rows([row])
+        url = reverse('car:api_grouped')
+        first = self.client.get(url, {'meeting_key': 7})
+        with self.assertNumQueries(2):
+            cached = self.client.get(url, {'meeting_key': 7}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        ingest_openf1_rows([{**row, 'date': '2024-05-01T12:00:01+00:00'}])
+        fresh = self.client.get(url, {'meeting_key': 7}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(len(fresh.json()['groups'][0]['telemetry']), 2)
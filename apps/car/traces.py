@@ -0,0 +1,284 @@
+import struct
+import sys
+import zlib
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils.timezone import localtime
+
+from apps.car.models import Car, CarTrace
+
+
+# Channel name, array typecode, max value. Order defines the payload layout.
+TRACE_CHANNELS: Tuple[Tuple[str, str, int], ...] = (
+    ("offset_ms", "I", 0xFFFFFFFF),
+    ("speed", "H", 0xFFFF),
+    ("rpm", "H", 0xFFFF),
+    ("throttle", "B", 0xFF),
+    ("brake", "B", 0xFF),
+    ("n_gear", "B", 0xFF),
+    ("drs", "B", 0xFF),
+)
+SAMPLE_FIELDS = ("date", "speed", "rpm", "throttle", "brake", "n_gear", "drs")
+
+_MAGIC = b"SVT"
+_VERSION = 1
+_HEADER = struct.Struct("<3sBI")
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def epoch_ms(value: datetime) -> int:
+    return (value - _EPOCH) // timedelta(milliseconds=1)
+
+
+def _clamp(value, upper: int) -> int:
+    value = int(value or 0)
+    return 0 if value < 0 else upper if value > upper else value
+
+
+@dataclass
+class TraceData:
+    start_date: datetime
+    offset_ms: array
+    speed: array
+    rpm: array
+    throttle: array
+    brake: array
+    n_gear: array
+    drs: array
+
+    def __len__(self) -> int:
+        return len(self.offset_ms)
+
+    @property
+    def start_ms(self) -> int:
+        return epoch_ms(self.start_date)
+
+    def epoch_ms(self) -> List[int]:
+        start = self.start_ms
+        return [start + offset for offset in self.offset_ms]
+
+    def dates(self) -> List[datetime]:
+        start = self.start_date
+        return [start + timedelta(milliseconds=offset) for offset in self.offset_ms]
+
+    def samples(self) -> Iterable[tuple]:
+        """Yield ``(date, speed, rpm, throttle, brake, n_gear, drs)`` tuples."""
+        return zip(
+            self.dates(),
+            self.speed,
+            self.rpm,
+            self.throttle,
+            self.brake,
+            self.n_gear,
+            self.drs,
+        )
+
+
+def pack_samples(samples: Sequence[tuple]) -> Tuple[datetime, datetime, bytes]:
+    """
+    Pack date-sorted ``SAMPLE_FIELDS`` tuples into a trace payload.
+
+    Dates are stored as millisecond offsets from the first sample.
+    Returns ``(start_date, end_date, payload)``.
+    """
+    if not samples:
+        raise ValueError("Cannot pack an empty trace.")
+    start_date = samples[0][0]
+    start_ms = epoch_ms(start_date)
+
+    columns = [array(typecode) for _, typecode, _ in TRACE_CHANNELS]
+    limits = [upper for _, _, upper in TRACE_CHANNELS]
+    for sample in samples:
+        columns[0].append(_clamp(epoch_ms(sample[0]) - start_ms, limits[0]))
+        for index in range(1, len(columns)):
+            columns[index].append(_clamp(sample[index], limits[index]))
+
+    if sys.byteorder == "big":
+        for column in columns:
+            column.byteswap()
+    body = b"".join(column.tobytes() for column in columns)
+    payload = _HEADER.pack(_MAGIC, _VERSION, len(samples)) + zlib.compress(body, 6)
+    return start_date, samples[-1][0], payload
+
+
+def unpack_trace(trace: CarTrace) -> TraceData:
+    payload = bytes(trace.payload)
+    magic, version, count = _HEADER.unpack_from(payload)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"Unsupported trace payload for {trace}.")
+    body = zlib.decompress(payload[_HEADER.size:])
+
+    columns: Dict[str, array] = {}
+    position = 0
+    for name, typecode, _ in TRACE_CHANNELS:
+        column = array(typecode)
+        size = column.itemsize * count
+        column.frombytes(body[position:position + size])
+        if sys.byteorder == "big":
+            column.byteswap()
+        columns[name] = column
+        position += size
+    return TraceData(start_date=trace.start_date, **columns)
+
+
+def pair_filter(pairs: Iterable[Tuple[int, int]]) -> Q:
+    query = Q()
+    for session_key, driver_number in pairs:
+        query |= Q(session_key=session_key, driver_number=driver_number)
+    return query
+
+
+def _merged_samples(
+    session_key: int,
+    driver_number: int,
+    existing: CarTrace | None,
+) -> Tuple[List[tuple], int | None]:
+    rows = list(
+        Car.objects.filter(
+            session_key=session_key, driver_number=driver_number, is_manual=False
+        )
+        .order_by("date")
+        .values_list(*SAMPLE_FIELDS)
+    )
+    meeting_key = (
+        Car.objects.filter(
+            session_key=session_key, driver_number=driver_number, is_manual=False
+        )
+        .values_list("meeting_key", flat=True)
+        .first()
+    )
+    if existing is not None:
+        merged = {epoch_ms(sample[0]): sample for sample in unpack_trace(existing).samples()}
+        merged.update((epoch_ms(row[0]), row) for row in rows)
+        rows = [merged[key] for key in sorted(merged)]
+        meeting_key = meeting_key or existing.meeting_key
+    return rows, meeting_key
+
+
+def pair_samples(session_key: int, driver_number: int) -> Tuple[List[tuple], int | None]:
+    """
+    Date-ordered ``SAMPLE_FIELDS`` tuples for one pair, combining its trace
+    with imported ``Car`` rows. Returns ``(samples, meeting_key)``.
+    """
+    existing = CarTrace.objects.filter(
+        session_key=session_key, driver_number=driver_number
+    ).first()
+    return _merged_samples(session_key, driver_number, existing)
+
+
+def build_trace(session_key: int, driver_number: int) -> CarTrace | None:
+    """
+    (Re)build the trace for one pair from its imported ``Car`` rows, keeping
+    samples already in an existing trace whose source rows were pruned.
+    """
+    existing = CarTrace.objects.filter(
+        session_key=session_key, driver_number=driver_number
+    ).first()
+    rows, meeting_key = _merged_samples(session_key, driver_number, existing)
+    if not rows:
+        return existing
+
+    start_date, end_date, payload = pack_samples(rows)
+    trace, _ = CarTrace.objects.update_or_create(
+        session_key=session_key,
+        driver_number=driver_number,
+        defaults={
+            "meeting_key": meeting_key,
+            "start_date": start_date,
+            "end_date": end_date,
+            "sample_count": len(rows),
+            "payload": payload,
+        },
+    )
+    return trace
+
+
+def compact_pairs(
+    pairs: Iterable[Tuple[int, int]],
+    *,
+    prune: bool = False,
+) -> Tuple[int, int]:
+    """
+    Build traces for ``(session_key, driver_number)`` pairs. With ``prune``
+    the imported ``Car`` rows that were folded into a trace are deleted.
+    Returns ``(traces, pruned_rows)``.
+    """
+    traces = pruned = 0
+    for session_key, driver_number in sorted(set(pairs)):
+        with transaction.atomic():
+            trace = build_trace(session_key, driver_number)
+            if trace is None:
+                continue
+            traces += 1
+            if prune:
+                deleted, _ = Car.objects.filter(
+                    session_key=session_key,
+                    driver_number=driver_number,
+                    is_manual=False,
+                ).delete()
+                pruned += deleted
+    return traces, pruned
+
+
+def refresh_existing_traces(pairs: Iterable[Tuple[int, int]]) -> int:
+    """Rebuild traces that already exist for freshly ingested pairs."""
+    pairs = set(pairs)
+    if not pairs:
+        return 0
+    existing = CarTrace.objects.filter(pair_filter(pairs)).values_list(
+        "session_key", "driver_number"
+    )
+    traces, _ = compact_pairs(existing)
+    return traces
+
+
+def _format_trace_sample(date: datetime, values: tuple) -> dict:
+    return {
+        "id": None,
+        "date": date.isoformat(),
+        "timestamp": localtime(date).strftime("%Y-%m-%d %H:%M:%S %Z"),
+        "speed": values[0],
+        "rpm": values[1],
+        "throttle": values[2],
+        "brake": values[3],
+        "gear": values[4],
+        "drs": values[5],
+    }
+
+
+def trace_group(
+    trace: CarTrace,
+    select: Callable[[TraceData], Iterable[int]] | None = None,
+) -> dict:
+    """
+    Row-oriented group payload matching ``_build_groups_from_samples``.
+    ``select`` may pick the sample indices to keep (e.g. for downsampling).
+    """
+    data = unpack_trace(trace)
+    indices = select(data) if select is not None else range(len(data))
+    start = data.start_date
+    telemetry = [
+        _format_trace_sample(
+            start + timedelta(milliseconds=data.offset_ms[i]),
+            (
+                data.speed[i],
+                data.rpm[i],
+                data.throttle[i],
+                data.brake[i],
+                data.n_gear[i],
+                data.drs[i],
+            ),
+        )
+        for i in indices
+    ]
+    return {
+        "session_key": trace.session_key,
+        "meeting_key": trace.meeting_key,
+        "driver_number": trace.driver_number,
+        "telemetry": telemetry,
+    }
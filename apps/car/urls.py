@@ -11,6 +11,14 @@ urlpatterns = [
     path("all/", views.all_cars_dashboard, name="list_page"),
     path("api/grouped/", views.api_grouped_car_data, name="api_grouped"),
     path("api/refresh/", views.api_refresh_car_data, name="api_refresh"),
+    path(
+        "api/refresh/<int:job_id>/",
+        views.api_refresh_status,
+        name="api_refresh_status",
+    ),
+    path("api/cache-stats/", views.api_cache_stats, name="api_cache_stats"),
+    path("api/session-stats/", views.api_session_stats, name="api_session_stats"),
+    path("api/rollups/", views.api_car_rollups, name="api_rollups"),
     path("add/", views.add_car, name="add_car"),
     path("<int:id>/", views.show_car, name="show_car"),
     path("<int:id>/edit/", views.edit_car, name="edit_car"),
@@ -28,6 +36,7 @@ urlpatterns = [
     ),
     path("xml/", views.show_xml, name="show_xml"),
     path("json/", views.show_json, name="show_json"),
+    path("export/", views.export_cars, name="export_cars"),
     path("xml/<int:car_id>/", views.show_xml_by_id, name="show_xml_by_id"),
     path("json/<int:car_id>/", views.show_json_by_id, name="show_json_by_id"),
 ]
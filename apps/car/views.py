@@ -2,69 +2,74 @@ import datetime
 import json
 from collections import defaultdict
 from functools import wraps
-from typing import Dict, Iterable, List, Sequence
-from urllib.error import HTTPError, URLError
-from urllib.request import urlopen
+from typing import Callable, Dict, Iterable, List, Sequence
+
+import numpy as np
+import requests
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
 from django.core import serializers
 from django.core.exceptions import PermissionDenied
-from django.db import transaction
-from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
+from django.db.models import Q
+from django.http import (
+    HttpResponse,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils.dateparse import parse_datetime
 from django.utils.timezone import localtime
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET, require_POST
+from apps.car.columnar import (
+    VALUE_FIELDS as COLUMNAR_VALUE_FIELDS,
+    group_from_openf1_rows,
+    group_from_trace,
+    groups_from_values,
+    merge_groups as merge_columnar_groups,
+)
+from apps.car.downsampling import (
+    ALGORITHMS,
+    DEFAULT_ALGORITHM,
+    MAX_POINTS,
+    MIN_POINTS,
+    select_indices,
+)
+from apps.car.exports import (
+    EXPORT_CONTENT_TYPES,
+    EXPORT_FORMATS,
+    gzip_stream,
+    iter_export,
+)
 from apps.car.forms import CarForm
-from apps.car.models import Car
+from apps.car.models import Car, CarSessionStats, CarTrace, RefreshJob
+from apps.car.pagination import InvalidCursor, keyset_page
+from apps.car.jobs import enqueue_refresh, requeue_stale_jobs, run_unclaimed_job, serialize_job, stale_after
+from apps.car.refresh import OPENF1_MIN_SPEED_FLOOR
+from apps.car.rollups import (
+    BUCKETS as ROLLUP_BUCKETS,
+    DEFAULT_BUCKET as ROLLUP_DEFAULT_BUCKET,
+    session_rollups,
+)
+from apps.car.stats import serialize_stats
+from apps.car.traces import epoch_ms, pair_filter, trace_group
 from apps.meeting.models import Meeting
+from apps.openf1.cache import TTLCache
+from apps.openf1.client import comparison_query, get_client
+from apps.openf1.ingest import clamp_batch_size
+from apps.openf1.proxy import OPENF1_PROXY_CACHE, handles_rate_limits
 from apps.session.models import Session
+from main.conditional import conditional_response, queryset_fingerprint
 
 
 import json
 from typing import List, Dict
 
-def _loads_json_array_best_effort(payload: bytes | str) -> List[Dict]:
-    if isinstance(payload, (bytes, bytearray)):
-        text = payload.decode("utf-8", errors="replace")
-    else:
-        text = payload
-
-    dec = json.JSONDecoder()
-    i = 0
-    n = len(text)
-
-    while i < n and text[i].isspace():
-        i += 1
-    if i >= n or text[i] != "[":
-        return []
-
-    i += 1  
-    out: List[Dict] = []
-
-    while i < n:
-        while i < n and text[i] in " \t\r\n,":
-            i += 1
-        if i >= n:
-            break
-        if text[i] == "]":
-            break  
-
-        try:
-            obj, j = dec.raw_decode(text, i)
-        except json.JSONDecodeError:
-            break
-
-        out.append(obj)
-        i = j
-
-    return out
-
-
 def admin_required(view_func):
     @wraps(view_func)
     def _wrapped(request, *args, **kwargs):
@@ -108,10 +113,43 @@ def _coerce_int_or_none(value) -> int | None:
         return None
 
 
-def _resolve_meeting_key_from_session(session_key: int | None) -> int | None:
-    if session_key is None:
-        return None
-    session_obj = Session.objects.filter(session_key=session_key).first()
+class SessionLookup:
+    """
+    Per-request ``Session`` cache for car endpoints. Missing keys are fetched
+    in a single query and misses are remembered, so serializing any number
+    of cars costs at most one Session query per batch of new keys.
+    """
+
+    def __init__(self, session_keys: Iterable[int | None] = ()):
+        self._sessions: dict[int, Session | None] = {}
+        self.prefetch(session_keys)
+
+    def prefetch(self, session_keys: Iterable[int | None]) -> None:
+        missing = {
+            key for key in session_keys if key is not None and key not in self._sessions
+        }
+        if not missing:
+            return
+        found = {
+            session.session_key: session
+            for session in Session.objects.filter(session_key__in=missing)
+        }
+        for key in missing:
+            self._sessions[key] = found.get(key)
+
+    def get(self, session_key: int | None) -> Session | None:
+        if session_key is None:
+            return None
+        if session_key not in self._sessions:
+            self.prefetch([session_key])
+        return self._sessions[session_key]
+
+
+def _resolve_meeting_key_from_session(
+    session_key: int | None,
+    sessions: SessionLookup | None = None,
+) -> int | None:
+    session_obj = (sessions or SessionLookup()).get(session_key)
     if session_obj and session_obj.meeting_key is not None:
         try:
             return int(session_obj.meeting_key)
@@ -124,13 +162,18 @@ def _collect_extra_meeting_keys(
     data,
     *,
     existing_car: Car | None = None,
+    sessions: SessionLookup | None = None,
 ) -> list[int]:
     keys: list[int] = []
     meeting_value = _coerce_int_or_none(data.get("meeting_key"))
     session_value = _coerce_int_or_none(data.get("session_key"))
+    sessions = sessions or SessionLookup()
+    sessions.prefetch(
+        [session_value, existing_car.session_key if existing_car is not None else None]
+    )
     if meeting_value is not None:
         keys.append(meeting_value)
-    linked_from_session = _resolve_meeting_key_from_session(session_value)
+    linked_from_session = _resolve_meeting_key_from_session(session_value, sessions)
     if linked_from_session is not None:
         keys.append(linked_from_session)
 
@@ -139,7 +182,7 @@ def _collect_extra_meeting_keys(
             keys.append(int(existing_car.meeting_key))
         if existing_car.session_key is not None:
             linked_existing = _resolve_meeting_key_from_session(
-                existing_car.session_key
+                existing_car.session_key, sessions
             )
             if linked_existing is not None:
                 keys.append(linked_existing)
@@ -148,16 +191,20 @@ def _collect_extra_meeting_keys(
     return deduped
 
 
-def _meeting_choices_for_payload(data, *, existing_car: Car | None = None):
-    extra_keys = _collect_extra_meeting_keys(data, existing_car=existing_car)
+def _meeting_choices_for_payload(
+    data,
+    *,
+    existing_car: Car | None = None,
+    sessions: SessionLookup | None = None,
+):
+    extra_keys = _collect_extra_meeting_keys(
+        data, existing_car=existing_car, sessions=sessions
+    )
     meeting_choices = _fetch_meeting_choices(extra_keys=extra_keys or None)
     return meeting_choices
 
 
-def _compute_session_offset_seconds(car: Car) -> int | None:
-    session_obj = getattr(car, "session_obj", None)
-    if session_obj is None and car.session_key is not None:
-        session_obj = Session.objects.filter(session_key=car.session_key).first()
+def _compute_session_offset_seconds(car: Car, session_obj: Session | None) -> int | None:
     if not session_obj or not session_obj.start_time or not car.date:
         return None
     delta = car.date - session_obj.start_time
@@ -241,7 +288,8 @@ def show_car(request, id):
 @require_POST
 @csrf_exempt
 def add_car_entry_ajax(request):
-    meeting_choices = _meeting_choices_for_payload(request.POST)
+    sessions = SessionLookup()
+    meeting_choices = _meeting_choices_for_payload(request.POST, sessions=sessions)
     form = CarForm(request.POST, meeting_choices=meeting_choices)
     if not form.is_valid():
         return JsonResponse({"success": False, "errors": form.errors}, status=400)
@@ -252,7 +300,7 @@ def add_car_entry_ajax(request):
         {
             "success": True,
             "message": "Car telemetry entry created successfully.",
-            "car": serialize_car(car),
+            "car": serialize_car(car, sessions),
         },
         status=201,
     )
@@ -263,7 +311,10 @@ def add_car_entry_ajax(request):
 @csrf_exempt
 def update_car_entry_ajax(request, car_id: int):
     car = get_object_or_404(Car, pk=car_id, is_manual=True)
-    meeting_choices = _meeting_choices_for_payload(request.POST, existing_car=car)
+    sessions = SessionLookup()
+    meeting_choices = _meeting_choices_for_payload(
+        request.POST, existing_car=car, sessions=sessions
+    )
     form = CarForm(request.POST, instance=car, meeting_choices=meeting_choices)
     if not form.is_valid():
         return JsonResponse({"success": False, "errors": form.errors}, status=400)
@@ -274,7 +325,7 @@ def update_car_entry_ajax(request, car_id: int):
         {
             "success": True,
             "message": "Car telemetry entry updated successfully.",
-            "car": serialize_car(updated_car),
+            "car": serialize_car(updated_car, sessions),
         }
     )
 
@@ -294,25 +345,11 @@ def delete_car_entry_ajax(request, car_id: int):
     )
 
 
-@login_required(login_url="/login")
-def show_xml(request):
-    car_list = Car.objects.all()
-    xml_data = serializers.serialize("xml", car_list)
-    return HttpResponse(xml_data, content_type="application/xml")
-
-
-@login_required(login_url="/login")
-def show_json(request):
-    try:
-        limit = int(request.GET.get("limit", 500))
-    except (TypeError, ValueError):
-        limit = 500
-    limit = max(1, min(limit, 2000))
-
+def _car_list_filters(params) -> dict[str, object]:
     filters: dict[str, object] = {}
-    meeting_key = _coerce_int_or_none(request.GET.get("meeting_key"))
-    session_key = _coerce_int_or_none(request.GET.get("session_key"))
-    driver_number = _coerce_int_or_none(request.GET.get("driver_number"))
+    meeting_key = _coerce_int_or_none(params.get("meeting_key"))
+    session_key = _coerce_int_or_none(params.get("session_key"))
+    driver_number = _coerce_int_or_none(params.get("driver_number"))
 
     if meeting_key is not None:
         filters["meeting_key"] = meeting_key
@@ -321,20 +358,77 @@ def show_json(request):
     if driver_number is not None:
         filters["driver_number"] = driver_number
 
-    is_manual = request.GET.get("is_manual")
+    is_manual = params.get("is_manual")
     if isinstance(is_manual, str) and is_manual.lower() in {"1", "true", "yes"}:
         filters["is_manual"] = True
     elif isinstance(is_manual, str) and is_manual.lower() in {"0", "false", "no"}:
         filters["is_manual"] = False
+    return filters
 
+
+def _filtered_cars(params):
     queryset = Car.objects.all()
+    filters = _car_list_filters(params)
     if filters:
         queryset = queryset.filter(**filters)
+    return queryset
+
+
+def _streaming_export(queryset, fmt: str, *, compress: bool, filename: str | None = None):
+    parts = iter_export(queryset.order_by("pk"), fmt)
+    content_type = EXPORT_CONTENT_TYPES[fmt]
+    if compress:
+        response = StreamingHttpResponse(gzip_stream(parts), content_type="application/gzip")
+        filename = f"{filename or 'cars'}.{fmt}.gz"
+    else:
+        response = StreamingHttpResponse(parts, content_type=f"{content_type}; charset=utf-8")
+        if filename:
+            filename = f"{filename}.{fmt}"
+    if filename:
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _wants_gzip(request) -> bool:
+    return str(request.GET.get("gzip", "")).lower() in {"1", "true", "yes"}
+
+
+@login_required(login_url="/login")
+def show_xml(request):
+    return _streaming_export(
+        _filtered_cars(request.GET), "xml", compress=_wants_gzip(request)
+    )
+
+
+@login_required(login_url="/login")
+@require_GET
+def export_cars(request):
+    fmt = (request.GET.get("format") or "jsonl").lower()
+    if fmt not in EXPORT_FORMATS:
+        return JsonResponse(
+            {
+                "ok": False,
+                "error": f"format must be one of: {', '.join(EXPORT_FORMATS)}",
+            },
+            status=400,
+        )
+    return _streaming_export(
+        _filtered_cars(request.GET),
+        fmt,
+        compress=_wants_gzip(request),
+        filename="cars",
+    )
 
-    car_list = list(queryset.order_by("-date")[:limit])
-    _attach_session_metadata(car_list)
-    data = [serialize_car(car) for car in car_list]
-    return JsonResponse(data, safe=False)
+
+@login_required(login_url="/login")
+def show_json(request):
+    try:
+        limit = int(request.GET.get("limit", 500))
+    except (TypeError, ValueError):
+        limit = 500
+    limit = max(1, min(limit, 2000))
+
+    return _paginated_car_response(request, _filtered_cars(request.GET), limit)
 
 
 @login_required(login_url="/login")
@@ -354,38 +448,42 @@ def show_json_by_id(request, car_id):
 
 def all_cars_dashboard(request):
     return render(request, "all_cars.html")
-# apps/car/views.py
+# Live fallback for driver/session pairs that are not imported yet.
+# Raw OpenF1 rows cost roughly 1 KB each as Python dicts and a full race is
+# ~30k rows per driver, so the cache is bounded by rows, not just entries.
+OPENF1_TRIPLET_MAX_ROWS = 250_000
+OPENF1_TRIPLET_CACHE = TTLCache(
+    ttl=300,
+    max_entries=64,
+    max_weight=OPENF1_TRIPLET_MAX_ROWS,
+    name="openf1_car_data_fallback",
+)
 
-from urllib.request import urlopen
-from urllib.error import HTTPError, URLError
-
-OPENF1_CAR_DATA_URL = "https://api.openf1.org/v1/car_data"
 
 def _fetch_openf1_triplet(driver_number: int, session_key: int, min_speed: int | None = None) -> list[dict]:
-    # Bangun URL manual supaya '>' tidak di-encode (hindari params urlencode)
-    url = f"{OPENF1_CAR_DATA_URL}?driver_number={driver_number}&session_key={session_key}"
-    if min_speed is not None:
-        url += f"&speed>={int(min_speed)}"  # '>' tetap '>' (bukan %3E)
-
+    key = (driver_number, session_key, min_speed)
     try:
-        with urlopen(url, timeout=15) as resp:
-            payload = resp.read()
-    except HTTPError as exc:
-        if exc.code == 422:
-            return []
+        return OPENF1_TRIPLET_CACHE.get_or_load(
+            key, lambda: _download_openf1_triplet(driver_number, session_key, min_speed)
+        )
+    except requests.HTTPError:
         raise
-    except URLError:
+    except requests.RequestException:
+        # Network failures are not cached so the next request retries.
         return []
 
-    # parsing "best effort" seperti util yang sudah ada
+
+def _download_openf1_triplet(driver_number: int, session_key: int, min_speed: int | None = None) -> list[dict]:
+    comparisons = [("speed", ">=", int(min_speed))] if min_speed is not None else []
+    query = comparison_query(
+        {"driver_number": driver_number, "session_key": session_key}, *comparisons
+    )
     try:
-        data = json.loads(payload)
-        if not isinstance(data, list):
+        return list(get_client().iter_rows("car_data", query, timeout=(5.0, 15.0)))
+    except requests.HTTPError as exc:
+        if exc.response is not None and exc.response.status_code == 422:
             return []
-    except json.JSONDecodeError:
-        data = _loads_json_array_best_effort(payload)
-
-    return data if isinstance(data, list) else []
+        raise
 
 
 def _serialize_car_sample_for_group(sample: Car) -> dict:
@@ -403,7 +501,10 @@ def _serialize_car_sample_for_group(sample: Car) -> dict:
     }
 
 
-def _build_groups_from_samples(samples: List[Car]) -> List[Dict]:
+def _build_groups_from_samples(
+    samples: List[Car],
+    reduce: Callable[[List[Car]], List[Car]] | None = None,
+) -> List[Dict]:
     groups: List[Dict] = []
     current_key: tuple | None = None
     current_group: Dict | None = None
@@ -420,12 +521,212 @@ def _build_groups_from_samples(samples: List[Car]) -> List[Dict]:
             }
             groups.append(current_group)
 
-        current_group["telemetry"].append(_serialize_car_sample_for_group(sample))
+        current_group["telemetry"].append(sample)
+
+    for group in groups:
+        group_samples = group["telemetry"]
+        if reduce is not None:
+            group_samples = reduce(group_samples)
+        group["telemetry"] = [
+            _serialize_car_sample_for_group(sample) for sample in group_samples
+        ]
 
     return groups
 
 
+def _downsample(
+    items: list,
+    max_points: int | None,
+    algorithm: str,
+    x_of: Callable,
+    y_of: Callable,
+) -> list:
+    if max_points is None or len(items) <= max_points:
+        return items
+    count = len(items)
+    x = np.fromiter((x_of(item) for item in items), dtype=np.float64, count=count)
+    y = np.fromiter((y_of(item) or 0 for item in items), dtype=np.float64, count=count)
+    return [items[i] for i in select_indices(x, y, max_points, algorithm)]
+
+
+def _row_epoch_seconds(row: dict) -> float:
+    parsed = parse_datetime(row.get("date") or "")
+    return parsed.timestamp() if parsed else 0.0
+
+
+def _merge_groups(groups: List[Dict]) -> List[Dict]:
+    merged: Dict[tuple, Dict] = {}
+    unsorted: set[tuple] = set()
+    for group in groups:
+        key = (group["driver_number"], group["session_key"], group["meeting_key"])
+        if key in merged:
+            merged[key]["telemetry"].extend(group["telemetry"])
+            unsorted.add(key)
+        else:
+            merged[key] = group
+    for key in unsorted:
+        merged[key]["telemetry"].sort(key=lambda sample: sample["date"] or "")
+    return [
+        merged[key]
+        for key in sorted(merged, key=lambda k: (k[0], k[1] or 0, k[2] or 0))
+    ]
+
+
+def _fetch_fallback_rows(
+    driver_number: int,
+    session_key: int,
+    meeting_key: int | None,
+    min_speed: int | None,
+) -> tuple[List[Dict], int | None]:
+    raw = _fetch_openf1_triplet(
+        driver_number=driver_number,
+        session_key=session_key,
+        min_speed=min_speed,
+    )
+    rows = [
+        r
+        for r in raw
+        if r.get("session_key") == session_key and r.get("driver_number") == driver_number
+    ]
+
+    mk = meeting_key
+    if raw:
+        try:
+            mk = int(raw[0].get("meeting_key"))
+        except (TypeError, ValueError):
+            mk = meeting_key
+    return rows, mk
+
+
+def _grouped_columnar_payload(queryset, traces, select, fallback=None) -> List[Dict]:
+    rows = list(queryset.values_list(*COLUMNAR_VALUE_FIELDS))
+    if rows or traces:
+        return merge_columnar_groups(
+            groups_from_values(rows, select)
+            + [group_from_trace(trace, select) for trace in traces]
+        )
+    if fallback is None:
+        return []
+    driver_number, session_key, meeting_key, min_speed = fallback
+    raw, mk = _fetch_fallback_rows(driver_number, session_key, meeting_key, min_speed)
+    return [group_from_openf1_rows(raw, driver_number, session_key, mk, select)]
+
+
+def _parse_offset(value) -> float | None:
+    """Seconds since session start; raises ValueError for junk."""
+    if value in (None, ""):
+        return None
+    offset = float(value)
+    if not np.isfinite(offset):
+        raise ValueError(value)
+    return offset
+
+
+def _window_indices(timestamps: np.ndarray, window) -> np.ndarray:
+    """Indices of time-sorted epoch-ms ``timestamps`` inside ``(lo, hi)``."""
+    if window is None:
+        return np.arange(len(timestamps))
+    lo, hi = window
+    start = np.searchsorted(timestamps, lo, side="left") if lo is not None else 0
+    end = np.searchsorted(timestamps, hi, side="right") if hi is not None else len(timestamps)
+    return np.arange(start, end)
+
+
+def _rows_in_window(rows: List[dict], window) -> List[dict]:
+    lo, hi = window
+    kept = []
+    for row in rows:
+        at = _row_epoch_seconds(row) * 1000
+        if (lo is None or at >= lo) and (hi is None or at <= hi):
+            kept.append(row)
+    return kept
+
+
+@require_GET
+def api_cache_stats(request):
+    return JsonResponse({"ok": True, "caches": [OPENF1_TRIPLET_CACHE.stats(), OPENF1_PROXY_CACHE.stats()]})
+
+
+@require_GET
+def api_session_stats(request):
+    filters: dict[str, int] = {}
+    for field in ("meeting_key", "session_key", "driver_number"):
+        raw = request.GET.get(field)
+        if raw in (None, ""):
+            continue
+        value = _coerce_int_or_none(raw)
+        if value is None:
+            return JsonResponse(
+                {"ok": False, "error": f"{field} must be an integer."}, status=400
+            )
+        filters[field] = value
+    if "meeting_key" not in filters and "session_key" not in filters:
+        return JsonResponse(
+            {"ok": False, "error": "meeting_key or session_key is required."},
+            status=400,
+        )
+
+    rows = CarSessionStats.objects.filter(**filters).order_by(
+        "session_key", "driver_number"
+    )
+    return JsonResponse({"ok": True, "stats": [serialize_stats(row) for row in rows]})
+
+
+@require_GET
+def api_car_rollups(request):
+    session_key = _coerce_int_or_none(request.GET.get("session_key"))
+    if session_key is None:
+        return JsonResponse(
+            {"ok": False, "error": "session_key must be an integer."}, status=400
+        )
+    driver_number = _coerce_int_or_none(request.GET.get("driver_number"))
+    bucket = request.GET.get("bucket") or ROLLUP_DEFAULT_BUCKET
+    if bucket not in ROLLUP_BUCKETS:
+        return JsonResponse(
+            {
+                "ok": False,
+                "error": f"bucket must be one of: {', '.join(ROLLUP_BUCKETS)}",
+            },
+            status=400,
+        )
+
+    return JsonResponse(
+        {
+            "ok": True,
+            "session_key": session_key,
+            "bucket": bucket,
+            "bucket_ms": ROLLUP_BUCKETS[bucket],
+            "drivers": session_rollups(
+                session_key, ROLLUP_BUCKETS[bucket], driver_number
+            ),
+        }
+    )
+
+
+def _grouped_car_fingerprint(request):
+    filters: Dict[str, int] = {}
+    for field in ("meeting_key", "session_key", "driver_number"):
+        raw = request.GET.get(field)
+        if raw is None:
+            continue
+        value = _coerce_int_or_none(raw)
+        if value is None:
+            return None
+        filters[field] = value
+    if not filters:
+        return None
+    fingerprint = queryset_fingerprint(
+        Car.objects.filter(**filters), CarTrace.objects.filter(**filters)
+    )
+    if all(rows == 0 for _, rows, _ in fingerprint.parts):
+        # Served from the live OpenF1 fallback, which has no local fingerprint.
+        return None
+    return fingerprint
+
+
 @require_GET
+@conditional_response(_grouped_car_fingerprint)
+@handles_rate_limits
 def api_grouped_car_data(request):
     metric = request.GET.get("metric", "speed")
     allowed_metrics = {"speed", "rpm", "throttle"}
@@ -445,6 +746,92 @@ def api_grouped_car_data(request):
     except (TypeError, ValueError):
         return JsonResponse({"ok": False, "error": "Invalid query params."}, status=400)
 
+    response_format = request.GET.get("format") or "rows"
+    if response_format not in {"rows", "columnar"}:
+        return JsonResponse(
+            {"ok": False, "error": "format must be 'rows' or 'columnar'."},
+            status=400,
+        )
+
+    max_points_raw = request.GET.get("max_points")
+    algorithm = request.GET.get("algorithm") or DEFAULT_ALGORITHM
+    if algorithm not in ALGORITHMS:
+        return JsonResponse(
+            {"ok": False, "error": f"algorithm must be one of: {', '.join(ALGORITHMS)}."},
+            status=400,
+        )
+    try:
+        max_points = int(max_points_raw) if max_points_raw not in (None, "") else None
+    except (TypeError, ValueError):
+        return JsonResponse({"ok": False, "error": "Invalid query params."}, status=400)
+    if max_points is not None:
+        max_points = max(MIN_POINTS, min(max_points, MAX_POINTS))
+
+    try:
+        from_offset = _parse_offset(request.GET.get("from_offset"))
+        to_offset = _parse_offset(request.GET.get("to_offset"))
+    except ValueError:
+        return JsonResponse(
+            {"ok": False, "error": "from_offset/to_offset must be seconds."},
+            status=400,
+        )
+    window = None
+    date_range: Dict[str, datetime.datetime] = {}
+    if from_offset is not None or to_offset is not None:
+        session_obj = (
+            SessionLookup().get(session_key_int) if session_key_int is not None else None
+        )
+        if session_obj is None or session_obj.start_time is None:
+            return JsonResponse(
+                {
+                    "ok": False,
+                    "error": "from_offset/to_offset need a session_key with a known start time.",
+                },
+                status=400,
+            )
+        if from_offset is not None:
+            date_range["date__gte"] = session_obj.start_time + datetime.timedelta(
+                seconds=from_offset
+            )
+        if to_offset is not None:
+            date_range["date__lte"] = session_obj.start_time + datetime.timedelta(
+                seconds=to_offset
+            )
+        window = (
+            epoch_ms(date_range["date__gte"]) if "date__gte" in date_range else None,
+            epoch_ms(date_range["date__lte"]) if "date__lte" in date_range else None,
+        )
+
+    def select(timestamps, values) -> Iterable[int]:
+        keep = _window_indices(timestamps, window)
+        if max_points is None or len(keep) <= max_points:
+            return keep
+        return keep[select_indices(timestamps[keep], values[keep], max_points, algorithm)]
+
+    def reduce_cars(samples: List[Car]) -> List[Car]:
+        return _downsample(
+            samples,
+            max_points,
+            algorithm,
+            lambda car: car.date.timestamp(),
+            lambda car: getattr(car, metric),
+        )
+
+    def select_trace(data) -> Iterable[int]:
+        if max_points is None and window is None:
+            return range(len(data))
+        column = getattr(data, metric)
+        offsets = np.frombuffer(data.offset_ms, dtype=data.offset_ms.typecode)
+        return select(
+            offsets.astype(np.int64) + data.start_ms,
+            np.frombuffer(column, dtype=column.typecode),
+        )
+
+    def select_columns(timestamps, columns) -> Iterable[int]:
+        if max_points is None and window is None:
+            return range(len(timestamps))
+        return select(timestamps, columns[metric])
+
     has_driver_session = (
         driver_number_int is not None and session_key_int is not None
     )
@@ -466,21 +853,61 @@ def api_grouped_car_data(request):
     if driver_number_int is not None:
         filters["driver_number"] = driver_number_int
 
-    queryset = (
-        Car.objects.filter(**filters)
-        .order_by("driver_number", "session_key", "date")
-    )
+    # Imported telemetry that has been compacted is served from CarTrace;
+    # manual entries (and anything not compacted yet) still come from Car.
+    trace_qs = CarTrace.objects.filter(**filters)
+    if "date__gte" in date_range:
+        trace_qs = trace_qs.filter(end_date__gte=date_range["date__gte"])
+    if "date__lte" in date_range:
+        trace_qs = trace_qs.filter(start_date__lte=date_range["date__lte"])
+    traces = list(trace_qs.order_by("driver_number", "session_key"))
+    queryset = Car.objects.filter(**filters, **date_range)
+    if traces:
+        compacted = pair_filter((t.session_key, t.driver_number) for t in traces)
+        queryset = queryset.exclude(compacted & Q(is_manual=False))
+    queryset = queryset.order_by("driver_number", "session_key", "date")
+
+    if response_format == "columnar":
+        groups_payload = _grouped_columnar_payload(
+            queryset,
+            traces,
+            select_columns,
+            fallback=(
+                (driver_number_int, session_key_int, meeting_key_int, min_speed_int)
+                if has_driver_session
+                else None
+            ),
+        )
+
+        return JsonResponse(
+            {
+                "ok": True,
+                "format": "columnar",
+                "from_offset": from_offset,
+                "to_offset": to_offset,
+                "metric": metric,
+                "metric_options": sorted(list(allowed_metrics)),
+                "max_points": max_points,
+                "algorithm": algorithm if max_points is not None else None,
+                "groups": groups_payload,
+            }
+        )
 
     samples_db = list(queryset)
 
-    if samples_db:
-        groups_payload = _build_groups_from_samples(samples_db)
+    if traces:
+        groups_payload = _merge_groups(
+            _build_groups_from_samples(samples_db, reduce_cars)
+            + [trace_group(trace, select_trace) for trace in traces]
+        )
+    elif samples_db:
+        groups_payload = _build_groups_from_samples(samples_db, reduce_cars)
     elif has_driver_session:
-        raw = _fetch_openf1_triplet(
-            driver_number=driver_number_int,
-            session_key=session_key_int,
-            min_speed=min_speed_int,  
+        raw, mk = _fetch_fallback_rows(
+            driver_number_int, session_key_int, meeting_key_int, min_speed_int
         )
+        if window is not None:
+            raw = _rows_in_window(raw, window)
 
         telemetry_rows = [
             {
@@ -494,17 +921,15 @@ def api_grouped_car_data(request):
                 "gear": r.get("n_gear"),
                 "drs": r.get("drs"),
             }
-            for r in raw
-            if r.get("session_key") == session_key_int and r.get("driver_number") == driver_number_int
+            for r in _downsample(
+                raw,
+                max_points,
+                algorithm,
+                _row_epoch_seconds,
+                lambda row: row.get(metric),
+            )
         ]
 
-        mk = meeting_key_int
-        if raw:
-            try:
-                mk = int(raw[0].get("meeting_key"))
-            except (TypeError, ValueError):
-                mk = meeting_key_int
-
         groups_payload = [{
             "session_key": session_key_int,
             "meeting_key": mk,
@@ -517,16 +942,18 @@ def api_grouped_car_data(request):
     return JsonResponse(
         {
             "ok": True,
+            "from_offset": from_offset,
+            "to_offset": to_offset,
             "metric": metric,
             "metric_options": sorted(list(allowed_metrics)),
+            "max_points": max_points,
+            "algorithm": algorithm if max_points is not None else None,
             "groups": groups_payload,
         }
     )
 
 
 
-OPENF1_CAR_DATA_URL = "https://api.openf1.org/v1/car_data"
-OPENF1_MIN_SPEED_FLOOR = 310
 
 
 def _fetch_meeting_choices(extra_keys: Sequence[int] | None = None) -> list[tuple[int, str]]:
@@ -561,28 +988,6 @@ def _fetch_meeting_choices(extra_keys: Sequence[int] | None = None) -> list[tupl
     return choices
 
 
-def _fetch_openf1_telemetry(meeting_key: int, min_speed: int) -> List[Dict]:
-    url = f"{OPENF1_CAR_DATA_URL}?meeting_key={meeting_key}&speed>={min_speed}"
-    try:
-        with urlopen(url) as response:
-            payload = response.read()
-    except HTTPError as exc:
-        if exc.code == 422:
-            return []
-        raise
-
-    try:
-        data = json.loads(payload)
-        if not isinstance(data, list):
-            return []
-    except json.JSONDecodeError:
-        data = _loads_json_array_best_effort(payload)
-
-    if not isinstance(data, list):
-        return []
-    return data
-
-
 @require_POST
 def api_refresh_car_data(request):
     try:
@@ -615,97 +1020,48 @@ def api_refresh_car_data(request):
             status=400,
         )
 
-    try:
-        dataset = _fetch_openf1_telemetry(meeting_key, min_speed)
-    except (HTTPError, URLError) as exc:
-        return JsonResponse(
-            {"ok": False, "error": f"Failed to retrieve telemetry: {exc}"},
-            status=502,
-        )
-
-    dataset = [
-        entry
-        for entry in dataset
-        if entry.get("speed") is not None
-        and (max_speed_int is None or entry["speed"] <= max_speed_int)
-    ]
-
-    meeting_cache: set[int] = set()
-    session_cache: dict[int, Session] = {}
-
-    with transaction.atomic():
-        deleted_count, _ = Car.objects.filter(
-            is_manual=False, meeting_key=meeting_key
-        ).delete()
-        created = 0
-        for entry in dataset:
-            try:
-                mk = int(entry["meeting_key"])
-                sk = int(entry["session_key"])
-            except (KeyError, TypeError, ValueError):
-                continue
-
-            if mk not in meeting_cache:
-                Meeting.objects.get_or_create(meeting_key=mk)
-                meeting_cache.add(mk)
-
-            session_obj = session_cache.get(sk)
-            if session_obj is None:
-                session_obj, _ = Session.objects.get_or_create(
-                    session_key=sk,
-                    defaults={"meeting_key": mk},
-                )
-            elif session_obj.meeting_key != mk:
-                session_obj.meeting_key = mk
-                session_obj.save(update_fields=["meeting_key"])
-            session_cache[sk] = session_obj
-
-            driver_number = entry.get("driver_number")
-            try:
-                driver_number = int(driver_number) if driver_number is not None else None
-            except (TypeError, ValueError):
-                driver_number = None
-
-            if driver_number is None:
-                continue
-
-            Car.objects.create(
-                driver_number=driver_number,
-                session_key=sk,
-                meeting_key=mk,
-                date=parse_datetime(entry.get("date")),
-                brake=entry.get("brake", 0),
-                drs=entry.get("drs", 0),
-                n_gear=entry.get("n_gear", 0),
-                rpm=entry.get("rpm", 0),
-                speed=entry.get("speed", 0),
-                throttle=entry.get("throttle", 0),
-                is_manual=False,
-            )
-            created += 1
-
+    batch_size = clamp_batch_size(body.get("batch_size"))
+    job, created = enqueue_refresh(
+        meeting_key,
+        min_speed=min_speed,
+        max_speed=max_speed_int,
+        batch_size=batch_size,
+        full=bool(body.get("full")),
+    )
     return JsonResponse(
         {
             "ok": True,
-            "meeting_key": meeting_key,
-            "min_speed": min_speed,
-            "max_speed": max_speed_int,
-            "created": created,
-            "deleted": deleted_count,
-        }
+            "deduplicated": not created,
+            "status_url": reverse("car:api_refresh_status", args=[job.id]),
+            "job": serialize_job(job),
+        },
+        status=202,
     )
 
+
+@require_GET
+def api_refresh_status(request, job_id: int):
+    requeue_stale_jobs(stale_after())
+    job = RefreshJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({"ok": False, "error": "Refresh job not found."}, status=404)
+    fallback = settings.REFRESH_INLINE_FALLBACK_SECONDS
+    if fallback > 0 and run_unclaimed_job(job, queued_for=datetime.timedelta(seconds=fallback)):
+        job.refresh_from_db()
+    return JsonResponse({"ok": True, "job": serialize_job(job)})
+
+
 @admin_required
 def edit_car(request, id):
     car = get_object_or_404(Car, pk=id)
 
+    sessions = SessionLookup()
     extra_keys: list[int] = []
     if car.meeting_key is not None:
         extra_keys.append(car.meeting_key)
-    if car.session_key is not None:
-        session_obj = Session.objects.filter(session_key=car.session_key).first()
-        if session_obj and session_obj.meeting_key is not None:
-            extra_keys.append(session_obj.meeting_key)
+    linked_meeting_key = _resolve_meeting_key_from_session(car.session_key, sessions)
+    if linked_meeting_key is not None:
+        extra_keys.append(linked_meeting_key)
     meeting_choices = _fetch_meeting_choices(extra_keys=extra_keys)
     meeting_keys = [choice[0] for choice in meeting_choices]
     form = CarForm(request.POST or None, instance=car, meeting_choices=meeting_choices)
@@ -717,7 +1073,7 @@ def edit_car(request, id):
             payload = {
                 "success": True,
                 "message": "Car telemetry updated.",
-                "car": serialize_car(updated_car),
+                "car": serialize_car(updated_car, sessions),
             }
             if is_ajax:
                 return JsonResponse(payload)
@@ -762,16 +1118,12 @@ def delete_car(request, id):
             {"success": False, "message": "Unsupported method."}, status=405
         )
 
-    session_obj = None
-    if car.session_key is not None:
-        session_obj = Session.objects.filter(session_key=car.session_key).first()
-
     return render(
         request,
         "car_confirm_delete.html",
         {
             "car": car,
-            "session": session_obj,
+            "session": SessionLookup().get(car.session_key),
         },
     )
 
@@ -793,20 +1145,15 @@ def manual_list(request):
     )
 
 
-def _attach_session_metadata(cars: list[Car]) -> None:
-    session_keys = {
-        car.session_key
-        for car in cars
-        if getattr(car, "session_key", None) is not None
-    }
-    if not session_keys:
-        return
-    session_map = {
-        session.session_key: session
-        for session in Session.objects.filter(session_key__in=session_keys)
-    }
+def _attach_session_metadata(
+    cars: list[Car],
+    sessions: SessionLookup | None = None,
+) -> SessionLookup:
+    sessions = sessions or SessionLookup()
+    sessions.prefetch(car.session_key for car in cars)
     for car in cars:
-        car.session_obj = session_map.get(car.session_key)
+        car.session_obj = sessions.get(car.session_key)
+    return sessions
 
 
 @login_required(login_url="/login")
@@ -817,21 +1164,50 @@ def manual_json(request):
         limit = 200
     limit = max(1, min(limit, 500))
 
-    manual_entries_qs = (
-        Car.objects.filter(is_manual=True)
-        .order_by("-date")
-        [:limit]
+    return _paginated_car_response(
+        request, Car.objects.filter(is_manual=True), limit
     )
-    manual_entries = list(manual_entries_qs)
-    _attach_session_metadata(manual_entries)
-    data = [serialize_car(car) for car in manual_entries]
-    return JsonResponse(data, safe=False)
 
 
-def serialize_car(car: Car) -> dict:
-    session_obj = getattr(car, "session_obj", None)
-    if session_obj is None and car.session_key is not None:
-        session_obj = Session.objects.filter(session_key=car.session_key).first()
+def _paginated_car_response(request, queryset, limit: int) -> JsonResponse:
+    """
+    Serialize one keyset page. The body stays a plain list for existing
+    clients; the next page's cursor is returned in ``X-Next-Cursor`` and a
+    ``Link: rel="next"`` header.
+    """
+    try:
+        car_list, next_cursor = keyset_page(
+            queryset, limit, request.GET.get("cursor") or None
+        )
+    except InvalidCursor as exc:
+        return JsonResponse({"ok": False, "error": str(exc)}, status=400)
+
+    response = JsonResponse(serialize_cars(car_list), safe=False)
+    if next_cursor:
+        params = request.GET.copy()
+        params["cursor"] = next_cursor
+        next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+        response["X-Next-Cursor"] = next_cursor
+        response["Link"] = f'<{next_url}>; rel="next"'
+    return response
+
+
+def serialize_cars(
+    cars: Sequence[Car],
+    sessions: SessionLookup | None = None,
+) -> list[dict]:
+    """Serialize a list of cars with one Session query for the whole batch."""
+    sessions = _attach_session_metadata(list(cars), sessions)
+    return [serialize_car(car, sessions) for car in cars]
+
+
+def serialize_car(car: Car, sessions: SessionLookup | None = None) -> dict:
+    if sessions is not None:
+        session_obj = sessions.get(car.session_key)
+    elif hasattr(car, "session_obj"):
+        session_obj = car.session_obj
+    else:
+        session_obj = SessionLookup().get(car.session_key)
 
     return {
         "id": str(car.id),
@@ -845,7 +1221,7 @@ def serialize_car(car: Car) -> dict:
         "rpm": car.rpm,
         "session_key": car.session_key,
         "session_name": session_obj.name if session_obj else None,
-        "session_offset_seconds": _compute_session_offset_seconds(car),
+        "session_offset_seconds": _compute_session_offset_seconds(car, session_obj),
         "is_manual": car.is_manual,
         "speed": car.speed,
         "throttle": car.throttle,
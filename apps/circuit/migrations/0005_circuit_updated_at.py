@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 10:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('circuit', '0004_remove_circuit_last_used'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='circuit',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+    ]
@@ -5,6 +5,7 @@ from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_GET, require_POST
 from django.views.decorators.csrf import csrf_protect, csrf_exempt
 from django.urls import reverse
+from main.conditional import conditional_response, queryset_fingerprint
 from .models import Circuit
 from .forms import CircuitForm
 import traceback
@@ -77,7 +78,13 @@ def edit_circuit_page(request, pk):
 
 
 # ================== API Views ==================
+def _circuit_list_fingerprint(request):
+    # The payload carries the caller's is_admin flag, so it is part of the ETag.
+    return queryset_fingerprint(Circuit.objects.all(), extra=(is_admin(request),))
+
+
 @require_GET
+@conditional_response(_circuit_list_fingerprint)
 def api_circuit_list(request):
     """Endpoint API untuk mendapatkan daftar sirkuit."""
     try:
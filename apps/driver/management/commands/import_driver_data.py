@@ -1,26 +1,15 @@
-import json
 import time
-import ssl
-from json import JSONDecodeError
 from typing import Dict, List, Optional, Tuple, Union
-from urllib.error import HTTPError, URLError
 from urllib.parse import urlencode
-from urllib.request import Request, urlopen
 
+import requests
 from django.core.management.base import BaseCommand, CommandError
 
 from apps.driver.models import Driver, DriverEntry
 from apps.meeting.models import Meeting
+from apps.openf1.client import OpenF1Client
 from apps.team.models import Team
 
-try:
-    import certifi 
-    _CAFILE = certifi.where()
-except Exception:
-    _CAFILE = None
-
-BASE_URL = "https://api.openf1.org/v1/drivers"
-
 
 class Command(BaseCommand):
     help = "Import/update Driver rows from OpenF1 /v1/drivers."
@@ -56,9 +45,7 @@ class Command(BaseCommand):
         insecure = bool(options.get("insecure"))
         if insecure:
             self.stdout.write(self.style.WARNING("[warn] Using INSECURE SSL context (no certificate verification)."))
-            self._ssl_ctx = ssl._create_unverified_context()
-        else:
-            self._ssl_ctx = ssl.create_default_context(cafile=_CAFILE) if _CAFILE else ssl.create_default_context()
+        self._client = OpenF1Client(timeout=self._timeout, verify=not insecure)
 
         params: Dict[str, Union[int, str, List[Union[int, str]]]] = {}
         if driver_numbers:
@@ -68,7 +55,7 @@ class Command(BaseCommand):
 
         try:
             batch = self._fetch_batch(params)
-        except (HTTPError, URLError) as exc:
+        except requests.RequestException as exc:
             raise CommandError(f"Failed to fetch drivers: {exc}") from exc
 
         if not batch:
@@ -103,17 +90,13 @@ class Command(BaseCommand):
         return f"{base}?{qs}" if qs else base
 
     def _fetch_batch(self, params: Dict[str, Union[int, str, List[Union[int, str]]]]) -> List[dict]:
-        url = self._build_url(BASE_URL, params)
+        url = self._build_url(self._client.url("drivers"), params)
         if self._debug:
             self.stdout.write(self.style.NOTICE(f"[debug] GET {url}"))
-        req = Request(url, headers={"User-Agent": "openf1-driver-import/1.0 (+https://openf1.org/)"})
-        # ---- NEW: pass SSL context
-        with urlopen(req, timeout=self._timeout, context=self._ssl_ctx) as response:
-            payload = response.read()
 
         try:
-            data = json.loads(payload)
-        except JSONDecodeError as exc:
+            data = self._client.get_json("drivers", params)
+        except ValueError as exc:
             raise CommandError(f"Invalid JSON for URL {url}: {exc}") from exc
 
         if not isinstance(data, list):
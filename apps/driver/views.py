@@ -18,7 +18,10 @@ from django.views.decorators.http import (
     require_http_methods,
 )
 
-from .models import Driver, DriverEntry
+from apps.team.models import Team
+from main.conditional import conditional_response, queryset_fingerprint
+
+from .models import Driver, DriverEntry, DriverTeam
 from .forms import DriverForm
 
 
@@ -140,7 +143,15 @@ def delete_driver_page(request, driver_number):
 
 # ================== API (umum / web) ==================
 
+def _driver_list_fingerprint(request):
+    # Team names are embedded in each driver, so team edits change the list too.
+    return queryset_fingerprint(
+        Driver.objects.all(), DriverTeam.objects.all(), Team.objects.all()
+    )
+
+
 @require_GET
+@conditional_response(_driver_list_fingerprint)
 def api_driver_list(request):
     drivers = Driver.objects.all().prefetch_related("teams")
     data = [serialize_driver(d) for d in drivers]
@@ -322,6 +333,7 @@ def api_driver_entry_availability_by_session(request):
 # ================== MOBILE API (khusus Flutter) ==================
 
 @require_GET
+@conditional_response(_driver_list_fingerprint)
 def api_mobile_driver_list(request):
     """
     List driver untuk mobile, JSON only.
@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Lap
+
+
+@admin.register(Lap)
+class LapAdmin(admin.ModelAdmin):
+    list_display = ('session_key', 'driver_number', 'lap_number', 'lap_duration', 'is_pit_out_lap', 'date_start')
+    list_filter = ('meeting_key', 'session_key', 'driver_number', 'is_pit_out_lap')
+    search_fields = ('session_key', 'driver_number')
+    ordering = ('session_key', 'driver_number', 'lap_number')
@@ -0,0 +1,205 @@
+from typing import Callable, Iterable
+
+import numpy as np
+from django.db.models import Count, Max
+
+from apps.laps.models import Lap
+from apps.laps.services import lap_from_openf1_row
+from apps.openf1.cache import TTLCache
+
+
+ANALYTICS_FIELDS = (
+    "driver_number",
+    "lap_number",
+    "lap_duration",
+    "duration_sector_1",
+    "duration_sector_2",
+    "duration_sector_3",
+    "is_pit_out_lap",
+)
+DEFAULT_WINDOW = 5
+MAX_WINDOW = 20
+# Fewer clean laps than this and a stint gets no degradation slope.
+MIN_STINT_LAPS = 3
+
+# Keyed on the session's lap count and last update, so re-imports invalidate it.
+LAP_ANALYTICS_CACHE = TTLCache(ttl=60 * 60, max_entries=32, name="lap_analytics")
+
+
+def lap_columns(rows: Iterable[tuple]) -> dict[str, np.ndarray]:
+    """
+    Column arrays from ``ANALYTICS_FIELDS`` tuples sorted by driver and lap.
+    Missing durations become NaN.
+    """
+    rows = list(rows)
+    columns = list(zip(*rows)) if rows else [()] * len(ANALYTICS_FIELDS)
+    driver, lap, duration, s1, s2, s3, pit_out = columns
+    return {
+        "driver_number": np.array(driver, dtype=np.int64),
+        "lap_number": np.array(lap, dtype=np.int64),
+        "lap_duration": np.array(duration, dtype=np.float64),
+        "sectors": np.column_stack(
+            [np.array(s1, dtype=np.float64), np.array(s2, dtype=np.float64), np.array(s3, dtype=np.float64)]
+        ).reshape(len(rows), 3),
+        "is_pit_out_lap": np.array(pit_out, dtype=bool),
+    }
+
+
+def _floats(values: np.ndarray, digits: int = 3) -> list:
+    return [None if value != value else value for value in np.round(values, digits).tolist()]
+
+
+def _float(value: float, digits: int = 3) -> float | None:
+    return None if not np.isfinite(value) else round(float(value), digits)
+
+
+def analyse_laps(columns: dict[str, np.ndarray], *, window: int = DEFAULT_WINDOW) -> dict:
+    """
+    Per-driver lap statistics for one session, computed over whole columns:
+
+    - best lap and its number;
+    - rolling mean lap time over the last ``window`` laps;
+    - each lap's and the driver's best sector times as deltas to the
+      session-best sector;
+    - consistency: standard deviation of clean laps;
+    - per stint (split at pit-out laps): mean and degradation slope, the
+      least-squares seconds lost per lap over its clean laps.
+
+    Clean laps have a time and are neither a pit-out lap nor the lap into
+    the pits before one; only they count towards averages and slopes.
+    """
+    driver = columns["driver_number"]
+    lap = columns["lap_number"]
+    duration = columns["lap_duration"]
+    sectors = columns["sectors"]
+    pit_out = columns["is_pit_out_lap"]
+    n = len(driver)
+    if n == 0:
+        return {"session_best": {"lap": None, "sectors": [None, None, None]}, "drivers": []}
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        new_driver = np.r_[True, driver[1:] != driver[:-1]]
+        group = np.cumsum(new_driver) - 1
+        starts = np.flatnonzero(new_driver)
+        groups = len(starts)
+        pit_in = np.r_[pit_out[1:] & ~new_driver[1:], False]
+        clean = ~pit_out & ~pit_in & np.isfinite(duration)
+        clean_duration = np.where(clean, duration, 0.0)
+
+        # Best lap: sort by (driver, time) and take each driver's first row.
+        timed = np.where(np.isfinite(duration), duration, np.inf)
+        best_rows = np.lexsort((timed, group))[starts]
+        best_time = timed[best_rows]
+
+        # Rolling mean of clean laps from prefix sums, clipped at each driver's first lap.
+        csum = np.r_[0.0, np.cumsum(clean_duration)]
+        ccount = np.r_[0, np.cumsum(clean)]
+        upper = np.arange(1, n + 1)
+        lower = np.maximum(upper - window, starts[group])
+        rolling = (csum[upper] - csum[lower]) / (ccount[upper] - ccount[lower])
+
+        session_best_sectors = np.fmin.reduce(sectors, axis=0)
+        lap_sector_deltas = sectors - session_best_sectors
+        driver_best_sectors = np.fmin.reduceat(sectors, starts, axis=0)
+
+        clean_laps = np.bincount(group, weights=clean, minlength=groups)
+        clean_mean = np.bincount(group, weights=clean_duration, minlength=groups) / clean_laps
+        deviation = np.where(clean, duration - clean_mean[group], 0.0)
+        std = np.sqrt(np.bincount(group, weights=deviation ** 2, minlength=groups) / (clean_laps - 1))
+        # Sample std needs two laps; 0 or 1 would give -0.0, inf or NaN by accident.
+        std[clean_laps < 2] = np.nan
+
+        # Stints and their least-squares slope of lap time against lap number.
+        stint = np.cumsum(pit_out | new_driver) - 1
+        stint_starts = np.flatnonzero(pit_out | new_driver)
+        stint_ends = np.r_[stint_starts[1:], n] - 1
+        stints = len(stint_starts)
+        stint_laps = np.bincount(stint, weights=clean, minlength=stints)
+        mean_x = np.bincount(stint, weights=np.where(clean, lap, 0), minlength=stints) / stint_laps
+        mean_y = np.bincount(stint, weights=clean_duration, minlength=stints) / stint_laps
+        dx = np.where(clean, lap - mean_x[stint], 0.0)
+        dy = np.where(clean, duration - mean_y[stint], 0.0)
+        sxx = np.bincount(stint, weights=dx * dx, minlength=stints)
+        slope = np.bincount(stint, weights=dx * dy, minlength=stints) / sxx
+        slope[(stint_laps < MIN_STINT_LAPS) | (sxx == 0)] = np.nan
+        stint_group = group[stint_starts]
+
+    session_best_lap = best_time.min()
+    drivers = []
+    bounds = np.r_[starts, n]
+    stint_bounds = np.searchsorted(stint_group, np.arange(groups + 1))
+    for index in range(groups):
+        rows = slice(bounds[index], bounds[index + 1])
+        has_best = np.isfinite(best_time[index])
+        drivers.append({
+            "driver_number": int(driver[starts[index]]),
+            "laps": int(bounds[index + 1] - bounds[index]),
+            "clean_laps": int(clean_laps[index]),
+            "best_lap": {
+                "lap_number": int(lap[best_rows[index]]) if has_best else None,
+                "lap_duration": _float(best_time[index]),
+                "delta_to_session_best": _float(best_time[index] - session_best_lap),
+            },
+            "mean_clean_lap": _float(clean_mean[index]),
+            "consistency_std": _float(std[index]),
+            "best_sectors": _floats(driver_best_sectors[index]),
+            "best_sector_deltas": _floats(driver_best_sectors[index] - session_best_sectors),
+            "stints": [
+                {
+                    "stint": number + 1,
+                    "start_lap": int(lap[stint_starts[s]]),
+                    "end_lap": int(lap[stint_ends[s]]),
+                    "clean_laps": int(stint_laps[s]),
+                    "mean_lap": _float(mean_y[s]),
+                    "degradation_s_per_lap": _float(slope[s], 4),
+                }
+                for number, s in enumerate(range(stint_bounds[index], stint_bounds[index + 1]))
+            ],
+            # Columnar, like the car data endpoints.
+            "series": {
+                "lap_number": lap[rows].tolist(),
+                "lap_duration": _floats(duration[rows]),
+                "rolling_avg": _floats(rolling[rows]),
+                "clean": clean[rows].tolist(),
+                "sector_deltas": [_floats(lap_sector_deltas[rows, column]) for column in range(3)],
+            },
+        })
+
+    return {
+        "session_best": {"lap": _float(session_best_lap), "sectors": _floats(session_best_sectors)},
+        "drivers": drivers,
+    }
+
+
+def session_lap_analytics(
+    session_key: int,
+    fetch_rows: Callable[[], list],
+    *,
+    window: int = DEFAULT_WINDOW,
+) -> tuple[dict, str]:
+    """
+    ``analyse_laps`` for a session and where its laps came from: ``"db"``
+    when imported (cached in ``LAP_ANALYTICS_CACHE``), else ``"openf1"``
+    from the OpenF1 ``/laps`` rows returned by ``fetch_rows``.
+    """
+    laps = Lap.objects.filter(session_key=session_key)
+    stamp = laps.aggregate(count=Count("id"), updated=Max("updated_at"))
+    if stamp["count"]:
+        key = (session_key, window, stamp["count"], stamp["updated"])
+        result = LAP_ANALYTICS_CACHE.get_or_load(
+            key,
+            lambda: analyse_laps(
+                lap_columns(laps.order_by("driver_number", "lap_number").values_list(*ANALYTICS_FIELDS)),
+                window=window,
+            ),
+        )
+        return result, "db"
+
+    parsed = [
+        lap
+        for lap in map(lap_from_openf1_row, fetch_rows())
+        if lap is not None
+    ]
+    parsed.sort(key=lambda lap: (lap.driver_number, lap.lap_number))
+    rows = [tuple(getattr(lap, field) for field in ANALYTICS_FIELDS) for lap in parsed]
+    return analyse_laps(lap_columns(rows), window=window), "openf1"
@@ -0,0 +1,9 @@
+from apps.laps.services import ingest_laps
+from apps.openf1.importer import OpenF1ImportCommand
+
+
+class Command(OpenF1ImportCommand):
+    help = "Import laps from OpenF1 /laps into the Lap table (one request per session or meeting)."
+    endpoint = "laps"
+    noun = "laps"
+    ingest = staticmethod(ingest_laps)
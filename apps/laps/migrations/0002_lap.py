@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('laps', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Lap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('meeting_key', models.PositiveIntegerField(blank=True, db_index=True, null=True)),
+                ('session_key', models.PositiveIntegerField()),
+                ('driver_number', models.PositiveSmallIntegerField()),
+                ('lap_number', models.PositiveSmallIntegerField()),
+                ('date_start', models.DateTimeField(blank=True, null=True)),
+                ('lap_duration', models.FloatField(blank=True, null=True)),
+                ('duration_sector_1', models.FloatField(blank=True, null=True)),
+                ('duration_sector_2', models.FloatField(blank=True, null=True)),
+                ('duration_sector_3', models.FloatField(blank=True, null=True)),
+                ('i1_speed', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('i2_speed', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('st_speed', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('is_pit_out_lap', models.BooleanField(default=False)),
+                ('segments_sector_1', models.JSONField(blank=True, default=list)),
+                ('segments_sector_2', models.JSONField(blank=True, default=list)),
+                ('segments_sector_3', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['session_key', 'driver_number', 'lap_number'],
+                'constraints': [models.UniqueConstraint(fields=('session_key', 'driver_number', 'lap_number'), name='lap_session_driver_lap_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import models
+
+
+class Lap(models.Model):
+    """One lap from OpenF1 ``/laps``, keyed by (session_key, driver_number, lap_number)."""
+
+    meeting_key = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    session_key = models.PositiveIntegerField()
+    driver_number = models.PositiveSmallIntegerField()
+    lap_number = models.PositiveSmallIntegerField()
+    date_start = models.DateTimeField(null=True, blank=True)
+    lap_duration = models.FloatField(null=True, blank=True)
+    duration_sector_1 = models.FloatField(null=True, blank=True)
+    duration_sector_2 = models.FloatField(null=True, blank=True)
+    duration_sector_3 = models.FloatField(null=True, blank=True)
+    i1_speed = models.PositiveSmallIntegerField(null=True, blank=True)
+    i2_speed = models.PositiveSmallIntegerField(null=True, blank=True)
+    st_speed = models.PositiveSmallIntegerField(null=True, blank=True)
+    is_pit_out_lap = models.BooleanField(default=False)
+    segments_sector_1 = models.JSONField(default=list, blank=True)
+    segments_sector_2 = models.JSONField(default=list, blank=True)
+    segments_sector_3 = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["session_key", "driver_number", "lap_number"]
+        constraints = [
+            # Also the index behind session/driver/lap lookups and pagination.
+            models.UniqueConstraint(
+                fields=["session_key", "driver_number", "lap_number"],
+                name="lap_session_driver_lap_uniq",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.session_key} #{self.driver_number} lap {self.lap_number}"
@@ -0,0 +1,82 @@
+from typing import Iterable
+
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from apps.car.services import upsert_rows
+from apps.laps.models import Lap
+from apps.openf1.ingest import DEFAULT_INGEST_BATCH_SIZE, chunked, coerce_int
+
+
+LAP_UNIQUE_FIELDS = ["session_key", "driver_number", "lap_number"]
+LAP_UPDATE_FIELDS = [
+    "meeting_key",
+    "date_start",
+    "lap_duration",
+    "duration_sector_1",
+    "duration_sector_2",
+    "duration_sector_3",
+    "i1_speed",
+    "i2_speed",
+    "st_speed",
+    "is_pit_out_lap",
+    "segments_sector_1",
+    "segments_sector_2",
+    "segments_sector_3",
+    "updated_at",
+]
+# Fields returned by the API, in the shape of an OpenF1 /laps row.
+LAP_API_FIELDS = ["meeting_key", *LAP_UNIQUE_FIELDS, *LAP_UPDATE_FIELDS[1:-1]]
+
+
+def _coerce_float(value) -> float | None:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def lap_from_openf1_row(entry: dict) -> Lap | None:
+    """Build an unsaved ``Lap`` from one OpenF1 ``/laps`` row, or ``None`` if unusable."""
+    session_key = coerce_int(entry.get("session_key"))
+    driver_number = coerce_int(entry.get("driver_number"))
+    lap_number = coerce_int(entry.get("lap_number"))
+    if session_key is None or driver_number is None or lap_number is None:
+        return None
+
+    raw_date = entry.get("date_start")
+    return Lap(
+        meeting_key=coerce_int(entry.get("meeting_key")),
+        session_key=session_key,
+        driver_number=driver_number,
+        lap_number=lap_number,
+        date_start=parse_datetime(raw_date) if isinstance(raw_date, str) else None,
+        lap_duration=_coerce_float(entry.get("lap_duration")),
+        duration_sector_1=_coerce_float(entry.get("duration_sector_1")),
+        duration_sector_2=_coerce_float(entry.get("duration_sector_2")),
+        duration_sector_3=_coerce_float(entry.get("duration_sector_3")),
+        i1_speed=coerce_int(entry.get("i1_speed")),
+        i2_speed=coerce_int(entry.get("i2_speed")),
+        st_speed=coerce_int(entry.get("st_speed")),
+        is_pit_out_lap=bool(entry.get("is_pit_out_lap")),
+        segments_sector_1=entry.get("segments_sector_1") or [],
+        segments_sector_2=entry.get("segments_sector_2") or [],
+        segments_sector_3=entry.get("segments_sector_3") or [],
+    )
+
+
+def ingest_laps(rows: Iterable[dict], *, batch_size: int = DEFAULT_INGEST_BATCH_SIZE) -> tuple[int, int]:
+    """Parse and upsert OpenF1 ``/laps`` rows ``batch_size`` at a time. Returns ``(written, skipped)``."""
+    written = skipped = 0
+    for chunk in chunked(rows, batch_size):
+        laps = [lap for lap in map(lap_from_openf1_row, chunk) if lap is not None]
+        skipped += len(chunk) - len(laps)
+        with transaction.atomic():
+            written += sum(upsert_rows(Lap, laps, LAP_UNIQUE_FIELDS, LAP_UPDATE_FIELDS, batch_size=batch_size))
+    return written, skipped
+
+
+def serialize_lap(values: dict) -> dict:
+    """A ``values(*LAP_API_FIELDS)`` row in OpenF1 /laps shape."""
+    date_start = values.get("date_start")
+    return {**values, "date_start": date_start.isoformat() if date_start else None}
@@ -0,0 +1,243 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+from django.db.models import Q
+
+from apps.car.columnar import CHANNELS
+from apps.car.models import Car, CarTrace
+from apps.car.traces import SAMPLE_FIELDS, epoch_ms, unpack_trace
+from apps.laps.models import Lap
+from apps.laps.services import lap_from_openf1_row
+
+
+MAX_LAPS = 20
+DEFAULT_STEP_MS = 100
+MIN_STEP_MS = 20
+MAX_STEP_MS = 1000
+# Interpolated on the overlay grid; the other channels hold their last value.
+INTERPOLATED_CHANNELS = ("speed", "rpm", "throttle")
+
+Samples = Tuple[np.ndarray, Dict[str, np.ndarray]]
+
+
+@dataclass
+class LapWindow:
+    lap_number: int
+    start: datetime
+    end: datetime
+    lap_duration: float | None
+
+    @property
+    def start_ms(self) -> int:
+        return epoch_ms(self.start)
+
+    @property
+    def end_ms(self) -> int:
+        return epoch_ms(self.end)
+
+
+def parse_lap_numbers(raw: str | None) -> List[int] | None:
+    """``"23"``, ``"20-25"`` or ``"3,7,20-22"`` as sorted lap numbers; ``None`` if malformed."""
+    laps = set()
+    for part in (raw or "").split(","):
+        first, _, last = part.strip().partition("-")
+        try:
+            start = int(first)
+            end = int(last) if last else start
+        except ValueError:
+            return None
+        if start < 1 or end < start:
+            return None
+        if end - start >= MAX_LAPS:
+            return None
+        laps.update(range(start, end + 1))
+    return sorted(laps) or None
+
+
+def lap_windows(laps: Sequence[Lap]) -> Dict[int, LapWindow]:
+    """
+    ``[date_start, date_start + lap_duration)`` per lap of one driver, sorted
+    by lap number. A lap without a duration (often the last one) ends where
+    the next lap starts, and is skipped if that is unknown too.
+    """
+    timed = [lap for lap in laps if lap.date_start is not None]
+    windows = {}
+    for lap, following in zip(timed, [*timed[1:], None]):
+        if lap.lap_duration:
+            end = lap.date_start + timedelta(seconds=lap.lap_duration)
+        elif following is not None and following.lap_number == lap.lap_number + 1:
+            end = following.date_start
+        else:
+            continue
+        windows[lap.lap_number] = LapWindow(lap.lap_number, lap.date_start, end, lap.lap_duration)
+    return windows
+
+
+def driver_lap_windows(
+    session_key: int,
+    driver_number: int,
+    lap_numbers: Iterable[int],
+    fetch_rows: Callable[[], list],
+) -> Tuple[Dict[int, LapWindow], str]:
+    """
+    Windows for ``lap_numbers`` of one driver from imported laps, or from
+    the OpenF1 ``/laps`` rows returned by ``fetch_rows`` when the session
+    has none. Returns ``(windows, source)``.
+    """
+    lap_numbers = set(lap_numbers)
+    # The following lap closes a lap that has no duration.
+    wanted = lap_numbers | {number + 1 for number in lap_numbers}
+    laps = list(
+        Lap.objects.filter(session_key=session_key, driver_number=driver_number, lap_number__in=wanted)
+        .order_by("lap_number")
+        .only("lap_number", "date_start", "lap_duration")
+    )
+    source = "db"
+    if not laps and not Lap.objects.filter(session_key=session_key).exists():
+        parsed = (lap_from_openf1_row(row) for row in fetch_rows())
+        laps = sorted(
+            (lap for lap in parsed if lap is not None
+             and lap.driver_number == driver_number and lap.lap_number in wanted),
+            key=lambda lap: lap.lap_number,
+        )
+        source = "openf1"
+    windows = lap_windows(laps)
+    return {number: windows[number] for number in sorted(lap_numbers) if number in windows}, source
+
+
+def _window_positions(timestamps: np.ndarray, windows: Sequence[LapWindow]) -> np.ndarray:
+    starts = np.searchsorted(timestamps, [window.start_ms for window in windows])
+    ends = np.searchsorted(timestamps, [window.end_ms for window in windows])
+    return np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)])
+
+
+def window_samples(session_key: int, driver_number: int, windows: Sequence[LapWindow]) -> Samples:
+    """
+    Date-ordered epoch-ms timestamps and channel arrays of one driver's
+    samples inside ``windows``.
+
+    ``Car`` rows come from a single query with one ``date`` range per lap,
+    so each lap is a range scan on ``car_session_driver_ts_idx`` rather than
+    a read of the whole session. Samples already compacted into the pair's
+    ``CarTrace`` are sliced from it too; ``Car`` rows win on equal timestamps.
+    """
+    names = [name for name, _ in CHANNELS]
+    if not windows:
+        return np.empty(0, dtype=np.int64), {name: np.empty(0) for name in names}
+
+    ranges = Q()
+    for window in windows:
+        ranges |= Q(date__gte=window.start, date__lt=window.end)
+    rows = list(
+        Car.objects.filter(ranges, session_key=session_key, driver_number=driver_number, is_manual=False)
+        .order_by("date")
+        .values_list(*SAMPLE_FIELDS)
+    )
+    columns = list(zip(*rows)) if rows else [()] * len(SAMPLE_FIELDS)
+    timestamps = np.fromiter((epoch_ms(value) for value in columns[0]), dtype=np.int64, count=len(rows))
+    values = [np.array(column, dtype=np.int64) for column in columns[1:]]
+
+    trace = CarTrace.objects.filter(
+        session_key=session_key,
+        driver_number=driver_number,
+        start_date__lt=max(window.end for window in windows),
+        end_date__gte=min(window.start for window in windows),
+    ).first()
+    if trace is not None:
+        data = unpack_trace(trace)
+        trace_timestamps = data.start_ms + np.asarray(data.offset_ms, dtype=np.int64)
+        keep = _window_positions(trace_timestamps, windows)
+        timestamps = np.concatenate((timestamps, trace_timestamps[keep]))
+        values = [
+            np.concatenate((column, np.asarray(getattr(data, field), dtype=np.int64)[keep]))
+            for column, field in zip(values, SAMPLE_FIELDS[1:])
+        ]
+        # np.unique keeps the first occurrence, i.e. the Car row.
+        timestamps, first = np.unique(timestamps, return_index=True)
+        values = [column[first] for column in values]
+
+    # SAMPLE_FIELDS and CHANNELS list the channels in the same order.
+    return timestamps, dict(zip(names, values))
+
+
+def lap_slice(window: LapWindow, samples: Samples) -> dict:
+    """Columnar telemetry for one lap, with ``elapsed_ms`` from the lap start."""
+    timestamps, channels = samples
+    start, end = np.searchsorted(timestamps, [window.start_ms, window.end_ms])
+    payload = {
+        "timestamp_ms": timestamps[start:end].tolist(),
+        "elapsed_ms": (timestamps[start:end] - window.start_ms).tolist(),
+    }
+    payload.update((name, values[start:end].tolist()) for name, values in channels.items())
+    return {
+        "lap_number": window.lap_number,
+        "date_start": window.start.isoformat(),
+        "lap_duration": window.lap_duration,
+        "count": int(end - start),
+        "columns": payload,
+    }
+
+
+def _nullable(values: np.ndarray, digits: int) -> list:
+    return [None if value != value else value for value in np.round(values, digits).tolist()]
+
+
+def _aligned(window: LapWindow, samples: Samples, elapsed: np.ndarray) -> Tuple[dict, np.ndarray]:
+    timestamps, channels = samples
+    start, end = np.searchsorted(timestamps, [window.start_ms, window.end_ms])
+    offsets = (timestamps[start:end] - window.start_ms).astype(np.float64)
+    aligned = {}
+    if not len(offsets):
+        empty = np.full(len(elapsed), np.nan)
+        return {name: _nullable(empty, 1) for name in channels}, empty
+
+    # Points before the first or after the last sample of the lap stay empty.
+    outside = (elapsed < offsets[0]) | (elapsed > offsets[-1])
+    previous = np.clip(np.searchsorted(offsets, elapsed, side="right") - 1, 0, None)
+    speed = None
+    for name, values in channels.items():
+        values = values[start:end].astype(np.float64)
+        if name in INTERPOLATED_CHANNELS:
+            series = np.interp(elapsed, offsets, values)
+        else:
+            series = values[previous]
+        series[outside] = np.nan
+        aligned[name] = _nullable(series, 1)
+        if name == "speed":
+            speed = series
+    return aligned, speed
+
+
+def overlay_lap(
+    lap_number: int,
+    windows: Sequence[LapWindow],
+    samples: Sequence[Samples],
+    driver_numbers: Sequence[int],
+    *,
+    step_ms: int = DEFAULT_STEP_MS,
+) -> dict:
+    """
+    Two drivers' telemetry for the same lap on one elapsed-time grid of
+    ``step_ms``, covering the longer of the two laps, plus the speed
+    difference of the first driver to the second.
+    """
+    length = max(window.end_ms - window.start_ms for window in windows)
+    elapsed = np.arange(0, length + 1, step_ms, dtype=np.float64)
+    drivers = {}
+    speeds = []
+    for driver_number, window, pair_samples in zip(driver_numbers, windows, samples):
+        aligned, speed = _aligned(window, pair_samples, elapsed)
+        drivers[str(driver_number)] = {
+            "lap_duration": window.lap_duration,
+            "date_start": window.start.isoformat(),
+            "columns": aligned,
+        }
+        speeds.append(speed)
+    return {
+        "lap_number": lap_number,
+        "elapsed_ms": elapsed.astype(np.int64).tolist(),
+        "drivers": drivers,
+        "speed_delta": _nullable(speeds[0] - speeds[1], 1),
+    }
@@ -1,15 +1,36 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
 from types import SimpleNamespace
-from unittest.mock import patch, Mock
+from unittest.mock import patch
 
 import requests
+from django.core.management import call_command
 from django.test import TestCase, Client, RequestFactory
 from django.urls import reverse
+from django.utils import timezone
+
+from apps.car.models import Car, CarTrace
+from apps.car.traces import pack_samples
+from apps.laps.analytics import LAP_ANALYTICS_CACHE, analyse_laps, lap_columns
+from apps.openf1.client import RateLimited
+from apps.openf1.proxy import (
+    COMPLETED_TTL,
+    LIVE_TTL,
+    OPENF1_PROXY_CACHE,
+    OPENF1_PROXY_MAX_ROWS,
+    fetch_list,
+    proxy_ttl,
+)
+from apps.session.models import Session
 
 from . import views
+from .models import Lap
+from .services import ingest_laps
 
 
 class LapsViewsTest(TestCase):
     def setUp(self):
+        OPENF1_PROXY_CACHE.clear()
         self.client = Client()
         self.rf = RequestFactory()
 
@@ -19,17 +40,14 @@ class LapsViewsTest(TestCase):
         self.assertEqual(views._fmt("not-a-date"), "not-a-date") # invalid -> sama
         self.assertEqual(views._fmt("2024-05-01T12:34:56"), "01 May, 12:34")  # valid ISO
 
-    @patch("apps.laps.views.requests.get")
-    def test_fetch_laps_default_and_formatting(self, mock_get):
+    @patch("apps.openf1.proxy.get_client")
+    def test_fetch_laps_default_and_formatting(self, mock_client):
         payload = [
             {"date_start": "2024-05-01T12:34:56", "lap_number": 1},
             {"date_start": "bad", "lap_number": 2},
             {"date_start": None, "lap_number": 3},
         ]
-        resp = Mock()
-        resp.raise_for_status.return_value = None
-        resp.json.return_value = payload
-        mock_get.return_value = resp
+        mock_client.return_value.get_json.return_value = payload
 
         data = views._fetch_laps({})  # empty -> fallback meeting_key=latest
         self.assertEqual(len(data), 3)
@@ -37,26 +55,21 @@ class LapsViewsTest(TestCase):
         self.assertEqual(data[1]["date_start_str"], "bad")
         self.assertIsNone(data[2]["date_start_str"])
 
-        mock_get.assert_called_once_with(
-            f"{views.OPENF1_API_BASE_URL}/laps",
+        mock_client.return_value.get_json.assert_called_once_with(
+            "laps",
             params={"meeting_key": "latest"},
-            timeout=20,
         )
 
-    @patch("apps.laps.views.requests.get")
-    def test_fetch_laps_filters_out_empty_values(self, mock_get):
+    @patch("apps.openf1.proxy.get_client")
+    def test_fetch_laps_filters_out_empty_values(self, mock_client):
         payload = []
-        resp = Mock()
-        resp.raise_for_status.return_value = None
-        resp.json.return_value = payload
-        mock_get.return_value = resp
+        mock_client.return_value.get_json.return_value = payload
 
         params = {"session_key": "", "driver_number": None, "meeting_key": "123"}
         _ = views._fetch_laps(params)
-        mock_get.assert_called_once_with(
-            f"{views.OPENF1_API_BASE_URL}/laps",
+        mock_client.return_value.get_json.assert_called_once_with(
+            "laps",
             params={"meeting_key": "123"},
-            timeout=20,
         )
 
     # ===== pages =====
@@ -72,13 +85,10 @@ class LapsViewsTest(TestCase):
         self.assertEqual(r.status_code, 200)
 
     # ===== API =====
-    @patch("apps.laps.views.requests.get")
-    def test_api_laps_list_success_no_params_uses_fallback(self, mock_get):
+    @patch("apps.openf1.proxy.get_client")
+    def test_api_laps_list_success_no_params_uses_fallback(self, mock_client):
         payload = [{"date_start": "2024-05-01T12:34:56"}]
-        resp = Mock()
-        resp.raise_for_status.return_value = None
-        resp.json.return_value = payload
-        mock_get.return_value = resp
+        mock_client.return_value.get_json.return_value = payload
 
         url = reverse("laps:api_laps_list")
         r = self.client.get(url)
@@ -88,28 +98,23 @@ class LapsViewsTest(TestCase):
         self.assertEqual(js["count"], 1)
         self.assertEqual(js["data"][0]["date_start_str"], "01 May, 12:34")
 
-        mock_get.assert_called_once_with(
-            f"{views.OPENF1_API_BASE_URL}/laps",
+        mock_client.return_value.get_json.assert_called_once_with(
+            "laps",
             params={"meeting_key": "latest"},
-            timeout=20,
         )
 
-    @patch("apps.laps.views.requests.get")
-    def test_api_laps_list_success_with_params(self, mock_get):
-        resp = Mock()
-        resp.raise_for_status.return_value = None
-        resp.json.return_value = []
-        mock_get.return_value = resp
+    @patch("apps.openf1.proxy.get_client")
+    def test_api_laps_list_success_with_params(self, mock_client):
+        mock_client.return_value.get_json.return_value = []
 
         url = reverse("laps:api_laps_list") + "?session_key=5&driver_number=22&lap_number=7&meeting_key=2024"
         r = self.client.get(url)
         self.assertEqual(r.status_code, 200)
         self.assertTrue(r.json()["ok"])
 
-        mock_get.assert_called_once_with(
-            f"{views.OPENF1_API_BASE_URL}/laps",
+        mock_client.return_value.get_json.assert_called_once_with(
+            "laps",
             params={"session_key": "5", "driver_number": "22", "lap_number": "7", "meeting_key": "2024"},
-            timeout=20,
         )
 
     def _make_http_error(self, code=400, reason="Bad Request"):
@@ -144,3 +149,299 @@ class LapsViewsTest(TestCase):
         r = self.client.get(reverse("laps:api_laps_list"))
         self.assertEqual(r.status_code, 502)
         self.assertIn("boom", r.json()["error"])
+
+
+def _openf1_lap(session_key, driver_number, lap_number, **extra):
+    return {
+        "meeting_key": 1200,
+        "session_key": session_key,
+        "driver_number": driver_number,
+        "lap_number": lap_number,
+        "date_start": f"2024-05-01T12:{lap_number:02d}:00+00:00",
+        "lap_duration": 90.0 + lap_number / 10,
+        "duration_sector_1": 30.1,
+        "duration_sector_2": 30.2,
+        "duration_sector_3": 29.9,
+        "i1_speed": 290,
+        "i2_speed": 280,
+        "st_speed": 310,
+        "is_pit_out_lap": lap_number == 1,
+        "segments_sector_1": [2049, 2049],
+        **extra,
+    }
+
+
+class LapPersistenceTest(TestCase):
+    def setUp(self):
+        OPENF1_PROXY_CACHE.clear()
+        rows = [
+            _openf1_lap(5, driver, lap)
+            for driver in (1, 16, 44)
+            for lap in range(1, 11)
+        ]
+        ingest_laps(rows)
+
+    def test_ingest_is_idempotent_and_updates(self):
+        written, skipped = ingest_laps([
+            _openf1_lap(5, 1, 1, lap_duration=99.5),
+            {"session_key": 5, "driver_number": 1},
+        ])
+        self.assertEqual((written, skipped), (1, 1))
+        self.assertEqual(Lap.objects.count(), 30)
+        self.assertEqual(Lap.objects.get(session_key=5, driver_number=1, lap_number=1).lap_duration, 99.5)
+
+    @patch("apps.openf1.proxy.get_client")
+    def test_ingested_session_is_paginated_in_sql(self, mock_client):
+        url = reverse("laps:api_laps_list")
+        with self.assertNumQueries(3):
+            r = self.client.get(url, {"session_key": 5, "limit": 7, "offset": 7})
+        js = r.json()
+        self.assertEqual(js["source"], "db")
+        self.assertEqual((js["count"], js["next_offset"], js["has_more"]), (30, 14, True))
+        self.assertEqual(
+            [(row["driver_number"], row["lap_number"]) for row in js["data"][:4]],
+            [(1, 8), (1, 9), (1, 10), (16, 1)],
+        )
+        self.assertEqual(js["data"][0]["date_start_str"], "01 May, 12:08")
+
+        last = self.client.get(url, {"session_key": 5, "driver_number": 44, "offset": 5}).json()
+        self.assertEqual((last["count"], last["next_offset"], len(last["data"])), (10, None, 5))
+        mock_client.assert_not_called()
+
+    @patch("apps.openf1.proxy.get_client")
+    def test_session_not_ingested_falls_back_to_openf1(self, mock_client):
+        mock_client.return_value.get_json.return_value = [_openf1_lap(6, 1, 1)]
+        js = self.client.get(reverse("laps:api_laps_list"), {"session_key": 6}).json()
+        self.assertEqual((js["source"], js["count"]), ("openf1", 1))
+        mock_client.return_value.get_json.assert_called_once_with("laps", params={"session_key": "6"})
+
+    @patch("apps.openf1.proxy.get_client")
+    def test_latest_and_unscoped_queries_go_to_openf1(self, mock_client):
+        mock_client.return_value.get_json.return_value = [_openf1_lap(6, 1, 1)]
+        url = reverse("laps:api_laps_list")
+        for params in ({}, {"driver_number": 1}, {"meeting_key": "latest"}):
+            js = self.client.get(url, params).json()
+            self.assertEqual((js["source"], js["count"]), ("openf1", 1), params)
+        self.assertEqual(self.client.get(url, {"meeting_key": 1200}).json()["source"], "db")
+
+    @patch("apps.openf1.proxy.get_client")
+    def test_fallback_pages_are_served_from_the_proxy_cache(self, mock_client):
+        mock_client.return_value.get_json.return_value = [_openf1_lap(6, 1, lap) for lap in range(1, 26)]
+        url = reverse("laps:api_laps_list")
+        pages = [
+            self.client.get(url, {"session_key": "6", "limit": 10, "offset": offset}).json()
+            for offset in (0, 10, 20)
+        ]
+        self.client.get(url, {"session_key": "06", "driver_number": ""})
+        self.assertEqual([len(page["data"]) for page in pages], [10, 10, 5])
+        self.assertEqual(pages[2]["data"][0]["lap_number"], 21)
+        mock_client.return_value.get_json.assert_called_once()
+        stats = OPENF1_PROXY_CACHE.stats()
+        self.assertEqual((stats["misses"], stats["hits"]), (1, 3))
+
+    @patch("apps.openf1.proxy.get_client")
+    def test_proxy_cache_is_bounded_by_rows(self, mock_client):
+        self.assertEqual(OPENF1_PROXY_CACHE.max_weight, OPENF1_PROXY_MAX_ROWS)
+        mock_client.return_value.get_json.side_effect = lambda endpoint, params=None: [
+            _openf1_lap(int(params["session_key"]), 1, lap) for lap in range(1, 26)
+        ]
+        with patch.object(OPENF1_PROXY_CACHE, "max_weight", 30):
+            fetch_list("laps", {"session_key": 6})
+            fetch_list("laps", {"session_key": 7})
+            self.assertEqual(OPENF1_PROXY_CACHE.weight, 25)
+            fetch_list("laps", {"session_key": 6})
+        self.assertEqual(mock_client.return_value.get_json.call_count, 3)
+
+    @patch("apps.openf1.proxy.get_client")
+    def test_rate_limited_fallback_answers_503(self, mock_client):
+        mock_client.return_value.get_json.side_effect = RateLimited("laps", 2.3)
+        response = self.client.get(reverse("laps:api_laps_list"), {"session_key": 6})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "3")
+        self.assertFalse(response.json()["ok"])
+
+    @patch("apps.openf1.proxy.get_client")
+    def test_proxy_ttl_is_only_looked_up_on_a_miss(self, mock_client):
+        mock_client.return_value.get_json.return_value = []
+        with self.assertNumQueries(1):
+            fetch_list("laps", {"session_key": "6"})
+        with self.assertNumQueries(0):
+            fetch_list("laps", {"session_key": "6"})
+
+    def test_proxy_ttl_is_long_only_for_finished_sessions(self):
+        Session.objects.create(session_key=8, meeting_key=80, start_time=timezone.now() - timedelta(days=30))
+        Session.objects.create(session_key=9, meeting_key=90, start_time=timezone.now())
+        self.assertEqual(proxy_ttl({"session_key": "8"}), COMPLETED_TTL)
+        self.assertEqual(proxy_ttl({"session_key": "9"}), LIVE_TTL)
+        self.assertEqual(proxy_ttl({"session_key": "404"}), LIVE_TTL)
+        self.assertEqual(proxy_ttl({"meeting_key": "latest"}), LIVE_TTL)
+
+    @patch("apps.openf1.importer.get_client")
+    def test_import_laps_command(self, mock_client):
+        mock_client.return_value.get_json.return_value = [_openf1_lap(7, 1, lap) for lap in range(1, 4)]
+        call_command("import_laps", session_keys=[7], stdout=StringIO())
+        self.assertEqual(Lap.objects.filter(session_key=7).count(), 3)
+        mock_client.return_value.get_json.assert_called_once_with("laps", {"session_key": 7})
+
+
+class LapAnalyticsTest(TestCase):
+    def setUp(self):
+        OPENF1_PROXY_CACHE.clear()
+        LAP_ANALYTICS_CACHE.clear()
+        # Driver 1: out lap, three clean laps gaining 1 s each, in lap,
+        # out lap, three clean laps gaining 0.5 s each.
+        durations = [None, 90.0, 91.0, 92.0, 110.0, 115.0, 93.0, 93.5, 94.0]
+        rows = [
+            _openf1_lap(
+                5, 1, lap,
+                lap_duration=duration,
+                duration_sector_1=30.0 + lap / 10,
+                is_pit_out_lap=lap in (1, 6),
+            )
+            for lap, duration in enumerate(durations, start=1)
+        ]
+        rows += [
+            _openf1_lap(5, 44, 1, lap_duration=89.0, duration_sector_1=29.5, is_pit_out_lap=False),
+            _openf1_lap(5, 44, 2, lap_duration=91.0, duration_sector_1=30.5, is_pit_out_lap=False),
+        ]
+        ingest_laps(rows)
+
+    def test_per_driver_stats_and_stints(self):
+        url = reverse("laps:api_lap_analytics")
+        js = self.client.get(url, {"session_key": 5, "window": 3}).json()
+        self.assertEqual((js["source"], js["session_best"]["lap"]), ("db", 89.0))
+        self.assertEqual(js["session_best"]["sectors"][0], 29.5)
+
+        first, second = js["drivers"]
+        self.assertEqual(first["best_lap"], {"lap_number": 2, "lap_duration": 90.0, "delta_to_session_best": 1.0})
+        self.assertEqual(first["clean_laps"], 6)
+        self.assertEqual(first["best_sector_deltas"][0], 0.6)
+        self.assertEqual(
+            [(s["start_lap"], s["end_lap"], s["clean_laps"], s["degradation_s_per_lap"]) for s in first["stints"]],
+            [(1, 5, 3, 1.0), (6, 9, 3, 0.5)],
+        )
+        self.assertEqual(first["series"]["clean"], [False, True, True, True, False, False, True, True, True])
+        # Rolling windows skip the in/out laps: laps 5 and 6 still average laps 3-4 and 4.
+        self.assertEqual(first["series"]["rolling_avg"][:7], [None, 90.0, 90.5, 91.0, 91.5, 92.0, 93.0])
+        self.assertEqual(second["consistency_std"], 1.414)
+        self.assertIsNone(second["stints"][0]["degradation_s_per_lap"])
+
+        only = self.client.get(url, {"session_key": 5, "driver_number": 44}).json()
+        self.assertEqual([row["driver_number"] for row in only["drivers"]], [44])
+
+    def test_consistency_needs_two_clean_laps(self):
+        rows = [
+            (1, 1, 95.0, 30.0, 30.0, 35.0, True),   # only an out lap
+            (16, 1, 91.0, 30.0, 30.0, 31.0, False),  # a single clean lap
+        ]
+        first, second = analyse_laps(lap_columns(rows))["drivers"]
+        self.assertEqual((first["clean_laps"], first["consistency_std"]), (0, None))
+        self.assertIsNone(first["mean_clean_lap"])
+        self.assertEqual((second["clean_laps"], second["consistency_std"]), (1, None))
+        self.assertEqual(second["mean_clean_lap"], 91.0)
+
+    def test_results_are_cached_until_laps_change(self):
+        url = reverse("laps:api_lap_analytics")
+        self.client.get(url, {"session_key": 5})
+        with self.assertNumQueries(1):
+            self.client.get(url, {"session_key": 5})
+        ingest_laps([_openf1_lap(5, 44, 2, lap_duration=88.0)])
+        js = self.client.get(url, {"session_key": 5}).json()
+        self.assertEqual(js["session_best"]["lap"], 88.0)
+
+    @patch("apps.openf1.proxy.get_client")
+    def test_not_imported_session_uses_openf1_and_validates(self, mock_client):
+        mock_client.return_value.get_json.return_value = [_openf1_lap(6, 1, 2, lap_duration=95.0)]
+        url = reverse("laps:api_lap_analytics")
+        js = self.client.get(url, {"session_key": 6}).json()
+        self.assertEqual((js["source"], js["drivers"][0]["best_lap"]["lap_duration"]), ("openf1", 95.0))
+
+        mock_client.return_value.get_json.return_value = []
+        self.assertEqual(self.client.get(url, {"session_key": 7}).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {"session_key": 5, "window": 99}).status_code, 400)
+
+
+LAP_START = datetime(2024, 5, 1, 12, 0, tzinfo=dt_timezone.utc)
+
+
+class LapTelemetryTest(TestCase):
+    def setUp(self):
+        OPENF1_PROXY_CACHE.clear()
+        # Driver 1: laps of 90 s from 12:00:00, lap 3 has no duration and no lap 4.
+        # Driver 16: the same laps 2 s later.
+        laps = []
+        for driver, offset in ((1, 0), (16, 2)):
+            for lap in (1, 2, 3):
+                row = _openf1_lap(5, driver, lap, lap_duration=None if lap == 3 and driver == 1 else 90.0)
+                row["date_start"] = (LAP_START + timedelta(seconds=offset + (lap - 1) * 90)).isoformat()
+                laps.append(row)
+        ingest_laps(laps)
+
+        def sample(driver, seconds, speed):
+            return Car(
+                session_key=5, driver_number=driver, date=LAP_START + timedelta(seconds=seconds),
+                speed=speed, rpm=10000, throttle=100, brake=0, n_gear=7, drs=0,
+            )
+
+        # Driver 1 samples every 10 s; speed counts them up from 200.
+        Car.objects.bulk_create(sample(1, seconds, 200 + seconds // 10) for seconds in range(0, 280, 10))
+        # Driver 16's lap 2 lives in a compacted trace, plus one Car row overriding a sample.
+        rows = [
+            (LAP_START + timedelta(seconds=seconds), 300, 11000, 90, 0, 8, 12)
+            for seconds in range(92, 182, 10)
+        ]
+        start_date, end_date, payload = pack_samples(rows)
+        CarTrace.objects.create(
+            session_key=5, driver_number=16, start_date=start_date, end_date=end_date,
+            sample_count=len(rows), payload=payload,
+        )
+        Car.objects.bulk_create([sample(16, 102, 310)])
+
+    def test_single_lap_slice_uses_range_scans(self):
+        url = reverse("laps:api_lap_telemetry")
+        with self.assertNumQueries(3):
+            js = self.client.get(url, {"session_key": 5, "driver_number": 1, "laps": "2"}).json()
+        (lap,) = js["laps"]
+        self.assertEqual((js["source"], lap["lap_number"], lap["count"]), ("db", 2, 9))
+        self.assertEqual(lap["columns"]["elapsed_ms"][:3], [0, 10000, 20000])
+        self.assertEqual(lap["columns"]["speed"], list(range(209, 218)))
+        self.assertEqual(lap["columns"]["gear"][0], 7)
+
+        js = self.client.get(url, {"session_key": 5, "driver_number": 16, "laps": "1-3"}).json()
+        self.assertEqual([lap["count"] for lap in js["laps"]], [0, 9, 0])
+        self.assertEqual(js["laps"][1]["columns"]["speed"][:2], [300, 310])
+
+        js = self.client.get(url, {"session_key": 5, "driver_number": 1, "laps": "1-3"}).json()
+        self.assertEqual(([lap["lap_number"] for lap in js["laps"]], js["missing_laps"]), ([1, 2], [3]))
+
+    def test_overlay_aligns_laps_by_elapsed_time(self):
+        js = self.client.get(
+            reverse("laps:api_lap_telemetry"),
+            {"session_key": 5, "driver_number": 1, "compare_driver": 16, "laps": "2", "step_ms": 1000},
+        ).json()
+        self.assertEqual((js["mode"], js["drivers"]), ("overlay", [1, 16]))
+        self.assertEqual(js["sources"], {"1": "db", "16": "db"})
+        (lap,) = js["laps"]
+        self.assertEqual(len(lap["elapsed_ms"]), 91)
+        first = lap["drivers"]["1"]["columns"]
+        second = lap["drivers"]["16"]["columns"]
+        self.assertEqual(first["speed"][:3], [209.0, 209.1, 209.2])
+        self.assertEqual(second["speed"][::5][:4], [300.0, 305.0, 310.0, 305.0])
+        self.assertEqual(second["drs"][:2], [12.0, 12.0])
+        # Driver 1's last sample of the lap is 80 s in.
+        self.assertEqual((first["speed"][80], first["speed"][81]), (217.0, None))
+        self.assertEqual(lap["speed_delta"][:2], [-91.0, -91.9])
+
+    def test_validation(self):
+        url = reverse("laps:api_lap_telemetry")
+        self.assertEqual(self.client.get(url, {"session_key": 5, "laps": "2"}).status_code, 400)
+        for laps in ("", "x", "5-2", "1-100"):
+            r = self.client.get(url, {"session_key": 5, "driver_number": 1, "laps": laps})
+            self.assertEqual(r.status_code, 400, laps)
+        r = self.client.get(url, {"session_key": 5, "driver_number": 1, "laps": "2", "step_ms": 1})
+        self.assertEqual(r.status_code, 400)
+        r = self.client.get(url, {"session_key": 5, "driver_number": 44, "laps": "2"})
+        self.assertEqual(r.status_code, 404)
+        r = self.client.get(url, {"session_key": 5, "driver_number": 1, "compare_driver": "01", "laps": "2"})
+        self.assertEqual(r.status_code, 400)
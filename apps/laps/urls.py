@@ -6,5 +6,7 @@ app_name = "laps"
 urlpatterns = [
     path("", views.laps_list_page, name="laps_list_page"),
     path("api/", views.api_laps_list, name="api_laps_list"),
+    path("api/analytics/", views.api_lap_analytics, name="api_lap_analytics"),
+    path("api/telemetry/", views.api_lap_telemetry, name="api_lap_telemetry"),
 ]
 
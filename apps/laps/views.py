@@ -1,9 +1,32 @@
 import requests
 from django.http import JsonResponse
 from django.shortcuts import render
+from django.views.decorators.http import require_GET
 from datetime import datetime
 
-OPENF1_API_BASE_URL = "https://api.openf1.org/v1"
+from apps.laps.analytics import DEFAULT_WINDOW, MAX_WINDOW, session_lap_analytics
+from apps.laps.models import Lap
+from apps.laps.services import LAP_API_FIELDS, serialize_lap
+from apps.laps.telemetry import (
+    DEFAULT_STEP_MS,
+    MAX_LAPS,
+    MAX_STEP_MS,
+    MIN_STEP_MS,
+    driver_lap_windows,
+    lap_slice,
+    overlay_lap,
+    parse_lap_numbers,
+    window_samples,
+)
+from apps.openf1.ingest import coerce_int
+from apps.openf1.proxy import (
+    fetch_list,
+    handles_rate_limits,
+    imported_scope,
+    list_page,
+    page_bounds,
+    queryset_page,
+)
 
 
 def laps_list_page(request):
@@ -26,21 +49,30 @@ def _fmt(dt):
 def _fetch_laps(params: dict):
     """
     Panggil OpenF1 /laps dengan fallback default bila params kosong.
-    Di sini TIDAK ada parameter limit/offset: pagination ditangani Django.
+    Di sini TIDAK ada parameter limit/offset: pagination ditangani Django,
+    dan list lengkapnya di-cache sehingga halaman berikutnya tidak memanggil OpenF1 lagi.
     """
     q = {k: v for k, v in (params or {}).items() if v not in ("", None)}
     if not q:
         # default lama yang sudah bekerja di proyek kamu
         q = {"meeting_key": "latest"}
 
-    r = requests.get(f"{OPENF1_API_BASE_URL}/laps", params=q, timeout=20)
-    r.raise_for_status()
-    data = r.json()
+    return fetch_list("laps", q, prepare=_with_date_str)
+
+
+def _with_date_str(data: list) -> list:
     for row in data:
         row["date_start_str"] = _fmt(row.get("date_start"))
     return data
 
 
+def _serialize(values: dict) -> dict:
+    row = serialize_lap(values)
+    row["date_start_str"] = _fmt(row["date_start"])
+    return row
+
+
+@handles_rate_limits
 def api_laps_list(request):
     # filter utama
     filters = {}
@@ -50,42 +82,16 @@ def api_laps_list(request):
             filters[key] = val
 
     # parameter pagination dari *frontend*
-    try:
-        limit = int(request.GET.get("limit", "20"))
-    except ValueError:
-        limit = 20
-    try:
-        offset = int(request.GET.get("offset", "0"))
-    except ValueError:
-        offset = 0
+    limit, offset = page_bounds(request)
 
-    if limit <= 0:
-        limit = 20
-    if offset < 0:
-        offset = 0
+    laps = imported_scope(Lap.objects.all(), filters)
+    if laps is not None:
+        laps = laps.order_by("session_key", "driver_number", "lap_number")
+        return queryset_page(laps, LAP_API_FIELDS, _serialize, limit, offset)
 
+    # Sesi yang belum di-import: ambil langsung dari OpenF1.
     try:
-        data = _fetch_laps(filters)
-        total = len(data)
-
-        start = offset
-        end = offset + limit
-        sliced = data[start:end]
-
-        has_more = end < total
-        next_offset = end if has_more else None
-
-        return JsonResponse(
-            {
-                "ok": True,
-                "count": total,          # total semua data untuk filter tsb
-                "limit": limit,
-                "offset": offset,
-                "next_offset": next_offset,
-                "has_more": has_more,
-                "data": sliced,          # hanya potongan sesuai limit/offset
-            }
-        )
+        return list_page(_fetch_laps(filters), limit, offset)
     except requests.HTTPError as e:
         try:
             status = e.response.status_code
@@ -100,3 +106,137 @@ def api_laps_list(request):
         return JsonResponse({"ok": False, "error": msg}, status=502)
     except requests.RequestException as e:
         return JsonResponse({"ok": False, "error": str(e)}, status=502)
+
+
+@require_GET
+@handles_rate_limits
+def api_lap_analytics(request):
+    """
+    Per-driver best lap, rolling averages, sector deltas, consistency and
+    per-stint degradation for one session. ``driver_number`` narrows the
+    drivers returned; ``window`` sets the rolling average length in laps.
+    """
+    session_key = coerce_int(request.GET.get("session_key"))
+    if session_key is None:
+        return JsonResponse({"ok": False, "error": "session_key must be an integer."}, status=400)
+    window = coerce_int(request.GET.get("window") or DEFAULT_WINDOW)
+    if window is None or not 1 <= window <= MAX_WINDOW:
+        return JsonResponse(
+            {"ok": False, "error": f"window must be an integer between 1 and {MAX_WINDOW}."}, status=400
+        )
+    driver_number = request.GET.get("driver_number")
+    if driver_number and coerce_int(driver_number) is None:
+        return JsonResponse({"ok": False, "error": "driver_number must be an integer."}, status=400)
+
+    try:
+        result, source = session_lap_analytics(
+            session_key, lambda: _fetch_laps({"session_key": session_key}), window=window
+        )
+    except requests.RequestException as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=502)
+    if not result["drivers"]:
+        return JsonResponse(
+            {"ok": False, "error": f"No laps found for session_key {session_key}."}, status=404
+        )
+
+    drivers = result["drivers"]
+    if driver_number:
+        drivers = [row for row in drivers if row["driver_number"] == coerce_int(driver_number)]
+    return JsonResponse(
+        {
+            "ok": True,
+            "source": source,
+            "session_key": session_key,
+            "window": window,
+            "session_best": result["session_best"],
+            "drivers": drivers,
+        }
+    )
+
+
+@require_GET
+@handles_rate_limits
+def api_lap_telemetry(request):
+    """
+    Car telemetry cut to lap boundaries for one driver, e.g.
+    ``?session_key=9158&driver_number=1&laps=23`` (``laps`` also takes
+    ``20-25`` or ``3,7,20-22``). With ``compare_driver`` the same laps of
+    both drivers are returned aligned on an elapsed-time grid of ``step_ms``.
+    """
+    keys = {}
+    for key in ("session_key", "driver_number"):
+        keys[key] = coerce_int(request.GET.get(key))
+        if keys[key] is None:
+            return JsonResponse({"ok": False, "error": f"{key} must be an integer."}, status=400)
+    session_key, driver_number = keys["session_key"], keys["driver_number"]
+
+    lap_numbers = parse_lap_numbers(request.GET.get("laps"))
+    if lap_numbers is None or len(lap_numbers) > MAX_LAPS:
+        return JsonResponse(
+            {
+                "ok": False,
+                "error": f"laps must be lap numbers or ranges like 20-25, at most {MAX_LAPS} laps.",
+            },
+            status=400,
+        )
+
+    drivers = [driver_number]
+    compare_driver = request.GET.get("compare_driver")
+    if compare_driver:
+        if coerce_int(compare_driver) is None:
+            return JsonResponse({"ok": False, "error": "compare_driver must be an integer."}, status=400)
+        if coerce_int(compare_driver) == driver_number:
+            return JsonResponse(
+                {"ok": False, "error": "compare_driver must differ from driver_number."}, status=400
+            )
+        drivers.append(coerce_int(compare_driver))
+    step_ms = coerce_int(request.GET.get("step_ms") or DEFAULT_STEP_MS)
+    if step_ms is None or not MIN_STEP_MS <= step_ms <= MAX_STEP_MS:
+        return JsonResponse(
+            {"ok": False, "error": f"step_ms must be between {MIN_STEP_MS} and {MAX_STEP_MS}."},
+            status=400,
+        )
+
+    def fetch_rows():
+        return _fetch_laps({"session_key": session_key})
+
+    try:
+        windows, sources = [], []
+        for number in drivers:
+            driver_windows, source = driver_lap_windows(session_key, number, lap_numbers, fetch_rows)
+            windows.append(driver_windows)
+            sources.append(source)
+    except requests.RequestException as e:
+        return JsonResponse({"ok": False, "error": str(e)}, status=502)
+
+    # Only laps every requested driver has boundaries for.
+    found = [number for number in lap_numbers if all(number in by_lap for by_lap in windows)]
+    if not found:
+        return JsonResponse(
+            {"ok": False, "error": "No lap boundaries found for the requested laps."}, status=404
+        )
+    samples = [
+        window_samples(session_key, number, [by_lap[lap] for lap in found])
+        for number, by_lap in zip(drivers, windows)
+    ]
+
+    response = {
+        "ok": True,
+        "session_key": session_key,
+        "missing_laps": [number for number in lap_numbers if number not in found],
+    }
+    if len(drivers) == 1:
+        response["driver_number"] = driver_number
+        response["source"] = sources[0]
+        response["laps"] = [lap_slice(windows[0][lap], samples[0]) for lap in found]
+    else:
+        response["mode"] = "overlay"
+        response["drivers"] = drivers
+        # Lap boundaries of each driver come from the database or OpenF1.
+        response["sources"] = {str(number): source for number, source in zip(drivers, sources)}
+        response["step_ms"] = step_ms
+        response["laps"] = [
+            overlay_lap(lap, [by_lap[lap] for by_lap in windows], samples, drivers, step_ms=step_ms)
+            for lap in found
+        ]
+    return JsonResponse(response)
@@ -2,8 +2,7 @@ import requests
 from django.core.management.base import BaseCommand
 from django.utils.dateparse import parse_datetime
 from apps.meeting.models import Meeting
-
-OPENF1_API_BASE_URL = "https://api.openf1.org/v1"
+from apps.openf1.client import get_client
 
 class Command(BaseCommand):
     help = 'Mendownload dan menyimpan data Meeting dari OpenF1 API'
@@ -12,9 +11,7 @@ class Command(BaseCommand):
         self.stdout.write('Memulai proses fetch data meetings...')
         
         try:
-            meetings_response = requests.get(f"{OPENF1_API_BASE_URL}/meetings")
-            meetings_response.raise_for_status()
-            meetings_data = meetings_response.json()
+            meetings_data = get_client(blocking=True).get_json("meetings")
             meetings_created_count = 0
             meetings_updated_count = 0
             
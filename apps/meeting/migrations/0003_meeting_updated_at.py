@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 10:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting', '0002_alter_meeting_options_meeting_circuit_short_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meeting',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+    ]
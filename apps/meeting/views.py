@@ -4,6 +4,7 @@ from django.shortcuts import render
 from datetime import datetime
 from django.db.models import Q
 from django.core.paginator import Paginator
+from main.conditional import conditional_response, queryset_fingerprint
 from .models import Meeting
 
 def meeting_list_page(request):
@@ -12,6 +13,11 @@ def meeting_list_page(request):
     """
     return render(request, 'meeting_list.html')
 
+def _meeting_list_fingerprint(request):
+    return queryset_fingerprint(Meeting.objects.all())
+
+
+@conditional_response(_meeting_list_fingerprint)
 def api_meeting_list(request):
     """
     API endpoint untuk mengambil data meeting dari OpenF1.
@@ -0,0 +1,3 @@
+"""
+Shared helpers for talking to the OpenF1 API (https://openf1.org).
+"""
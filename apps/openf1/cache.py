@@ -0,0 +1,196 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+LOGGER = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    In-process read-through cache with a TTL and LRU eviction.
+
+    ``get_or_load`` coalesces concurrent misses on the same key: the first
+    caller runs ``loader`` and every other caller waits for its result instead
+    of issuing another upstream request. Exceptions are never cached.
+    The cache is per process, so every gunicorn worker keeps its own copy.
+
+    With ``stale_ttl`` set, an entry that expired less than ``stale_ttl``
+    seconds ago is still returned immediately while ``loader`` runs once in a
+    background thread to replace it. A failed refresh keeps the stale value.
+
+    With ``max_weight`` set, least recently used entries are also evicted
+    while the summed ``weigh(value)`` of all entries exceeds it, so a few
+    huge values cannot hold the whole cache's worth of memory. A value
+    heavier than ``max_weight`` on its own is returned but not kept.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl: float,
+        max_entries: int,
+        name: str = "",
+        stale_ttl: float = 0,
+        max_weight: float | None = None,
+        weigh: Callable[[Any], float] = len,
+    ):
+        self.ttl = float(ttl)
+        self.stale_ttl = float(stale_ttl)
+        self.max_entries = int(max_entries)
+        self.max_weight = max_weight
+        self.weigh = weigh
+        self.name = name
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._weights: dict[Hashable, float] = {}
+        self.weight = 0.0
+        self._inflight: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        *,
+        ttl: float | Callable[[], float] | None = None,
+    ) -> Any:
+        """
+        ``ttl`` overrides the cache default for the entry ``loader`` produces.
+        A callable is only evaluated after ``loader`` runs, so hits never pay
+        for working out the TTL.
+        """
+        stale = False
+        refresh = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                now = time.monotonic()
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                if expires_at + self.stale_ttl > now:
+                    self._entries.move_to_end(key)
+                    self.stale_hits += 1
+                    stale = True
+                    if key not in self._inflight:
+                        refresh = self._inflight[key] = Future()
+                else:
+                    self._discard(key)
+
+            if not stale:
+                pending = self._inflight.get(key)
+                leader = pending is None
+                if leader:
+                    pending = Future()
+                    self._inflight[key] = pending
+                    self.misses += 1
+                else:
+                    self.coalesced += 1
+
+        if stale:
+            if refresh is not None:
+                threading.Thread(
+                    target=self._refresh,
+                    args=(key, loader, ttl, refresh),
+                    name=f"cache-refresh-{self.name or 'ttl'}",
+                    daemon=True,
+                ).start()
+            return value
+
+        if not leader:
+            return pending.result()
+
+        try:
+            value = loader()
+            expires_in = self._resolve_ttl(ttl)
+        except BaseException as exc:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.set_exception(exc)
+            raise
+
+        with self._lock:
+            self._store(key, value, expires_in)
+            self._inflight.pop(key, None)
+        pending.set_result(value)
+        return value
+
+    def _resolve_ttl(self, ttl: float | Callable[[], float] | None) -> float:
+        if ttl is None:
+            return self.ttl
+        return float(ttl() if callable(ttl) else ttl)
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Any], ttl, pending: Future) -> None:
+        try:
+            value = loader()
+            expires_in = self._resolve_ttl(ttl)
+        except Exception as exc:
+            LOGGER.warning("Background refresh of %s %r failed: %s", self.name or "cache", key, exc)
+            with self._lock:
+                self._inflight.pop(key, None)
+                self.refresh_errors += 1
+            pending.set_exception(exc)
+            return
+        with self._lock:
+            self._store(key, value, expires_in)
+            self._inflight.pop(key, None)
+            self.refreshes += 1
+        pending.set_result(value)
+
+    def _store(self, key: Hashable, value: Any, ttl: float) -> None:
+        self._discard(key)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        if self.max_weight is not None:
+            self._weights[key] = weight = float(self.weigh(value))
+            self.weight += weight
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_weight is not None and self.weight > self.max_weight)
+        ):
+            self._discard(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _discard(self, key: Hashable) -> None:
+        if self._entries.pop(key, None) is not None:
+            self.weight -= self._weights.pop(key, 0.0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._weights.clear()
+            self.weight = 0.0
+            self.hits = self.stale_hits = self.misses = self.coalesced = self.evictions = 0
+            self.refreshes = self.refresh_errors = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+            served = self.hits + self.stale_hits + self.coalesced
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "weight": self.weight if self.max_weight is not None else None,
+                "max_weight": self.max_weight,
+                "ttl_seconds": self.ttl,
+                "stale_ttl_seconds": self.stale_ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "hit_ratio": round(served / lookups, 4) if lookups else None,
+            }
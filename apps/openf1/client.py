@@ -0,0 +1,237 @@
+import threading
+import time
+from typing import Any, Iterator, Mapping
+from urllib.parse import quote, urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import InvalidHeader
+from urllib3.util import Retry
+
+from apps.openf1.jsonstream import iter_json_array
+from apps.openf1.ratelimit import RateLimiter
+from main.metrics import MetricsRegistry, upstream_timer
+
+
+OPENF1_API_BASE_URL = "https://api.openf1.org/v1"
+# (connect, read) seconds; the read timeout applies between received bytes.
+OPENF1_TIMEOUT = (5.0, 30.0)
+OPENF1_MAX_RETRIES = 3
+# Retry n sleeps backoff_factor * 2 ** (n - 1), plus up to OPENF1_BACKOFF_JITTER seconds.
+OPENF1_BACKOFF_FACTOR = 0.5
+OPENF1_BACKOFF_JITTER = 0.5
+OPENF1_RETRY_STATUSES = (429, 500, 502, 503, 504)
+OPENF1_POOL_SIZE = 10
+# Used by a non-blocking client when a 429 carries no usable Retry-After.
+OPENF1_DEFAULT_RETRY_AFTER = 1.0
+OPENF1_USER_AGENT = "SpeedView/1.0 (+https://openf1.org/)"
+
+UPSTREAM_METRICS = {
+    "latency_ms": "Time until OpenF1 response headers arrive, retries included",
+    "rate_wait_ms": "Time spent waiting on the client-side rate limiter",
+}
+UPSTREAM_REGISTRY = MetricsRegistry(UPSTREAM_METRICS, label="endpoint")
+
+Params = Mapping[str, Any] | str | None
+
+
+class RateLimited(Exception):
+    """
+    A non-blocking client found the rate limiter empty (nothing was sent)
+    or OpenF1 answered 429.
+    Deliberately not a ``requests.RequestException``, so handlers that treat
+    network errors as "no rows" do not swallow it.
+    """
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"OpenF1 rate limit reached for {endpoint}; retry in {retry_after:.1f}s.")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+def _retry_after(response: requests.Response) -> float:
+    header = response.headers.get("Retry-After")
+    if header:
+        try:
+            return max(float(Retry().parse_retry_after(header)), OPENF1_DEFAULT_RETRY_AFTER)
+        except InvalidHeader:
+            pass
+    return OPENF1_DEFAULT_RETRY_AFTER
+
+
+def comparison_query(params: Mapping[str, Any], *comparisons: tuple) -> str:
+    """
+    Query string for ``params`` plus OpenF1 comparison filters given as
+    ``(field, operator, value)``, e.g. ``("speed", ">=", 310)``. A params dict
+    cannot express these: ``urlencode`` would treat the operator as part of the key.
+    """
+    parts = [urlencode(params, doseq=True)] if params else []
+    parts += [f"{field}{operator}{quote(str(value))}" for field, operator, value in comparisons]
+    return "&".join(parts)
+
+
+class OpenF1Client:
+    """
+    One ``requests.Session`` per client, so calls reuse keep-alive connections
+    from a pool instead of paying a TCP/TLS handshake each time. Every call
+    first takes a token from ``rate_limiter``.
+
+    A ``blocking`` client sleeps until a token is free and retries GETs with
+    jittered exponential backoff on connection errors and on 429/5xx
+    (honouring ``Retry-After``). A non-blocking one never sleeps: an empty
+    limiter or an upstream 429 raises ``RateLimited`` straight away and 5xx
+    responses are returned as they are. Latency is recorded per endpoint in
+    ``UPSTREAM_REGISTRY`` and charged to the current request's upstream time.
+    """
+
+    def __init__(
+        self,
+        *,
+        base_url: str = OPENF1_API_BASE_URL,
+        timeout: float | tuple = OPENF1_TIMEOUT,
+        max_retries: int = OPENF1_MAX_RETRIES,
+        rate_limiter: RateLimiter | None = None,
+        pool_size: int = OPENF1_POOL_SIZE,
+        verify: bool | str = True,
+        blocking: bool = True,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.blocking = blocking
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter.per_second_and_minute()
+        if blocking:
+            retry = Retry(
+                total=max_retries,
+                backoff_factor=OPENF1_BACKOFF_FACTOR,
+                backoff_jitter=OPENF1_BACKOFF_JITTER,
+                status_forcelist=OPENF1_RETRY_STATUSES,
+                allowed_methods=frozenset({"GET"}),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+        else:
+            # Nothing may sleep in a web request: no backoff, no status
+            # retries, no Retry-After waits; only a dropped connection is
+            # retried once, straight away.
+            retry = Retry(
+                total=1,
+                connect=1,
+                read=0,
+                status=0,
+                backoff_factor=0,
+                allowed_methods=frozenset({"GET"}),
+                respect_retry_after_header=False,
+                raise_on_status=False,
+            )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.verify = verify
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # requests already advertises gzip; set it explicitly so it survives header overrides.
+        self.session.headers.update({"User-Agent": OPENF1_USER_AGENT, "Accept-Encoding": "gzip, deflate"})
+
+    def url(self, endpoint: str) -> str:
+        return f"{self.base_url}/{endpoint.lstrip('/')}"
+
+    def get(
+        self,
+        endpoint: str,
+        params: Params = None,
+        *,
+        stream: bool = False,
+        timeout: float | tuple | None = None,
+    ) -> requests.Response:
+        """Raw response for ``endpoint`` (e.g. ``"laps"``); the caller checks the status."""
+        if self.blocking:
+            waited = self.rate_limiter.acquire()
+        else:
+            retry_after = self.rate_limiter.try_acquire()
+            if retry_after:
+                raise RateLimited(endpoint, retry_after)
+            waited = 0.0
+        started = time.perf_counter()
+        failed = True
+        try:
+            with upstream_timer():
+                response = self.session.get(
+                    self.url(endpoint),
+                    params=params,
+                    stream=stream,
+                    timeout=timeout or self.timeout,
+                )
+            if response.status_code == 429 and not self.blocking:
+                response.close()
+                raise RateLimited(endpoint, _retry_after(response))
+            failed = response.status_code >= 500
+            return response
+        finally:
+            UPSTREAM_REGISTRY.record(
+                endpoint,
+                {
+                    "latency_ms": (time.perf_counter() - started) * 1000,
+                    "rate_wait_ms": waited * 1000,
+                },
+                error=failed,
+            )
+
+    def get_json(
+        self,
+        endpoint: str,
+        params: Params = None,
+        *,
+        timeout: float | tuple | None = None,
+    ) -> Any:
+        """Decoded JSON body; raises ``requests.HTTPError`` for 4xx/5xx."""
+        response = self.get(endpoint, params, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def iter_rows(
+        self,
+        endpoint: str,
+        params: Params = None,
+        *,
+        timeout: float | tuple | None = None,
+    ) -> Iterator[dict]:
+        """
+        Stream the elements of a JSON array response without buffering the
+        body. The status is checked before this returns, so HTTP errors are
+        raised here rather than on first iteration.
+        """
+        response = self.get(endpoint, params, stream=True, timeout=timeout)
+        try:
+            response.raise_for_status()
+        except requests.HTTPError:
+            response.close()
+            raise
+        # Let urllib3 undo gzip/deflate while the parser reads.
+        response.raw.decode_content = True
+        return _iter_and_close(response)
+
+
+def _iter_and_close(response: requests.Response) -> Iterator[dict]:
+    try:
+        yield from iter_json_array(response.raw)
+    finally:
+        response.close()
+
+
+_default_clients: dict[bool, OpenF1Client] = {}
+_default_limiter: RateLimiter | None = None
+_default_lock = threading.Lock()
+
+
+def get_client(*, blocking: bool = False) -> OpenF1Client:
+    """
+    The process-wide client. Web views use the default non-blocking one so a
+    worker never sleeps on the rate limiter; management commands and
+    background jobs pass ``blocking=True``. Both share one rate limiter.
+    """
+    global _default_limiter
+    with _default_lock:
+        if blocking not in _default_clients:
+            if _default_limiter is None:
+                _default_limiter = RateLimiter.per_second_and_minute()
+            _default_clients[blocking] = OpenF1Client(rate_limiter=_default_limiter, blocking=blocking)
+        return _default_clients[blocking]
@@ -0,0 +1,77 @@
+from typing import Callable
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.meeting.models import Meeting
+from apps.openf1.client import get_client
+from apps.openf1.ingest import DEFAULT_INGEST_BATCH_SIZE, clamp_batch_size
+
+
+class OpenF1ImportCommand(BaseCommand):
+    """
+    Base for commands that copy one OpenF1 list endpoint into a table, one
+    request per session or meeting. Subclasses set ``endpoint``, ``noun``
+    and ``ingest``, a ``(rows, *, batch_size) -> (written, skipped)``
+    function.
+    """
+
+    endpoint: str
+    noun: str
+    ingest: Callable[..., tuple[int, int]]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--meeting-key",
+            type=int,
+            action="append",
+            dest="meeting_keys",
+            help="Meetings to import. Defaults to every meeting in the database.",
+        )
+        parser.add_argument(
+            "--session-key",
+            type=int,
+            action="append",
+            dest="session_keys",
+            help="Import only these sessions instead of whole meetings.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_INGEST_BATCH_SIZE,
+            help="Rows per INSERT ... ON CONFLICT statement.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = clamp_batch_size(options["batch_size"])
+        if options.get("session_keys"):
+            scopes = [("session_key", key) for key in options["session_keys"]]
+        else:
+            meeting_keys = options.get("meeting_keys") or list(
+                Meeting.objects.order_by("meeting_key").values_list("meeting_key", flat=True)
+            )
+            scopes = [("meeting_key", key) for key in meeting_keys]
+        if not scopes:
+            raise CommandError("No meeting keys found. Add meetings first or pass --meeting-key.")
+
+        client = get_client(blocking=True)
+        total = 0
+        for field, key in scopes:
+            try:
+                rows = client.get_json(self.endpoint, {field: key})
+            except requests.HTTPError as exc:
+                status = exc.response.status_code if exc.response is not None else None
+                if status in (404, 422):
+                    self.stdout.write(self.style.WARNING(f"[-] {field} {key}: {status}, skipped."))
+                    continue
+                raise CommandError(f"API request failed for {field} {key}: {exc}") from exc
+            except requests.RequestException as exc:
+                raise CommandError(f"Network error for {field} {key}: {exc}") from exc
+
+            if not isinstance(rows, list):
+                rows = []
+            written, skipped = self.ingest(rows, batch_size=batch_size)
+            total += written
+            self.stdout.write(f"  {field} {key}: {written} {self.noun} ({skipped} skipped)")
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {total} {self.noun}."))
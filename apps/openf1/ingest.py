@@ -0,0 +1,31 @@
+from itertools import islice
+from typing import Iterable, Iterator
+
+
+DEFAULT_INGEST_BATCH_SIZE = 2000
+MAX_INGEST_BATCH_SIZE = 10000
+
+
+def coerce_int(value) -> int | None:
+    if value in (None, "", "None"):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def clamp_batch_size(value, default: int = DEFAULT_INGEST_BATCH_SIZE) -> int:
+    size = coerce_int(value)
+    if size is None:
+        return default
+    return max(1, min(size, MAX_INGEST_BATCH_SIZE))
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,97 @@
+import codecs
+import io
+import json
+import re
+from typing import Any, Iterator
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+_SEPARATORS = " \t\r\n,"
+_TOKEN_END = re.compile(r'[\s,:\[\]{}"]')
+
+
+def _is_truncated(exc: json.JSONDecodeError, buffer: str) -> bool:
+    """
+    Whether a decode error may only be the element being cut at the end of
+    ``buffer``, i.e. the failing token runs to the end of what was read.
+    """
+    if exc.msg.startswith("Unterminated string"):
+        return True
+    return _TOKEN_END.search(buffer, exc.pos) is None
+
+
+def _iter_text_chunks(source, chunk_size: int) -> Iterator[str]:
+    if isinstance(source, str):
+        yield source
+        return
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(bytes(source))
+
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_json_array(source, *, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array while it is being read.
+
+    ``source`` may be ``bytes``/``str`` or any binary file-like object with
+    ``read(n)`` (e.g. an ``urlopen`` response), so only about one chunk plus
+    one partially received element is held in memory. Anything that is not
+    an array yields nothing. A truncated array yields every element that was
+    complete before the cut, like the old best-effort parser. A malformed
+    element ends the stream the same way instead of waiting for more data.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    started = False
+    chunks = _iter_text_chunks(source, chunk_size)
+    eof = False
+
+    while not eof:
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+        else:
+            buffer = buffer[pos:] + chunk
+            pos = 0
+        size = len(buffer)
+
+        if not started:
+            while pos < size and buffer[pos].isspace():
+                pos += 1
+            if pos >= size:
+                continue
+            if buffer[pos] != "[":
+                return
+            pos += 1
+            started = True
+
+        while True:
+            while pos < size and buffer[pos] in _SEPARATORS:
+                pos += 1
+            if pos >= size:
+                break
+            if buffer[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as exc:
+                if eof or not _is_truncated(exc, buffer):
+                    return
+                break
+            if not eof and _TOKEN_END.search(buffer, end) is None:
+                # A bare number could still be growing; wait for the next chunk.
+                break
+            yield obj
+            pos = end
@@ -0,0 +1,173 @@
+import math
+from datetime import timedelta
+from functools import wraps
+from typing import Callable, Mapping
+
+from django.db.models import QuerySet
+from django.http import JsonResponse
+from django.utils import timezone
+
+from apps.meeting.models import Meeting
+from apps.openf1.cache import TTLCache
+from apps.openf1.ingest import coerce_int
+from apps.openf1.client import RateLimited, get_client
+from apps.session.models import Session
+
+
+# Data for a finished session no longer changes upstream.
+COMPLETED_TTL = 6 * 60 * 60
+# `latest`, live or unknown sessions.
+LIVE_TTL = 30
+# Serve an expired entry for up to this long while it is refreshed in the background.
+STALE_TTL = 10 * 60
+# A session's data is treated as final this long after it starts.
+SESSION_SETTLE_TIME = timedelta(hours=4)
+# A meeting (practice to race) is over this long after it starts.
+MEETING_SETTLE_TIME = timedelta(days=4)
+
+# Full upstream lists for the laps/pit fallbacks, so every page after the
+# first one is sliced from memory. An unfiltered list can hold a whole
+# season, so the cache is bounded by rows, not just entries.
+OPENF1_PROXY_MAX_ROWS = 100_000
+OPENF1_PROXY_CACHE = TTLCache(
+    ttl=LIVE_TTL,
+    stale_ttl=STALE_TTL,
+    max_entries=128,
+    max_weight=OPENF1_PROXY_MAX_ROWS,
+    name="openf1_list_proxy",
+)
+
+
+def _normalise(value) -> str:
+    number = coerce_int(value)
+    return str(number) if number is not None else str(value).strip().lower()
+
+
+def proxy_cache_key(endpoint: str, filters: Mapping) -> tuple:
+    """``("laps", (("meeting_key", "1229"), ...))`` regardless of order or ``"01"`` vs ``"1"``."""
+    return endpoint, tuple(
+        sorted((key, _normalise(value)) for key, value in filters.items() if value not in ("", None))
+    )
+
+
+def proxy_ttl(filters: Mapping) -> float:
+    """``COMPLETED_TTL`` when the filtered session or meeting is known to be over, else ``LIVE_TTL``."""
+    now = timezone.now()
+    session_key = coerce_int(filters.get("session_key"))
+    meeting_key = coerce_int(filters.get("meeting_key"))
+    if session_key is not None:
+        started = (
+            Session.objects.filter(session_key=session_key).values_list("start_time", flat=True).first()
+        )
+        if started is not None:
+            return COMPLETED_TTL if started < now - SESSION_SETTLE_TIME else LIVE_TTL
+    if meeting_key is not None:
+        started = (
+            Meeting.objects.filter(meeting_key=meeting_key).values_list("date_start", flat=True).first()
+        )
+        if started is not None and started < now - MEETING_SETTLE_TIME:
+            return COMPLETED_TTL
+    return LIVE_TTL
+
+
+def fetch_list(endpoint: str, filters: Mapping, prepare: Callable[[list], list] | None = None) -> list:
+    """
+    The full OpenF1 list for ``endpoint`` and ``filters``, through
+    ``OPENF1_PROXY_CACHE``. ``prepare`` post-processes a fresh download
+    before it is cached. Callers must treat the returned rows as read-only.
+    """
+    params = {key: value for key, value in filters.items() if value not in ("", None)}
+
+    def load() -> list:
+        rows = get_client().get_json(endpoint, params=params or None)
+        return prepare(rows) if prepare else rows
+
+    return OPENF1_PROXY_CACHE.get_or_load(
+        proxy_cache_key(endpoint, params), load, ttl=lambda: proxy_ttl(params)
+    )
+
+
+def page_bounds(request, default_limit: int = 20) -> tuple[int, int]:
+    """``(limit, offset)`` from the query string; bad or out-of-range values fall back to the defaults."""
+    try:
+        limit = int(request.GET.get("limit", default_limit))
+    except ValueError:
+        limit = default_limit
+    try:
+        offset = int(request.GET.get("offset", "0"))
+    except ValueError:
+        offset = 0
+    return (limit if limit > 0 else default_limit), max(offset, 0)
+
+
+def imported_scope(queryset: QuerySet, filters: Mapping) -> QuerySet | None:
+    """
+    ``queryset`` narrowed to ``filters`` when they name a numeric
+    ``session_key`` or ``meeting_key`` that has been imported, else ``None``
+    so the caller proxies OpenF1. ``latest`` and unscoped queries always go
+    upstream: the local table cannot tell which meeting is the latest one.
+    """
+    keys = {key: coerce_int(value) for key, value in filters.items()}
+    if any(value is None for value in keys.values()):
+        return None
+    if "session_key" in keys:
+        scope = queryset.filter(session_key=keys["session_key"])
+    elif "meeting_key" in keys:
+        scope = queryset.filter(meeting_key=keys["meeting_key"])
+    else:
+        return None
+    if not scope.exists():
+        return None
+    return queryset.filter(**keys)
+
+
+def page_response(rows: list, total: int, limit: int, offset: int, source: str, **extra) -> JsonResponse:
+    """One page of a list endpoint; ``source`` is ``"db"`` or ``"openf1"``."""
+    end = offset + limit
+    has_more = end < total
+    return JsonResponse(
+        {
+            "ok": True,
+            "source": source,
+            "count": total,
+            "limit": limit,
+            "offset": offset,
+            "next_offset": end if has_more else None,
+            "has_more": has_more,
+            "data": rows,
+            **extra,
+        }
+    )
+
+
+def queryset_page(queryset: QuerySet, fields, serialize: Callable[[dict], dict], limit: int, offset: int) -> JsonResponse:
+    """A page of imported rows, sliced in SQL and serialized in OpenF1 shape."""
+    rows = [serialize(values) for values in queryset.values(*fields)[offset:offset + limit]]
+    return page_response(rows, queryset.count(), limit, offset, "db")
+
+
+def list_page(rows: list, limit: int, offset: int) -> JsonResponse:
+    """A page sliced from a full OpenF1 list returned by ``fetch_list``."""
+    return page_response(rows[offset:offset + limit], len(rows), limit, offset, "openf1")
+
+
+def rate_limited_response(exc: RateLimited) -> JsonResponse:
+    response = JsonResponse(
+        {"ok": False, "error": "OpenF1 is busy, please retry shortly.", "retry_after": round(exc.retry_after, 1)},
+        status=503,
+    )
+    response["Retry-After"] = str(max(1, math.ceil(exc.retry_after)))
+    return response
+
+
+def handles_rate_limits(view):
+    """Answer 503 with ``Retry-After`` when the view's OpenF1 call hits the rate limiter."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except RateLimited as exc:
+            return rate_limited_response(exc)
+
+    return wrapper
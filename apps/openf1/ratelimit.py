@@ -0,0 +1,95 @@
+import threading
+import time
+from typing import Iterable
+
+
+# Free-tier OpenF1 limits: 3 requests per second and 30 requests per minute.
+OPENF1_REQUESTS_PER_SECOND = 3.0
+OPENF1_REQUESTS_PER_MINUTE = 30.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at ``rate`` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available and return the seconds spent waiting."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """
+        Take ``tokens`` without waiting and return 0.0, or take nothing and
+        return the seconds until they would be available.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def release(self, tokens: float = 1.0) -> None:
+        """Give back tokens taken by ``try_acquire`` for a request that was not sent."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + tokens)
+
+
+class RateLimiter:
+    """Acquire from several buckets at once, e.g. a per-second and a per-minute limit."""
+
+    def __init__(self, buckets: Iterable[TokenBucket]):
+        self.buckets = [bucket for bucket in buckets if bucket.rate > 0]
+
+    @classmethod
+    def per_second_and_minute(
+        cls,
+        per_second: float = OPENF1_REQUESTS_PER_SECOND,
+        per_minute: float = OPENF1_REQUESTS_PER_MINUTE,
+    ) -> "RateLimiter":
+        buckets = []
+        if per_second and per_second > 0:
+            buckets.append(TokenBucket(per_second, capacity=per_second))
+        if per_minute and per_minute > 0:
+            buckets.append(TokenBucket(per_minute / 60.0, capacity=per_minute))
+        return cls(buckets)
+
+    def acquire(self) -> float:
+        return sum(bucket.acquire() for bucket in self.buckets)
+
+    def try_acquire(self) -> float:
+        """
+        Take a token from every bucket without waiting and return 0.0, or
+        take none and return the seconds until the first empty bucket refills.
+        """
+        taken = []
+        for bucket in self.buckets:
+            delay = bucket.try_acquire()
+            if delay:
+                for other in taken:
+                    other.release()
+                return delay
+            taken.append(bucket)
+        return 0.0
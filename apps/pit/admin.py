@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import PitStop
+
+
+@admin.register(PitStop)
+class PitStopAdmin(admin.ModelAdmin):
+    list_display = ('session_key', 'driver_number', 'lap_number', 'pit_duration', 'date')
+    list_filter = ('meeting_key', 'session_key', 'driver_number')
+    search_fields = ('session_key', 'driver_number')
+    ordering = ('session_key', 'date')
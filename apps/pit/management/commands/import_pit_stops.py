@@ -0,0 +1,9 @@
+from apps.openf1.importer import OpenF1ImportCommand
+from apps.pit.services import ingest_pit_stops
+
+
+class Command(OpenF1ImportCommand):
+    help = "Import pit stops from OpenF1 /pit into the PitStop table (one request per session or meeting)."
+    endpoint = "pit"
+    noun = "pit stops"
+    ingest = staticmethod(ingest_pit_stops)
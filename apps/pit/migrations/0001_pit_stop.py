@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 10:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PitStop',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('meeting_key', models.PositiveIntegerField(blank=True, db_index=True, null=True)),
+                ('session_key', models.PositiveIntegerField()),
+                ('driver_number', models.PositiveSmallIntegerField(db_index=True)),
+                ('lap_number', models.PositiveSmallIntegerField()),
+                ('date', models.DateTimeField(blank=True, null=True)),
+                ('pit_duration', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['session_key', 'date', 'driver_number'],
+                'indexes': [models.Index(fields=['session_key', 'lap_number'], name='pit_session_lap_idx')],
+                'constraints': [models.UniqueConstraint(fields=('session_key', 'driver_number', 'lap_number'), name='pit_session_driver_lap_uniq')],
+            },
+        ),
+    ]
@@ -1 +1,29 @@
+from django.db import models
 
+
+class PitStop(models.Model):
+    """One pit stop from OpenF1 ``/pit``, keyed by (session_key, driver_number, lap_number)."""
+
+    meeting_key = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    session_key = models.PositiveIntegerField()
+    driver_number = models.PositiveSmallIntegerField(db_index=True)
+    lap_number = models.PositiveSmallIntegerField()
+    date = models.DateTimeField(null=True, blank=True)
+    pit_duration = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["session_key", "date", "driver_number"]
+        constraints = [
+            # Also the index for session and session+driver lookups.
+            models.UniqueConstraint(
+                fields=["session_key", "driver_number", "lap_number"],
+                name="pit_session_driver_lap_uniq",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["session_key", "lap_number"], name="pit_session_lap_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.session_key} #{self.driver_number} lap {self.lap_number}"
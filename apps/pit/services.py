@@ -0,0 +1,88 @@
+from typing import Iterable, List
+
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max, Min, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Round
+from django.utils.dateparse import parse_datetime
+
+from apps.car.services import upsert_rows
+from apps.driver.models import DriverEntry
+from apps.openf1.ingest import DEFAULT_INGEST_BATCH_SIZE, chunked, coerce_int
+from apps.pit.models import PitStop
+
+
+PIT_UNIQUE_FIELDS = ["session_key", "driver_number", "lap_number"]
+PIT_UPDATE_FIELDS = ["meeting_key", "date", "pit_duration", "updated_at"]
+PIT_API_FIELDS = ["meeting_key", *PIT_UNIQUE_FIELDS, "date", "pit_duration"]
+SUMMARY_GROUPS = ("driver", "team")
+
+
+def pit_stop_from_openf1_row(entry: dict) -> PitStop | None:
+    """Build an unsaved ``PitStop`` from one OpenF1 ``/pit`` row, or ``None`` if unusable."""
+    session_key = coerce_int(entry.get("session_key"))
+    driver_number = coerce_int(entry.get("driver_number"))
+    lap_number = coerce_int(entry.get("lap_number"))
+    if session_key is None or driver_number is None or lap_number is None:
+        return None
+
+    raw_date = entry.get("date")
+    duration = entry.get("pit_duration")
+    try:
+        duration = float(duration) if duration is not None else None
+    except (TypeError, ValueError):
+        duration = None
+    return PitStop(
+        meeting_key=coerce_int(entry.get("meeting_key")),
+        session_key=session_key,
+        driver_number=driver_number,
+        lap_number=lap_number,
+        date=parse_datetime(raw_date) if isinstance(raw_date, str) else None,
+        pit_duration=duration,
+    )
+
+
+def ingest_pit_stops(rows: Iterable[dict], *, batch_size: int = DEFAULT_INGEST_BATCH_SIZE) -> tuple[int, int]:
+    """Parse and upsert OpenF1 ``/pit`` rows. Returns ``(written, skipped)``."""
+    written = skipped = 0
+    for chunk in chunked(rows, batch_size):
+        stops = [stop for stop in map(pit_stop_from_openf1_row, chunk) if stop is not None]
+        skipped += len(chunk) - len(stops)
+        with transaction.atomic():
+            written += sum(upsert_rows(PitStop, stops, PIT_UNIQUE_FIELDS, PIT_UPDATE_FIELDS, batch_size=batch_size))
+    return written, skipped
+
+
+def pit_summary(stops: QuerySet, group_by: str) -> List[dict]:
+    """
+    Per-session pit stop count and min/mean/max ``pit_duration`` grouped by
+    driver or by team, in one ``GROUP BY`` query. The team is the one on the
+    driver's ``DriverEntry`` for that session; stops without one group under
+    ``team=None``.
+    """
+    if group_by == "team":
+        team = DriverEntry.objects.filter(
+            driver_id=OuterRef("driver_number"), session_key=OuterRef("session_key")
+        ).values("team_id")[:1]
+        stops = stops.annotate(team=Subquery(team))
+        key = "team"
+    else:
+        key = "driver_number"
+
+    rows = (
+        stops.order_by()
+        .values("session_key", key)
+        .annotate(
+            stops=Count("id"),
+            mean_pit_duration=Round(Avg("pit_duration"), 3),
+            min_pit_duration=Min("pit_duration"),
+            max_pit_duration=Max("pit_duration"),
+        )
+        .order_by("session_key", F("mean_pit_duration").asc(nulls_last=True), key)
+    )
+    return list(rows)
+
+
+def serialize_pit_stop(values: dict) -> dict:
+    """A ``values(*PIT_API_FIELDS)`` row in OpenF1 /pit shape."""
+    date = values.get("date")
+    return {**values, "date": date.isoformat() if date else None}
@@ -1,14 +1,22 @@
 from types import SimpleNamespace
-from unittest.mock import Mock, patch
+from unittest.mock import patch
 
 from django.test import TestCase, Client
 from django.urls import reverse
 
+from apps.driver.models import Driver, DriverEntry
+from apps.meeting.models import Meeting
+from apps.openf1.proxy import OPENF1_PROXY_CACHE
+from apps.team.models import Team
+
 from . import views 
+from .models import PitStop
+from .services import ingest_pit_stops
 
 
 class PitViewsTest(TestCase):
     def setUp(self):
+        OPENF1_PROXY_CACHE.clear()
         self.client = Client()
 
     # ---------- helper tests ----------
@@ -27,17 +35,14 @@ class PitViewsTest(TestCase):
         self.assertEqual(resp.status_code, 200)
 
     # ---------- API tests ----------
-    @patch("apps.pit.views.requests.get")
-    def test_api_pit_list_success_without_params(self, mock_get):
+    @patch("apps.openf1.proxy.get_client")
+    def test_api_pit_list_success_without_params(self, mock_client):
         payload = [
             {"date": "2024-05-01T12:34:56", "driver_number": 1},
             {"date": "bad-date", "driver_number": 2},
             {"date": None, "driver_number": 3},
         ]
-        mock_resp = Mock()
-        mock_resp.json.return_value = payload
-        mock_resp.raise_for_status.return_value = None
-        mock_get.return_value = mock_resp
+        mock_client.return_value.get_json.return_value = payload
 
         url = reverse("pit:api_pit_list")
         resp = self.client.get(url)
@@ -52,19 +57,15 @@ class PitViewsTest(TestCase):
         self.assertEqual(js["data"][1]["date_str"], "bad-date")      
         self.assertIsNone(js["data"][2]["date_str"])
 
-        # cek pemanggilan requests.get (tanpa params)
-        mock_get.assert_called_once_with(
-            f"{views.OPENF1_API_BASE_URL}/pit",
+        # cek pemanggilan client OpenF1 (tanpa params)
+        mock_client.return_value.get_json.assert_called_once_with(
+            "pit",
             params=None,
-            timeout=20,
         )
 
-    @patch("apps.pit.views.requests.get")
-    def test_api_pit_list_success_with_params(self, mock_get):
-        mock_resp = Mock()
-        mock_resp.json.return_value = []
-        mock_resp.raise_for_status.return_value = None
-        mock_get.return_value = mock_resp
+    @patch("apps.openf1.proxy.get_client")
+    def test_api_pit_list_success_with_params(self, mock_client):
+        mock_client.return_value.get_json.return_value = []
 
         url = (
             reverse("pit:api_pit_list")
@@ -75,17 +76,16 @@ class PitViewsTest(TestCase):
         self.assertTrue(resp.json()["ok"])
 
         # pastikan params diteruskan persis
-        mock_get.assert_called_once_with(
-            f"{views.OPENF1_API_BASE_URL}/pit",
+        mock_client.return_value.get_json.assert_called_once_with(
+            "pit",
             params={"session_key": "11", "driver_number": "44", "lap_number": "7", "meeting_key": "2024"},
-            timeout=20,
         )
 
-    @patch("apps.pit.views.requests.get")
-    def test_api_pit_list_request_exception(self, mock_get):
+    @patch("apps.openf1.proxy.get_client")
+    def test_api_pit_list_request_exception(self, mock_client):
         import requests
 
-        mock_get.side_effect = requests.RequestException("boom")
+        mock_client.return_value.get_json.side_effect = requests.RequestException("boom")
         resp = self.client.get(reverse("pit:api_pit_list"))
         self.assertEqual(resp.status_code, 200)
         js = resp.json()
@@ -93,3 +93,70 @@ class PitViewsTest(TestCase):
         self.assertEqual(js["count"], 0)
         self.assertEqual(js["data"], [])
         self.assertIn("boom", js["warning"])
+
+
+def _openf1_stop(session_key, driver_number, lap_number, pit_duration):
+    return {
+        "meeting_key": 1200,
+        "session_key": session_key,
+        "driver_number": driver_number,
+        "lap_number": lap_number,
+        "date": f"2024-05-01T13:{lap_number:02d}:00+00:00",
+        "pit_duration": pit_duration,
+    }
+
+
+class PitStopPersistenceTest(TestCase):
+    def setUp(self):
+        OPENF1_PROXY_CACHE.clear()
+        ingest_pit_stops([
+            _openf1_stop(5, 1, 20, 22.0),
+            _openf1_stop(5, 1, 40, 24.0),
+            _openf1_stop(5, 11, 22, 21.5),
+            _openf1_stop(5, 44, 18, 25.25),
+            _openf1_stop(6, 1, 30, 30.0),
+        ])
+
+    def test_ingest_upserts_on_session_driver_lap(self):
+        written, skipped = ingest_pit_stops([_openf1_stop(5, 1, 20, 23.0), {"session_key": 5}])
+        self.assertEqual((written, skipped), (1, 1))
+        self.assertEqual(PitStop.objects.count(), 5)
+        self.assertEqual(PitStop.objects.get(session_key=5, driver_number=1, lap_number=20).pit_duration, 23.0)
+
+    @patch("apps.openf1.proxy.get_client")
+    def test_list_filters_and_paginates_in_sql(self, mock_client):
+        url = reverse("pit:api_pit_list")
+        with self.assertNumQueries(3):
+            js = self.client.get(url, {"session_key": 5, "limit": 2, "offset": 1}).json()
+        self.assertEqual(js["source"], "db")
+        self.assertEqual((js["count"], js["next_offset"]), (4, 3))
+        self.assertEqual([row["lap_number"] for row in js["data"]], [20, 22])
+        self.assertEqual(js["data"][0]["date_str"], "01 May, 13:20")
+
+        js = self.client.get(url, {"session_key": 5, "driver_number": 1}).json()
+        self.assertEqual([row["pit_duration"] for row in js["data"]], [22.0, 24.0])
+        mock_client.assert_not_called()
+
+    def test_summary_per_driver_and_team(self):
+        meeting = Meeting.objects.create(meeting_key=1200)
+        team = Team.objects.create(team_name="Red Bull Racing", team_colour="3671C6")
+        for number in (1, 11):
+            driver = Driver.objects.create(driver_number=number)
+            DriverEntry.objects.create(driver=driver, session_key=5, meeting=meeting, team=team)
+
+        url = reverse("pit:api_pit_summary")
+        with self.assertNumQueries(1):
+            drivers = self.client.get(url, {"session_key": 5}).json()["data"]
+        self.assertEqual(
+            [(row["driver_number"], row["stops"], row["mean_pit_duration"]) for row in drivers],
+            [(11, 1, 21.5), (1, 2, 23.0), (44, 1, 25.25)],
+        )
+
+        teams = self.client.get(url, {"meeting_key": 1200, "group_by": "team"}).json()["data"]
+        self.assertEqual(
+            [(row["session_key"], row["team"], row["stops"], row["mean_pit_duration"]) for row in teams],
+            [(5, "Red Bull Racing", 3, 22.5), (5, None, 1, 25.25), (6, None, 1, 30.0)],
+        )
+
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {"session_key": 5, "group_by": "lap"}).status_code, 400)
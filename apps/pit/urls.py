@@ -6,4 +6,5 @@ app_name = "pit"
 urlpatterns = [
     path("", views.pit_list_page, name="pit_list_page"),
     path("api/", views.api_pit_list, name="api_pit_list"),
+    path("api/summary/", views.api_pit_summary, name="api_pit_summary"),
 ]
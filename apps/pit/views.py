@@ -2,9 +2,22 @@ import logging
 import requests
 from django.http import JsonResponse
 from django.shortcuts import render
+from django.views.decorators.http import require_GET
 from datetime import datetime
 
-OPENF1_API_BASE_URL = "https://api.openf1.org/v1"
+from apps.openf1.ingest import coerce_int
+from apps.openf1.proxy import (
+    fetch_list,
+    handles_rate_limits,
+    imported_scope,
+    list_page,
+    page_bounds,
+    page_response,
+    queryset_page,
+)
+from apps.pit.models import PitStop
+from apps.pit.services import PIT_API_FIELDS, SUMMARY_GROUPS, pit_summary, serialize_pit_stop
+
 LOGGER = logging.getLogger(__name__)
 
 
@@ -25,6 +38,19 @@ def _fmt(dt):
         return dt
 
 
+def _with_date_str(data: list) -> list:
+    for row in data:
+        row["date_str"] = _fmt(row.get("date"))
+    return data
+
+
+def _serialize(values: dict) -> dict:
+    row = serialize_pit_stop(values)
+    row["date_str"] = _fmt(row["date"])
+    return row
+
+
+@handles_rate_limits
 def api_pit_list(request):
     # filter utama
     filters = {}
@@ -34,59 +60,49 @@ def api_pit_list(request):
             filters[key] = val
 
     # parameter pagination
-    try:
-        limit = int(request.GET.get("limit", "20"))
-    except ValueError:
-        limit = 20
-    try:
-        offset = int(request.GET.get("offset", "0"))
-    except ValueError:
-        offset = 0
+    limit, offset = page_bounds(request)
 
-    if limit <= 0:
-        limit = 20
-    if offset < 0:
-        offset = 0
+    stops = imported_scope(PitStop.objects.all(), filters)
+    if stops is not None:
+        stops = stops.order_by("session_key", "date", "driver_number", "lap_number")
+        return queryset_page(stops, PIT_API_FIELDS, _serialize, limit, offset)
 
+    # Sesi yang belum di-import: ambil langsung dari OpenF1.
     try:
-        r = requests.get(
-            f"{OPENF1_API_BASE_URL}/pit", params=filters or None, timeout=20
-        )
-        r.raise_for_status()
-        data = r.json()
-        for row in data:
-            row["date_str"] = _fmt(row.get("date"))
-
-        total = len(data)
-        start = offset
-        end = offset + limit
-        sliced = data[start:end]
+        return list_page(fetch_list("pit", filters, prepare=_with_date_str), limit, offset)
+    except requests.RequestException as e:
+        LOGGER.warning("Failed to fetch pit data from OpenF1: %s", e)
+        return page_response([], 0, limit, offset, "openf1", warning=str(e))
 
-        has_more = end < total
-        next_offset = end if has_more else None
 
+@require_GET
+def api_pit_summary(request):
+    """
+    Pit stop count and min/mean/max ``pit_duration`` per driver (default) or
+    per team, for each session of ``session_key`` or ``meeting_key``.
+    Only imported pit stops are summarised.
+    """
+    group_by = request.GET.get("group_by") or "driver"
+    if group_by not in SUMMARY_GROUPS:
         return JsonResponse(
-            {
-                "ok": True,
-                "count": total,
-                "limit": limit,
-                "offset": offset,
-                "next_offset": next_offset,
-                "has_more": has_more,
-                "data": sliced,
-            }
+            {"ok": False, "error": f"group_by must be one of: {', '.join(SUMMARY_GROUPS)}."},
+            status=400,
         )
-    except requests.RequestException as e:
-        LOGGER.warning("Failed to fetch pit data from OpenF1: %s", e)
+
+    stops = PitStop.objects.all()
+    scoped = False
+    for key in ("session_key", "meeting_key", "driver_number"):
+        raw = request.GET.get(key)
+        if raw in (None, ""):
+            continue
+        value = coerce_int(raw)
+        if value is None:
+            return JsonResponse({"ok": False, "error": f"{key} must be an integer."}, status=400)
+        stops = stops.filter(**{key: value})
+        scoped = scoped or key != "driver_number"
+    if not scoped:
         return JsonResponse(
-            {
-                "ok": True,
-                "count": 0,
-                "limit": limit,
-                "offset": offset,
-                "next_offset": None,
-                "has_more": False,
-                "data": [],
-                "warning": str(e),
-            }
+            {"ok": False, "error": "session_key or meeting_key is required."}, status=400
         )
+
+    return JsonResponse({"ok": True, "group_by": group_by, "data": pit_summary(stops, group_by)})
@@ -2,10 +2,9 @@ import requests
 from django.core.management.base import BaseCommand
 from django.utils.dateparse import parse_datetime
 from apps.meeting.models import Meeting
+from apps.openf1.client import get_client
 from apps.session.models import Session
 
-OPENF1_API_BASE_URL = "https://api.openf1.org/v1"
-
 class Command(BaseCommand):
     help = 'Mendownload dan menyimpan data Meeting dan Session dari OpenF1 API'
 
@@ -15,9 +14,7 @@ class Command(BaseCommand):
         # 1. Fetch dan simpan Meetings
         self.stdout.write('Mengambil data meetings...')
         try:
-            meetings_response = requests.get(f"{OPENF1_API_BASE_URL}/meetings")
-            meetings_response.raise_for_status()
-            meetings_data = meetings_response.json()
+            meetings_data = get_client(blocking=True).get_json("meetings")
             
             meetings_created_count = 0
             meetings_updated_count = 0
@@ -53,9 +50,7 @@ class Command(BaseCommand):
             for meeting_key in all_meeting_keys:
                 self.stdout.write(f'  - Mengambil session untuk meeting_key: {meeting_key}...', ending=' ')
                 try:
-                    sessions_response = requests.get(f"{OPENF1_API_BASE_URL}/sessions?meeting_key={meeting_key}")
-                    sessions_response.raise_for_status()
-                    sessions_data = sessions_response.json()
+                    sessions_data = get_client(blocking=True).get_json("sessions", {"meeting_key": meeting_key})
                     
                     if not sessions_data:
                         self.stdout.write('Tidak ada data.')
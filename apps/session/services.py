@@ -6,11 +6,11 @@ from django.db import IntegrityError
 from django.utils.dateparse import parse_datetime
 
 from apps.meeting.models import Meeting
+from apps.openf1.client import RateLimited, get_client
 from apps.session.models import Session
 
 
 LOGGER = logging.getLogger(__name__)
-OPENF1_SESSIONS_URL = "https://api.openf1.org/v1/sessions"
 
 
 def ensure_sessions_for_meetings(
@@ -53,13 +53,13 @@ def ensure_sessions_for_meetings(
             continue
 
         try:
-            response = requests.get(
-                OPENF1_SESSIONS_URL,
+            response = get_client().get(
+                "sessions",
                 params={"meeting_key": meeting_key},
                 timeout=timeout,
             )
             response.raise_for_status()
-        except requests.RequestException as exc:
+        except (requests.RequestException, RateLimited) as exc:
             LOGGER.warning(
                 "Failed to pull sessions for meeting %s: %s",
                 meeting_key,
@@ -7,6 +7,8 @@ from django.db import IntegrityError, transaction
 from django.urls import reverse
 from django.contrib.auth import authenticate
 
+from main.conditional import conditional_response, queryset_fingerprint
+
 from .models import Team
 from .forms import TeamForm
 
@@ -133,7 +135,12 @@ def edit_team_page(request, team_name):
 
 
 # ================== API ==================
+def _team_list_fingerprint(request):
+    return queryset_fingerprint(Team.objects.all())
+
+
 @require_GET
+@conditional_response(_team_list_fingerprint)
 def api_team_list(request):
     teams = Team.objects.all()
     data = [serialize_team(t) for t in teams]
@@ -227,6 +234,7 @@ def api_team_delete(request, team_name):
 # ================== Mobile API ==================
 
 @require_GET
+@conditional_response(_team_list_fingerprint)
 def api_mobile_team_list(request):
     teams = Team.objects.all().order_by('team_name')
     data = [serialize_team(t) for t in teams]
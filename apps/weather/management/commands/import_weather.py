@@ -2,11 +2,10 @@ import requests
 from django.core.management.base import BaseCommand
 from django.utils.dateparse import parse_datetime
 from apps.meeting.models import Meeting
+from apps.openf1.client import get_client
 from apps.weather.models import Weather
 from django.db import IntegrityError
 
-OPENF1_API_BASE_URL = "https://api.openf1.org/v1"
-
 class Command(BaseCommand):
     help = 'Mendownload dan menyimpan data Weather dari OpenF1 API untuk semua meeting'
 
@@ -23,9 +22,7 @@ class Command(BaseCommand):
         for meeting in all_meetings:
             self.stdout.write(f'  - Mengambil cuaca untuk: {meeting.meeting_name} ({meeting.year})...', ending=' ')
             try:
-                weather_response = requests.get(f"{OPENF1_API_BASE_URL}/weather?meeting_key={meeting.meeting_key}")
-                weather_response.raise_for_status()
-                weather_data = weather_response.json()
+                weather_data = get_client(blocking=True).get_json("weather", {"meeting_key": meeting.meeting_key})
                 
                 if not weather_data:
                     self.stdout.write('Tidak ada data.')
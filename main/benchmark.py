@@ -0,0 +1,344 @@
+import io
+import itertools
+import json
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.car.management.commands.import_car_data import Command as ImportCarDataCommand
+from apps.car.models import Car
+from apps.car.services import RelatedRecordResolver, ingest_openf1_rows
+from apps.driver.models import Driver
+from apps.meeting.models import Meeting
+from apps.openf1.ingest import DEFAULT_INGEST_BATCH_SIZE
+from apps.session.models import Session
+from apps.weather.models import Weather
+
+
+SESSION_NAMES = ("Practice 1", "Practice 2", "Practice 3", "Qualifying", "Race")
+# Keys well above anything OpenF1 hands out, so a seeded DB is obvious.
+BASE_MEETING_KEY = 90000
+SEED_BATCH_SIZE = 5000
+TELEMETRY_FIELDS = ("speed", "rpm", "throttle", "brake", "n_gear", "drs")
+# A case regresses when its median is this much slower than the baseline.
+DEFAULT_TOLERANCE = 0.25
+
+
+@dataclass(frozen=True)
+class SeasonSpec:
+    """Shape of the synthetic season. Defaults mirror a real calendar."""
+
+    meetings: int = 24
+    sessions_per_meeting: int = 5
+    drivers: int = 20
+    hz: float = 3.7
+    session_seconds: int = 60
+    year: int = 2024
+    seed: int = 0
+
+    @property
+    def samples_per_driver(self) -> int:
+        return max(2, int(self.session_seconds * self.hz))
+
+    @property
+    def car_rows(self) -> int:
+        return self.meetings * self.sessions_per_meeting * self.drivers * self.samples_per_driver
+
+    def session_key(self, meeting_index: int, session_index: int) -> int:
+        return (BASE_MEETING_KEY + meeting_index) * 10 + session_index
+
+    def meeting_key(self, meeting_index: int) -> int:
+        return BASE_MEETING_KEY + meeting_index
+
+
+def _session_start(spec: SeasonSpec, meeting_index: int, session_index: int) -> datetime:
+    weekend = datetime(spec.year, 3, 1, 11, tzinfo=dt_timezone.utc) + timedelta(weeks=meeting_index)
+    return weekend + timedelta(hours=6 * session_index)
+
+
+def telemetry_arrays(spec: SeasonSpec, session_key: int, driver_number: int) -> Dict[str, np.ndarray]:
+    """
+    Deterministic, lap-shaped telemetry for one driver in one session:
+    straights at ~320 km/h, braking zones, matching gear/rpm and DRS on
+    the fastest stretches.
+    """
+    rng = np.random.default_rng([spec.seed, session_key, driver_number])
+    count = spec.samples_per_driver
+    step_ms = 1000.0 / spec.hz
+    offsets = np.cumsum(np.r_[0, rng.normal(step_ms, step_ms * 0.05, count - 1)]).astype(np.int64)
+
+    # Roughly one 90 s lap, shifted per driver so cars are not in lockstep.
+    phase = (offsets / 90000.0 + driver_number / spec.drivers) * 2 * np.pi
+    profile = np.sin(phase) + 0.35 * np.sin(3 * phase)
+    speed = np.clip(200 + 95 * profile + rng.normal(0, 4, count), 70, 345).astype(np.int64)
+    decelerating = np.r_[False, np.diff(speed) < -6]
+    throttle = np.where(decelerating, 0, np.clip(40 + speed / 3.2, 0, 100)).astype(np.int64)
+    n_gear = np.clip(speed // 42 + 1, 1, 8).astype(np.int64)
+    rpm = np.clip(7000 + (speed % 42) * 120 + rng.normal(0, 150, count), 4000, 13500).astype(np.int64)
+    return {
+        "offset_ms": offsets,
+        "speed": speed,
+        "rpm": rpm,
+        "throttle": throttle,
+        "brake": np.where(decelerating, 100, 0),
+        "n_gear": n_gear,
+        "drs": np.where(speed > 300, 12, 0),
+    }
+
+
+def _samples(spec: SeasonSpec, session_key: int, driver_number: int, start: datetime) -> Iterator[tuple]:
+    arrays = telemetry_arrays(spec, session_key, driver_number)
+    for offset, *values in zip(*(arrays[name].tolist() for name in ("offset_ms", *TELEMETRY_FIELDS))):
+        yield start + timedelta(milliseconds=offset), values
+
+
+def openf1_rows(spec: SeasonSpec, meeting_key: int, session_key: int, driver_number: int, start: datetime) -> Iterator[dict]:
+    """The same telemetry shaped like OpenF1 ``car_data`` rows."""
+    for date, values in _samples(spec, session_key, driver_number, start):
+        yield {
+            "meeting_key": meeting_key,
+            "session_key": session_key,
+            "driver_number": driver_number,
+            "date": date.isoformat(),
+            **dict(zip(TELEMETRY_FIELDS, values)),
+        }
+
+
+def _session_cars(spec: SeasonSpec, meeting_key: int, session_key: int, start: datetime) -> Iterator[Car]:
+    for driver_number in range(1, spec.drivers + 1):
+        for date, values in _samples(spec, session_key, driver_number, start):
+            yield Car(
+                driver_number=driver_number,
+                driver_id=driver_number,
+                session_key=session_key,
+                meeting_key=meeting_key,
+                date=date,
+                **dict(zip(TELEMETRY_FIELDS, values)),
+            )
+
+
+def build_season(spec: SeasonSpec, log: Callable[[str], None] = lambda message: None) -> int:
+    """
+    Populate meetings, sessions, drivers, weather and ``Car`` telemetry for
+    ``spec`` in the current database. Returns the number of ``Car`` rows.
+    """
+    Driver.objects.bulk_create(
+        [
+            Driver(driver_number=number, full_name=f"Driver {number}", name_acronym=f"D{number:02d}"[:3])
+            for number in range(1, spec.drivers + 1)
+        ],
+        ignore_conflicts=True,
+    )
+
+    written = 0
+    for meeting_index in range(spec.meetings):
+        meeting_key = spec.meeting_key(meeting_index)
+        meeting = Meeting.objects.create(
+            meeting_key=meeting_key,
+            meeting_name=f"Benchmark Grand Prix {meeting_index + 1}",
+            circuit_short_name=f"Circuit {meeting_index + 1}",
+            country_name=f"Country {meeting_index + 1}",
+            year=spec.year,
+            date_start=_session_start(spec, meeting_index, 0),
+        )
+        sessions = [
+            Session(
+                session_key=spec.session_key(meeting_index, session_index),
+                meeting_key=meeting_key,
+                name=SESSION_NAMES[session_index % len(SESSION_NAMES)],
+                start_time=_session_start(spec, meeting_index, session_index),
+            )
+            for session_index in range(spec.sessions_per_meeting)
+        ]
+        Session.objects.bulk_create(sessions)
+        Weather.objects.bulk_create(
+            [
+                Weather(
+                    meeting=meeting,
+                    date=session.start_time + timedelta(minutes=minute),
+                    air_temperature=24.0,
+                    track_temperature=38.0,
+                    humidity=50.0,
+                )
+                for session in sessions
+                for minute in range(0, 60, 5)
+            ]
+        )
+        for session in sessions:
+            cars = _session_cars(spec, meeting_key, session.session_key, session.start_time)
+            while True:
+                batch = [car for _, car in zip(range(SEED_BATCH_SIZE), cars)]
+                if not batch:
+                    break
+                Car.objects.bulk_create(batch, batch_size=SEED_BATCH_SIZE)
+                written += len(batch)
+        log(f"  meeting {meeting_index + 1}/{spec.meetings}: {written:,} car rows")
+    return written
+
+
+@dataclass
+class CaseResult:
+    name: str
+    iterations: int
+    median_ms: float
+    p95_ms: float
+    queries: int
+    response_bytes: int | None = None
+    rows: int | None = None
+    rows_per_s: float | None = None
+
+
+def _measure(name: str, iterations: int, run: Callable[[int], tuple]) -> CaseResult:
+    """
+    Time ``run(iteration)`` after one untimed warm-up call. ``run`` returns
+    ``(response_bytes, rows)``, either of which may be ``None``.
+    """
+    run(-1)
+    timings: List[float] = []
+    queries = 0
+    size = rows = None
+    for iteration in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            size, rows = run(iteration)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = max(queries, len(captured))
+    ordered = sorted(timings)
+    median = statistics.median(ordered)
+    return CaseResult(
+        name=name,
+        iterations=iterations,
+        median_ms=round(median, 2),
+        p95_ms=round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 2),
+        queries=queries,
+        response_bytes=size,
+        rows=rows,
+        rows_per_s=round(rows / (median / 1000), 1) if rows and median else None,
+    )
+
+
+def _http_case(client: Client, url: str, params: dict) -> Callable[[int], tuple]:
+    def run(iteration):
+        response = client.get(url, params)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} returned {response.status_code}")
+        return len(response.content), None
+
+    return run
+
+
+def _fresh_sessions(spec: SeasonSpec) -> Iterator[Tuple[int, int, datetime]]:
+    """
+    ``(meeting_key, session_key, start)`` for meetings after the seeded
+    season, so every ingest call measures inserts rather than no-op upserts.
+    """
+    for meeting_index in itertools.count(spec.meetings):
+        yield spec.meeting_key(meeting_index), spec.session_key(meeting_index, 0), _session_start(spec, meeting_index, 0)
+
+
+def _session_rows(spec: SeasonSpec, meeting_key: int, session_key: int, start: datetime) -> Iterator[dict]:
+    for driver_number in range(1, spec.drivers + 1):
+        yield from openf1_rows(spec, meeting_key, session_key, driver_number, start)
+
+
+def _store_batch_case(spec: SeasonSpec, sessions: Iterator[tuple]) -> Callable[[int], tuple]:
+    """``import_car_data._store_batch`` on one full session of fresh rows."""
+    command = ImportCarDataCommand(stdout=io.StringIO())
+    command._batch_size = DEFAULT_INGEST_BATCH_SIZE
+    command._resolver = RelatedRecordResolver()
+    command._touched_pairs = set()
+
+    def run(iteration):
+        batch = list(_session_rows(spec, *next(sessions)))
+        created, updated = command._store_batch(batch=batch, dry_run=False, create_only=False)
+        return None, created + updated
+
+    return run
+
+
+def _ingest_case(spec: SeasonSpec, sessions: Iterator[tuple]) -> Callable[[int], tuple]:
+    """The refresh path: parse, upsert, then trace/stats refresh for one session."""
+
+    def run(iteration):
+        result = ingest_openf1_rows(_session_rows(spec, *next(sessions)))
+        return None, result.created + result.updated
+
+    return run
+
+
+def run_suite(spec: SeasonSpec, iterations: int = 5) -> List[CaseResult]:
+    """Run every case against a database already seeded with ``build_season(spec)``."""
+    client = Client(HTTP_HOST="localhost")
+    fresh = _fresh_sessions(spec)
+    middle = spec.meetings // 2
+    meeting_key = spec.meeting_key(middle)
+    race_key = spec.session_key(middle, spec.sessions_per_meeting - 1)
+    cases = [
+        ("grouped_meeting_rows", _http_case(client, reverse("car:api_grouped"), {"meeting_key": meeting_key})),
+        (
+            "grouped_meeting_columnar",
+            _http_case(
+                client,
+                reverse("car:api_grouped"),
+                {"meeting_key": meeting_key, "format": "columnar", "max_points": 500},
+            ),
+        ),
+        (
+            "grouped_driver",
+            _http_case(client, reverse("car:api_grouped"), {"session_key": race_key, "driver_number": 1}),
+        ),
+        ("dashboard_data", _http_case(client, reverse("main:api_dashboard_data"), {"meeting_key": meeting_key})),
+        ("session_list", _http_case(client, reverse("session:api_list"), {"page": 1})),
+        ("session_list_search", _http_case(client, reverse("session:api_list"), {"q": "grand prix", "page": 2})),
+        ("store_batch", _store_batch_case(spec, fresh)),
+        ("ingest_openf1_rows", _ingest_case(spec, fresh)),
+    ]
+    return [_measure(name, iterations, run) for name, run in cases]
+
+
+def results_payload(spec: SeasonSpec, results: List[CaseResult]) -> dict:
+    return {
+        "spec": asdict(spec),
+        "vendor": connection.vendor,
+        "cases": {result.name: asdict(result) for result in results},
+    }
+
+
+def compare(payload: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Regressions of ``payload`` against ``baseline``: any increase in query
+    count, or a median slower than ``baseline * (1 + tolerance)``.
+    """
+    regressions = []
+    for name, current in payload["cases"].items():
+        previous = baseline.get("cases", {}).get(name)
+        if previous is None:
+            continue
+        if current["queries"] > previous["queries"]:
+            regressions.append(f"{name}: queries {previous['queries']} -> {current['queries']}")
+        if current["median_ms"] > previous["median_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: median {previous['median_ms']:.1f}ms -> {current['median_ms']:.1f}ms"
+            )
+    return regressions
+
+
+def load_baseline(path: Path) -> dict | None:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def save_baseline(path: Path, payload: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n")
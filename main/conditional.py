@@ -0,0 +1,73 @@
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Sequence
+
+from django.db.models import Count, Max, QuerySet
+from django.views.decorators.http import condition
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """Cheap summary of the data behind a response."""
+
+    parts: tuple
+    last_modified: datetime | None = None
+
+
+def queryset_fingerprint(*querysets: QuerySet, extra: Sequence = ()) -> Fingerprint:
+    """
+    One aggregate query per queryset: row count plus ``max(updated_at)``
+    (or ``max(pk)`` for models without an ``updated_at`` column).
+    ``extra`` is mixed in for responses that also depend on the caller.
+    """
+    parts = list(extra)
+    latest_change = None
+    for queryset in querysets:
+        model = queryset.model
+        field_names = {field.name for field in model._meta.concrete_fields}
+        column = "updated_at" if "updated_at" in field_names else "pk"
+        summary = queryset.order_by().aggregate(rows=Count("pk"), latest=Max(column))
+        parts.append((model._meta.label, summary["rows"], summary["latest"]))
+        if column == "updated_at" and summary["latest"] is not None:
+            latest_change = max(latest_change or summary["latest"], summary["latest"])
+    return Fingerprint(tuple(parts), latest_change)
+
+
+def conditional_response(fingerprint_func: Callable[..., Fingerprint | None]):
+    """
+    Wrap a GET view with ETag / Last-Modified handling. ``fingerprint_func``
+    receives the view's arguments and runs before the view; when the client
+    already has the current representation a 304 is returned without calling
+    the view. Returning ``None`` disables the check for that request.
+    """
+
+    def get_fingerprint(request, *args, **kwargs) -> Fingerprint | None:
+        if not hasattr(request, "_conditional_fingerprint"):
+            request._conditional_fingerprint = fingerprint_func(request, *args, **kwargs)
+        return request._conditional_fingerprint
+
+    def etag(request, *args, **kwargs) -> str | None:
+        fingerprint = get_fingerprint(request, *args, **kwargs)
+        if fingerprint is None:
+            return None
+        raw = f"{request.get_full_path()}|{fingerprint.parts!r}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs) -> datetime | None:
+        fingerprint = get_fingerprint(request, *args, **kwargs)
+        return fingerprint.last_modified if fingerprint is not None else None
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view_func)
+
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view_func(request, *args, **kwargs)
+            return conditional_view(request, *args, **kwargs)
+
+        return _wrapped
+
+    return decorator
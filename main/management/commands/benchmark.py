@@ -0,0 +1,130 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from main.benchmark import (
+    DEFAULT_TOLERANCE,
+    SeasonSpec,
+    build_season,
+    compare,
+    load_baseline,
+    results_payload,
+    run_suite,
+    save_baseline,
+)
+
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "benchmarks" / "baseline.json"
+
+
+def add_spec_arguments(parser):
+    defaults = SeasonSpec()
+    parser.add_argument("--meetings", type=int, default=defaults.meetings)
+    parser.add_argument("--sessions", type=int, default=defaults.sessions_per_meeting, help="Sessions per meeting (1-9).")
+    parser.add_argument("--drivers", type=int, default=defaults.drivers)
+    parser.add_argument("--hz", type=float, default=defaults.hz, help="Telemetry samples per second.")
+    parser.add_argument(
+        "--session-seconds",
+        type=int,
+        default=defaults.session_seconds,
+        help="Telemetry length per driver and session.",
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_options(options) -> SeasonSpec:
+    if not 1 <= options["sessions"] <= 9:
+        raise CommandError("--sessions must be between 1 and 9.")
+    if min(options["meetings"], options["drivers"], options["session_seconds"]) < 1 or options["hz"] <= 0:
+        raise CommandError("--meetings, --drivers, --session-seconds and --hz must be positive.")
+    return SeasonSpec(
+        meetings=options["meetings"],
+        sessions_per_meeting=options["sessions"],
+        drivers=options["drivers"],
+        hz=options["hz"],
+        session_seconds=options["session_seconds"],
+        seed=options["seed"],
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic season into a throwaway test database, time the key "
+        "endpoints and ingest paths, and compare against a stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        add_spec_arguments(parser)
+        parser.add_argument("--iterations", type=int, default=5)
+        parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Write this run's results to --baseline instead of comparing.",
+        )
+        parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+        parser.add_argument("--output", type=Path, help="Also write the results JSON here.")
+        parser.add_argument(
+            "--use-current-db",
+            action="store_true",
+            help="Run against the configured database, already seeded with seed_benchmark_season.",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit non-zero when a case regresses against the baseline.",
+        )
+
+    def handle(self, *args, **options):
+        spec = spec_from_options(options)
+        iterations = max(1, options["iterations"])
+
+        if options["use_current_db"]:
+            payload = results_payload(spec, run_suite(spec, iterations))
+        else:
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                self.stdout.write(f"Seeding {spec.car_rows:,} car rows into {connection.settings_dict['NAME']} ...")
+                build_season(spec, log=self.stdout.write)
+                payload = results_payload(spec, run_suite(spec, iterations))
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self._report(payload)
+        if options["output"]:
+            options["output"].write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n")
+
+        if options["save_baseline"]:
+            save_baseline(options["baseline"], payload)
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}."))
+            return
+
+        baseline = load_baseline(options["baseline"])
+        if baseline is None:
+            self.stdout.write(self.style.WARNING(f"No baseline at {options['baseline']}; run with --save-baseline."))
+            return
+        if baseline.get("spec") != payload["spec"] or baseline.get("vendor") != payload["vendor"]:
+            self.stdout.write(self.style.WARNING("Baseline was recorded with a different spec or database; not comparing."))
+            return
+
+        regressions = compare(payload, baseline, options["tolerance"])
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
+            return
+        for line in regressions:
+            self.stdout.write(self.style.ERROR(f"REGRESSION {line}"))
+        if options["fail_on_regression"]:
+            raise CommandError(f"{len(regressions)} benchmark regressions.")
+
+    def _report(self, payload):
+        self.stdout.write(f"{'case':<26}{'median ms':>11}{'p95 ms':>10}{'queries':>9}{'bytes':>11}{'rows/s':>11}")
+        for name, case in payload["cases"].items():
+            size = case["response_bytes"]
+            rate = case["rows_per_s"]
+            self.stdout.write(
+                f"{name:<26}{case['median_ms']:>11.1f}{case['p95_ms']:>10.1f}{case['queries']:>9}"
+                f"{size if size is not None else '-':>11}{f'{rate:,.0f}' if rate else '-':>11}"
+            )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.meeting.models import Meeting
+from main.benchmark import BASE_MEETING_KEY, build_season
+from main.management.commands.benchmark import add_spec_arguments, spec_from_options
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the synthetic benchmark season into the configured database, "
+        "e.g. for profiling with `benchmark --use-current-db`."
+    )
+
+    def add_arguments(self, parser):
+        add_spec_arguments(parser)
+
+    def handle(self, *args, **options):
+        spec = spec_from_options(options)
+        if Meeting.objects.filter(meeting_key__gte=BASE_MEETING_KEY).exists():
+            raise CommandError("A benchmark season is already present in this database.")
+
+        self.stdout.write(f"Seeding {spec.car_rows:,} car rows ...")
+        written = build_season(spec, log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(f"Seeded {spec.meetings} meetings and {written:,} car rows."))
@@ -0,0 +1,147 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
+
+# Samples kept per view and metric; percentiles cover this rolling window.
+WINDOW_SIZE = 512
+PERCENTILES = (50, 90, 99)
+
+METRICS = {
+    "wall_ms": "Wall-clock time spent in the view",
+    "db_queries": "Database queries executed",
+    "db_ms": "Time spent in database queries",
+    "response_bytes": "Response body size (non-streaming responses)",
+    "upstream_ms": "Time spent waiting on OpenF1 calls",
+}
+
+_local = threading.local()
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    # Nearest-rank on an already sorted window.
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, min(rank, len(ordered)) - 1)]
+
+
+class RollingWindow:
+    def __init__(self, size: int = WINDOW_SIZE):
+        self._values: deque = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float) -> None:
+        self._values.append(value)
+        self.count += 1
+        self.total += value
+
+    def summary(self) -> dict:
+        ordered = sorted(self._values)
+        result = {"count": self.count, "sum": round(self.total, 3)}
+        for pct in PERCENTILES:
+            result[f"p{pct}"] = round(_percentile(ordered, pct), 3) if ordered else None
+        return result
+
+
+class MetricsRegistry:
+    """
+    Rolling metrics keyed by ``label`` (a view name, an upstream endpoint),
+    kept in process memory.
+    """
+
+    def __init__(self, metrics: Dict[str, str] = METRICS, *, label: str = "view", window_size: int = WINDOW_SIZE):
+        self.metrics = metrics
+        self.label = label
+        self.window_size = window_size
+        self._views: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, samples: Dict[str, float | None], *, error: bool = False) -> None:
+        with self._lock:
+            entry = self._views.get(key)
+            if entry is None:
+                entry = {
+                    "requests": 0,
+                    "errors": 0,
+                    "windows": {name: RollingWindow(self.window_size) for name in self.metrics},
+                }
+                self._views[key] = entry
+            entry["requests"] += 1
+            if error:
+                entry["errors"] += 1
+            for name, value in samples.items():
+                if value is not None:
+                    entry["windows"][name].add(value)
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            return [
+                {
+                    self.label: view,
+                    "requests": entry["requests"],
+                    "errors": entry["errors"],
+                    **{name: window.summary() for name, window in entry["windows"].items()},
+                }
+                for view, entry in sorted(self._views.items())
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._views.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+
+def prometheus_text(snapshot: Iterable[dict], registry: MetricsRegistry = REGISTRY, prefix: str = "speedview") -> str:
+    snapshot = list(snapshot)
+    label = registry.label
+    lines = [
+        f"# HELP {prefix}_requests_total Requests handled per {label}",
+        f"# TYPE {prefix}_requests_total counter",
+    ]
+    for row in snapshot:
+        lines.append(f'{prefix}_requests_total{{{label}="{row[label]}"}} {row["requests"]}')
+    lines += [
+        f"# HELP {prefix}_request_errors_total Failed requests per {label}",
+        f"# TYPE {prefix}_request_errors_total counter",
+    ]
+    for row in snapshot:
+        lines.append(f'{prefix}_request_errors_total{{{label}="{row[label]}"}} {row["errors"]}')
+
+    for name, help_text in registry.metrics.items():
+        metric = f"{prefix}_{name}"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} summary"]
+        for row in snapshot:
+            summary = row[name]
+            for pct in PERCENTILES:
+                value = summary[f"p{pct}"]
+                if value is None:
+                    continue
+                lines.append(
+                    f'{metric}{{{label}="{row[label]}",quantile="{pct / 100}"}} {value}'
+                )
+            lines.append(f'{metric}_sum{{{label}="{row[label]}"}} {summary["sum"]}')
+            lines.append(f'{metric}_count{{{label}="{row[label]}"}} {summary["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def begin_request() -> None:
+    _local.upstream_ms = 0.0
+
+
+def end_request() -> float:
+    return _local.__dict__.pop("upstream_ms", 0.0)
+
+
+@contextmanager
+def upstream_timer():
+    """Time an outbound OpenF1 call and charge it to the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if hasattr(_local, "upstream_ms"):
+            _local.upstream_ms += (time.perf_counter() - started) * 1000
@@ -0,0 +1,54 @@
+import time
+
+from django.db import connection
+
+from main.metrics import REGISTRY, begin_request, end_request
+
+
+class _QueryTimer:
+    """``connection.execute_wrapper`` hook counting queries and their time."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.seconds += time.perf_counter() - started
+
+
+class RequestMetricsMiddleware:
+    """
+    Record wall time, DB queries/time, response size and upstream OpenF1
+    time for every request, keyed by the resolved view name.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = _QueryTimer()
+        begin_request()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        wall_ms = (time.perf_counter() - started) * 1000
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match is not None else "unresolved"
+        REGISTRY.record(
+            view,
+            {
+                "wall_ms": wall_ms,
+                "db_queries": timer.queries,
+                "db_ms": timer.seconds * 1000,
+                "response_bytes": None if response.streaming else len(response.content),
+                "upstream_ms": end_request(),
+            },
+            error=response.status_code >= 500,
+        )
+        return response
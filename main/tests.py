@@ -1,13 +1,18 @@
 from datetime import timedelta
 
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 
+from apps.circuit.models import Circuit
 from apps.driver.models import Driver
 from apps.meeting.models import Meeting
 from apps.session.models import Session
 from apps.weather.models import Weather
+from apps.car.models import Car
+from main.benchmark import SeasonSpec, build_season, compare, results_payload, run_suite
+from main.metrics import REGISTRY, upstream_timer
 
 
 class MainViewsTest(TestCase):
@@ -58,3 +63,136 @@ class MainViewsTest(TestCase):
         self.assertEqual(len(data["weather"]), 1)
         self.assertEqual(data["weather"][0]["air_temperature"], 30)
         self.assertEqual(len(data["drivers"]), 1)
+
+
+class ConditionalResponseTest(TestCase):
+    def _conditional(self, url, **params):
+        first = self.client.get(url, params)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.has_header("ETag"))
+        return first, self.client.get(url, params, HTTP_IF_NONE_MATCH=first["ETag"])
+
+    def test_meeting_list_returns_304_until_data_changes(self):
+        meeting = Meeting.objects.create(meeting_key=1, meeting_name="Old", date_start=timezone.now())
+        first, second = self._conditional(reverse("meeting:api_list"))
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b"")
+
+        meeting.meeting_name = "New"
+        meeting.save()
+        changed = self.client.get(reverse("meeting:api_list"), HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+
+    def test_list_endpoints_skip_serialisation_when_unchanged(self):
+        Circuit.objects.create(
+            name="Test", location="X", country="Y", length_km=5.0, turns=10,
+            grands_prix="GP", seasons="2024", grands_prix_held=1,
+        )
+        Driver.objects.create(driver_number=1, full_name="Test Driver")
+        for url in (
+            reverse("circuit:api_list"),
+            reverse("driver:api_list"),
+            reverse("team:api_list"),
+        ):
+            first, _ = self._conditional(url)
+            # Only the fingerprint aggregates run for a matching ETag.
+            with self.assertNumQueries(3 if url == reverse("driver:api_list") else 1):
+                second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+            self.assertEqual(second.status_code, 304)
+
+        # Different query strings never share an ETag.
+        a = self.client.get(reverse("meeting:api_list"), {"page": 1})
+        b = self.client.get(reverse("meeting:api_list"), {"page": 2})
+        self.assertNotEqual(a["ETag"], b["ETag"])
+
+
+@override_settings(METRICS_TOKEN="scrape-me")
+class RequestMetricsTest(TestCase):
+    def setUp(self):
+        REGISTRY.reset()
+
+    def _view(self, name):
+        rows = {row["view"]: row for row in REGISTRY.snapshot()}
+        return rows[name]
+
+    def test_middleware_records_queries_and_bytes_per_view(self):
+        Meeting.objects.create(meeting_key=1, meeting_name="A", date_start=timezone.now())
+        resp = self.client.get(reverse("meeting:api_list"))
+        self.client.get(reverse("meeting:api_list"))
+
+        row = self._view("meeting:api_list")
+        self.assertEqual(row["requests"], 2)
+        self.assertEqual(row["errors"], 0)
+        self.assertGreaterEqual(row["db_queries"]["p50"], 1)
+        self.assertEqual(row["response_bytes"]["p99"], len(resp.content))
+        self.assertEqual(row["upstream_ms"]["sum"], 0)
+        self.assertEqual(row["wall_ms"]["count"], 2)
+
+    def test_upstream_timer_outside_request_is_ignored(self):
+        with upstream_timer():
+            pass
+        self.assertEqual(REGISTRY.snapshot(), [])
+
+    def test_report_requires_staff_or_token(self):
+        url = reverse("main:api_metrics")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(
+            self.client.get(url, HTTP_AUTHORIZATION="Bearer wrong").status_code, 403
+        )
+        self.assertEqual(
+            self.client.get(url, HTTP_AUTHORIZATION="Bearer scrape-me").status_code, 200
+        )
+
+        staff = User.objects.create_user("ops", password="pw", is_staff=True)
+        self.client.force_login(staff)
+        payload = self.client.get(url).json()
+        self.assertTrue(payload["ok"])
+        # Earlier report requests are already in the snapshot, 403s included.
+        report = next(row for row in payload["views"] if row["view"] == "main:api_metrics")
+        self.assertEqual(report["requests"], 3)
+
+    def test_prometheus_format(self):
+        self.client.get(reverse("meeting:api_list"))
+        resp = self.client.get(
+            reverse("main:api_metrics"),
+            {"format": "prometheus"},
+            HTTP_AUTHORIZATION="Bearer scrape-me",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp["Content-Type"].startswith("text/plain"))
+        body = resp.content.decode()
+        self.assertIn('speedview_requests_total{view="meeting:api_list"} 1', body)
+        self.assertIn('speedview_db_queries{view="meeting:api_list",quantile="0.99"}', body)
+
+
+class BenchmarkSuiteTest(TestCase):
+    spec = SeasonSpec(meetings=2, sessions_per_meeting=2, drivers=3, session_seconds=5)
+
+    def test_build_season_matches_spec(self):
+        written = build_season(self.spec)
+        self.assertEqual(written, self.spec.car_rows)
+        self.assertEqual(Car.objects.count(), self.spec.car_rows)
+        self.assertEqual(Session.objects.count(), 4)
+        # Deterministic: the same spec always yields the same telemetry.
+        first = list(Car.objects.order_by("session_key", "driver_number", "date").values_list("speed", flat=True))
+        Car.objects.all().delete()
+        Meeting.objects.all().delete()
+        Session.objects.all().delete()
+        build_season(self.spec)
+        again = list(Car.objects.order_by("session_key", "driver_number", "date").values_list("speed", flat=True))
+        self.assertEqual(first, again)
+
+    def test_suite_runs_and_compares_against_baseline(self):
+        build_season(self.spec)
+        payload = results_payload(self.spec, run_suite(self.spec, iterations=1))
+        self.assertIn("grouped_meeting_rows", payload["cases"])
+        self.assertEqual(payload["cases"]["store_batch"]["rows"], self.spec.drivers * self.spec.samples_per_driver)
+        self.assertEqual(compare(payload, payload), [])
+
+        baseline = {"cases": {name: dict(case) for name, case in payload["cases"].items()}}
+        baseline["cases"]["dashboard_data"]["queries"] -= 1
+        baseline["cases"]["session_list"]["median_ms"] = payload["cases"]["session_list"]["median_ms"] / 2
+        regressions = compare(payload, baseline, tolerance=0.25)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("dashboard_data: queries"))
@@ -9,4 +9,5 @@ urlpatterns = [
     path("api/recent-meetings/", views.api_recent_meetings, name="api_recent_meetings"),    
     path("api/dashboard-data/", views.api_dashboard_data, name="api_dashboard_data"),
     path("api/dashboard-drivers", views.api_dashboard_drivers_by_meeting, name="api_dashboard_drivers_by_meeting"),
+    path("api/metrics/", views.api_metrics, name="api_metrics"),
 ]
\ No newline at end of file
@@ -1,5 +1,6 @@
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from datetime import datetime
 from django.shortcuts import get_object_or_404
 from django.core.exceptions import FieldError
@@ -8,6 +9,8 @@ from apps.driver.models import Driver, DriverEntry
 from apps.meeting.models import Meeting  # sesuaikan import path app 'meeting'
 from apps.session.models import Session
 from apps.weather.models import Weather
+from apps.openf1.client import UPSTREAM_REGISTRY
+from main.metrics import REGISTRY, prometheus_text
 
 def api_dashboard_drivers_by_meeting(request):
     meeting_key = request.GET.get("meeting_key")
@@ -184,3 +187,25 @@ def format_date(date_string):
         return dt.strftime('%d %b, %H:%M')
     except (ValueError, TypeError):
         return date_string
+
+
+def api_metrics(request):
+    """
+    Rolling per-view request metrics. Staff users can read it directly;
+    scrapers send ``Authorization: Bearer <METRICS_TOKEN>``.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    authorised = getattr(request.user, "is_staff", False) or (
+        token and request.headers.get("Authorization") == f"Bearer {token}"
+    )
+    if not authorised:
+        return JsonResponse({"ok": False, "error": "Forbidden"}, status=403)
+
+    snapshot = REGISTRY.snapshot()
+    upstream = UPSTREAM_REGISTRY.snapshot()
+    if request.GET.get("format") == "prometheus":
+        body = prometheus_text(snapshot) + prometheus_text(
+            upstream, UPSTREAM_REGISTRY, prefix="speedview_openf1"
+        )
+        return HttpResponse(body, content_type="text/plain; version=0.0.4")
+    return JsonResponse({"ok": True, "views": snapshot, "upstream": upstream})